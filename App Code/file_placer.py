@@ -0,0 +1,362 @@
+import os
+import errno
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from folder_scanner import unique_destination, same_content
+
+
+# 'auto' dipilih per filesystem lewat detect_placement_mode
+PLACEMENT_MODES = ('auto', 'copy', 'move', 'hardlink', 'reflink', 'symlink')
+
+# ioctl FICLONE di Linux (btrfs, xfs, ...) buat copy-on-write clone
+FICLONE = 0x40049409
+
+# Hasil deteksi per device, biar probe-nya cuma sekali per filesystem
+_detected_modes = {}
+_detect_lock = threading.Lock()
+
+
+def reflink_file(src_path, dest_path):
+    """
+    Clone file pake FICLONE. Datanya gak ditulis ulang, cuma metadata yang dibikin
+
+    Raises:
+        OSError kalo filesystem/OS-nya gak dukung reflink
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "Reflink cuma didukung di Linux")
+
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dest.close()
+            os.remove(dest_path)
+            raise
+
+
+def _same_file(path_a, path_b):
+    try:
+        return os.path.samefile(path_a, path_b)
+    except OSError:
+        return False
+
+
+def _link_into_place(link_fn, src_path, dest_path):
+    """Bikin link/clone di path sementara terus rename ke dest_path, biar file lama ketimpa atomik"""
+    if not os.path.lexists(dest_path):
+        link_fn(src_path, dest_path)
+        return
+
+    dest_dir = os.path.dirname(dest_path)
+    tmp_path = os.path.join(dest_dir, f".{os.path.basename(dest_path)}.{os.getpid()}.tmp")
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    link_fn(src_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+
+
+def _reserve_dest(dest_path):
+    """
+    Bikin file kosong di dest_path secara eksklusif (O_EXCL)
+
+    Raises:
+        FileExistsError kalo dest_path udah ada, file yang ada gak pernah ditimpa
+    """
+    fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    os.close(fd)
+
+
+def _copy_into_place(src_path, dest_path):
+    """Copy ke dest_path tanpa nimpa file lain. Salinan identik dari run sebelumnya dibiarin"""
+    if os.path.lexists(dest_path) and same_content(src_path, dest_path):
+        return
+    _reserve_dest(dest_path)
+    try:
+        shutil.copy(src_path, dest_path)
+    except BaseException:
+        # Salinan setengah jadi dibuang, file aslinya gak disentuh
+        os.remove(dest_path)
+        raise
+
+
+# errno dari os.link yang artinya filesystem-nya gak dukung hardlink (FAT, sebagian share)
+_NO_LINK_ERRNOS = {code for code in (errno.EPERM, errno.EMLINK, getattr(errno, 'EOPNOTSUPP', None),
+                                     getattr(errno, 'ENOTSUP', None)) if code is not None}
+
+
+def _rename_noreplace(src_path, dest_path):
+    """
+    Rename yang gak pernah nimpa file di dest_path
+
+    Raises:
+        FileExistsError kalo dest_path udah ada, OSError EXDEV kalo beda filesystem
+    """
+    if os.name == 'nt':
+        # Rename di Windows emang nolak kalo dest_path udah ada
+        os.rename(src_path, dest_path)
+        return
+
+    if not os.path.islink(src_path):
+        try:
+            # link() gagal kalo dest_path udah ada, baru habis itu nama lamanya dilepas
+            os.link(src_path, dest_path)
+        except OSError as e:
+            if e.errno not in _NO_LINK_ERRNOS:
+                raise
+        else:
+            try:
+                os.unlink(src_path)
+            except BaseException:
+                os.unlink(dest_path)
+                raise
+            return
+
+    # Gak bisa hardlink: dicek dulu. Nama tujuan udah di-reserve PlacementQueue,
+    # jadi celahnya cuma sama proses lain yang nulis ke folder yang sama
+    if os.path.lexists(dest_path):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dest_path)
+    os.rename(src_path, dest_path)
+
+
+def _move_into_place(src_path, dest_path):
+    """Pindah ke dest_path tanpa nimpa file lain yang udah ada di sana"""
+    try:
+        _rename_noreplace(src_path, dest_path)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    # Beda filesystem: copy ke tujuan (eksklusif), baru file aslinya dihapus. File
+    # aslinya cuma dihapus di langkah terakhir, jadi kalo ada yang gagal file tujuan
+    # (kosong atau setengah jadi) selalu dibuang lagi
+    _reserve_dest(dest_path)
+    try:
+        shutil.copy2(src_path, dest_path)
+        os.unlink(src_path)
+    except BaseException:
+        os.remove(dest_path)
+        raise
+
+
+def place_file(src_path, dest_path, mode):
+    """
+    Taruh file ke folder kategori sesuai mode
+
+    Args:
+        src_path: File asli
+        dest_path: Path tujuan
+        mode: 'copy', 'move', 'hardlink', 'reflink', atau 'symlink'
+
+    Returns:
+        Mode yang beneran kepake. Reflink/hardlink yang gak didukung fallback ke copy
+
+    Raises:
+        FileExistsError kalo mode copy/move dan di dest_path udah ada file lain
+    """
+    if mode == 'copy':
+        _copy_into_place(src_path, dest_path)
+        return 'copy'
+
+    if mode == 'move':
+        _move_into_place(src_path, dest_path)
+        return 'move'
+
+    # File yang sama dari run sebelumnya, gak perlu diapa-apain lagi
+    if mode in ('hardlink', 'reflink') and _same_file(src_path, dest_path):
+        return mode
+
+    if mode == 'hardlink':
+        try:
+            _link_into_place(os.link, src_path, dest_path)
+            return 'hardlink'
+        except OSError:
+            _copy_into_place(src_path, dest_path)
+            return 'copy'
+
+    if mode == 'reflink':
+        try:
+            _link_into_place(reflink_file, src_path, dest_path)
+            return 'reflink'
+        except OSError:
+            _copy_into_place(src_path, dest_path)
+            return 'copy'
+
+    if mode == 'symlink':
+        target = os.path.abspath(src_path)
+        if os.path.islink(dest_path) and os.readlink(dest_path) == target:
+            return 'symlink'
+        _link_into_place(os.symlink, target, dest_path)
+        return 'symlink'
+
+    raise ValueError(f"Mode penempatan tidak dikenal: {mode}. Pilihan: {', '.join(PLACEMENT_MODES)}")
+
+
+def _probe(folder_path, link_fn):
+    """Coba link_fn di folder_path pake file sementara, return True kalo berhasil"""
+    src_fd, src_path = tempfile.mkstemp(prefix=".gallery_probe_", dir=folder_path)
+    dest_path = src_path + ".clone"
+    try:
+        os.write(src_fd, b"probe")
+        os.close(src_fd)
+        src_fd = None
+        link_fn(src_path, dest_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        if src_fd is not None:
+            os.close(src_fd)
+        for path in (src_path, dest_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def detect_placement_mode(folder_path):
+    """
+    Pilih mode penempatan termurah yang tetap ninggalin file asli di tempatnya
+
+    Urutannya reflink (copy-on-write, btrfs/xfs), terus hardlink (NTFS, ext4, ...),
+    terakhir copy biasa. Hasilnya di-cache per filesystem.
+    """
+    try:
+        device = os.stat(folder_path).st_dev
+    except OSError:
+        return 'copy'
+
+    with _detect_lock:
+        if device not in _detected_modes:
+            if _probe(folder_path, reflink_file):
+                _detected_modes[device] = 'reflink'
+            elif _probe(folder_path, os.link):
+                _detected_modes[device] = 'hardlink'
+            else:
+                _detected_modes[device] = 'copy'
+        return _detected_modes[device]
+
+
+def resolve_placement_mode(mode, folder_path):
+    """Ubah 'auto' jadi mode konkret buat folder_path, mode lain divalidasi aja"""
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(f"Mode penempatan tidak dikenal: {mode}. Pilihan: {', '.join(PLACEMENT_MODES)}")
+    if mode == 'auto':
+        return detect_placement_mode(folder_path)
+    return mode
+
+
+class PlacementQueue:
+    """
+    Stage penempatan file yang jalan terpisah dari thread inferensi.
+
+    Keputusan (file asal, folder tujuan) dimasukin ke antrian terbatas dan dikerjain
+    beberapa worker sekaligus, jadi storage jaringan yang lambat gak bikin model
+    nunggu. Kalo antriannya penuh, submit() nge-block sampai ada slot kosong.
+
+    Kalo ada journal (run_journal.RunJournal), path tujuan dipilih pas submit dan
+    dicatat sebagai 'intent'. Worker baru nyentuh file setelah record itu di-fsync,
+    jadi crash di tengah run selalu bisa dibereskan dari journal.
+    """
+
+    def __init__(self, mode, num_workers=4, queue_size=256, on_placed=None, on_failed=None,
+                 journal=None):
+        """
+        Inisialisasi PlacementQueue
+
+        Args:
+            mode: Mode penempatan konkret (bukan 'auto', lihat resolve_placement_mode)
+            num_workers: Jumlah worker yang naruh file barengan
+            queue_size: Maksimal keputusan yang nunggu dikerjain
+            on_placed: Callback (src_path, dest_path, mode yang kepake, tag) pas berhasil
+            on_failed: Callback (src_path, exception, tag) pas gagal
+            journal: RunJournal buat nyatet intent dan hasil tiap penempatan (opsional)
+        """
+        self.mode = mode
+        self.journal = journal
+        self.on_placed = on_placed
+        self.on_failed = on_failed
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(num_workers)),
+                                            thread_name_prefix="placer")
+        self._slots = threading.BoundedSemaphore(max(1, int(queue_size)))
+        self._reserved = set()
+        self._reserve_lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def submit(self, src_path, dest_dir, file_name, tag=None):
+        """
+        Masukin satu keputusan penempatan ke antrian
+
+        Args:
+            src_path: File asli
+            dest_dir: Folder kategori tujuan
+            file_name: Nama file di folder tujuan (dikasih akhiran kalo bentrok)
+            tag: Data bebas yang diterusin ke callback
+        """
+        self._slots.acquire()
+        with self._idle:
+            self._pending += 1
+        dest_path = None
+        try:
+            # Nama tujuan di-reserve dulu biar dua worker gak milih nama yang sama
+            with self._reserve_lock:
+                # File yang dipindah gak pernah pake ulang file tujuan yang udah ada: kalo
+                # dipake ulang, undo-nya bakal ngambil file lama itu juga
+                reuse_src = None if self.mode == 'move' else src_path
+                dest_path = unique_destination(dest_dir, file_name, reuse_src, self._reserved)
+                self._reserved.add(dest_path)
+            seq = self.journal.intent(src_path, dest_path, self.mode) if self.journal else None
+            self._executor.submit(self._place, src_path, dest_path, seq, tag)
+        except Exception:
+            if dest_path is not None:
+                with self._reserve_lock:
+                    self._reserved.discard(dest_path)
+            self._finish_one()
+            raise
+
+    def _place(self, src_path, dest_path, seq, tag):
+        try:
+            if self.journal:
+                # Intent harus udah aman di disk sebelum file-nya disentuh
+                self.journal.sync_seq(seq)
+            used_mode = place_file(src_path, dest_path, self.mode)
+            if self.journal:
+                self.journal.placed(src_path, dest_path, used_mode)
+            if self.on_placed:
+                self.on_placed(src_path, dest_path, used_mode, tag)
+        except Exception as e:
+            if self.journal:
+                try:
+                    self.journal.failed(src_path, e)
+                except Exception:
+                    pass
+            if self.on_failed:
+                self.on_failed(src_path, e, tag)
+        finally:
+            with self._reserve_lock:
+                self._reserved.discard(dest_path)
+            self._finish_one()
+
+    def _finish_one(self):
+        self._slots.release()
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def flush(self):
+        """Tunggu sampai semua penempatan yang udah di-submit selesai"""
+        with self._idle:
+            while self._pending > 0:
+                self._idle.wait()
+
+    def close(self):
+        """Flush terus matiin worker"""
+        self.flush()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,134 @@
+import os
+import filecmp
+
+
+# Ekstensi default, sama kayak yang dari dulu didukung
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# Tambahan yang bisa diaktifin. HEIC/HEIF butuh paket pillow-heif
+EXTENDED_IMAGE_EXTENSIONS = IMAGE_EXTENSIONS + ('.webp', '.bmp', '.heic', '.heif')
+
+
+class FolderScanner:
+    """
+    Walker folder berbasis os.scandir yang jalan sebagai generator.
+
+    Gambar pertama langsung bisa diproses pas walk-nya masih jalan, gak perlu nunggu
+    listing seluruh folder selesai. Jumlah total gambar diperkirain dari rata-rata
+    gambar per folder yang udah di-scan, dan makin akurat seiring walk-nya jalan.
+    """
+
+    def __init__(self, root_path, extensions=None, exclude_dirs=(), recursive=True, skip_hidden=True):
+        """
+        Inisialisasi FolderScanner
+
+        Args:
+            root_path: Folder yang mau di-scan
+            extensions: Ekstensi file yang dianggap gambar (default: IMAGE_EXTENSIONS)
+            exclude_dirs: Folder yang dilewatin, misalnya folder kategori hasil sortir sebelumnya
+            recursive: Kalo False cuma level paling atas yang di-scan
+            skip_hidden: Lewatin folder yang namanya diawali titik
+        """
+        self.root_path = root_path
+        self.extensions = tuple(ext.lower() for ext in (extensions or IMAGE_EXTENSIONS))
+        self.exclude_dirs = {os.path.normcase(os.path.abspath(d)) for d in exclude_dirs}
+        self.recursive = recursive
+        self.skip_hidden = skip_hidden
+
+        self.files_found = 0
+        self.dirs_scanned = 0
+        self.dirs_pending = 0
+        self.finished = False
+
+    def scan(self):
+        """
+        Walk folder dan yield os.DirEntry tiap file gambar
+
+        Error baca folder (misalnya permission) dilewatin biar walk-nya tetap jalan
+        """
+        self.files_found = 0
+        self.dirs_scanned = 0
+        self.finished = False
+
+        stack = [self.root_path]
+        self.dirs_pending = 1
+
+        while stack:
+            dir_path = stack.pop()
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self._should_descend(entry):
+                                    stack.append(entry.path)
+                                    self.dirs_pending += 1
+                            elif entry.is_file() and entry.name.lower().endswith(self.extensions):
+                                self.files_found += 1
+                                yield entry
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+
+            self.dirs_scanned += 1
+            self.dirs_pending -= 1
+
+        self.finished = True
+
+    def _should_descend(self, entry):
+        if not self.recursive:
+            return False
+        if self.skip_hidden and entry.name.startswith('.'):
+            return False
+        return os.path.normcase(os.path.abspath(entry.path)) not in self.exclude_dirs
+
+    def estimated_total(self):
+        """
+        Perkiraan jumlah total gambar
+
+        Selama walk masih jalan, folder yang belum di-scan dianggap isinya rata-rata
+        sama kayak folder yang udah di-scan. Setelah selesai, nilainya pasti.
+        """
+        if self.finished or self.dirs_scanned == 0:
+            return self.files_found
+        per_dir = self.files_found / self.dirs_scanned
+        return int(round(self.files_found + per_dir * self.dirs_pending))
+
+
+def same_content(path_a, path_b):
+    """True kalo dua path nunjuk file yang sama atau isinya sama persis (ukuran dulu, baru isi)"""
+    try:
+        if os.path.samefile(path_a, path_b):
+            return True
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        return filecmp.cmp(path_a, path_b, shallow=False)
+    except OSError:
+        return False
+
+
+def unique_destination(dest_dir, file_name, src_path=None, reserved=None):
+    """
+    Cari path tujuan yang gak nabrak file lain di dest_dir
+
+    Nama file dikasih akhiran " (1)", " (2)", dst kalo udah kepake. Kalo ada file
+    yang sama persis kayak src_path (file yang sama, atau isinya sama byte per byte),
+    dianggap hasil run sebelumnya dan path-nya dipake lagi. Ukuran yang sama doang
+    gak cukup, file lain gak boleh sampe ketimpa. Path di reserved (lagi dipake
+    worker lain tapi filenya belum ada di disk) dianggap udah kepake.
+    """
+    base, ext = os.path.splitext(file_name)
+    candidate = file_name
+    counter = 0
+    while True:
+        dest_path = os.path.join(dest_dir, candidate)
+        if reserved is not None and dest_path in reserved:
+            counter += 1
+            candidate = f"{base} ({counter}){ext}"
+            continue
+        if not os.path.lexists(dest_path):
+            return dest_path
+        if src_path is not None and same_content(src_path, dest_path):
+            return dest_path
+        counter += 1
+        candidate = f"{base} ({counter}){ext}"
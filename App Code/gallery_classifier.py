@@ -1,16 +1,28 @@
 import os
+import threading
 import numpy as np
 import tensorflow as tf
 import keras
 from tensorflow.keras.preprocessing.image import load_img, img_to_array
-import shutil
+from image_pipeline import (create_loader, load_image_uint8, normalize_image, BatchBuffer,
+                            list_labelled_images, compare_preprocess_modes)
+from folder_scanner import FolderScanner
+from folder_watcher import FolderWatcher
+from file_placer import PlacementQueue, resolve_placement_mode
+from prediction_cache import PredictionCache, hash_file, model_fingerprint, stat_key
+from run_journal import RunJournal, latest_undoable_journal, undo_run
 
 # Set backend
 # os.environ["KERAS_BACKEND"] = "plaidml.keras.backend"
 
 class GalleryClassifier:
     def __init__(self, on_progress_update=None, on_status_update=None, 
-                 on_image_classified=None, on_error=None, on_complete=None):
+                 on_image_classified=None, on_error=None, on_complete=None,
+                 batch_size=32, num_workers=None, queue_size=64, decode_backend='thread',
+                 preprocess_mode='keras', cache_path=None, cache_max_entries=200000,
+                 recursive=False, extensions=None,
+                 placement_workers=4, placement_queue_size=256, placement_mode='auto',
+                 use_journal=True):
         """
         Inisialisasi GalleryClassifier
         
@@ -20,9 +32,45 @@ class GalleryClassifier:
             on_image_classified: Callback pas gambar diklasifikasi (nama file, kelas, kepercayaan diri)
             on_error: Callback pas ada error (nama file, pesan error)
             on_complete: Callback pas klasifikasi selesai (jumlah kategori, diproses, total)
+            batch_size: Jumlah gambar yang dikumpulin jadi satu tensor per panggilan predict
+            num_workers: Jumlah thread decoder gambar (default: jumlah CPU, maksimal 8)
+            queue_size: Maksimal gambar yang udah/lagi di-decode nunggu diambil model
+            decode_backend: 'thread' atau 'process'. Backend 'process' decode pake PIL di
+                proses terpisah (lewat shared memory) biar gak kena GIL, jadi cuma bisa
+                dipake sama preprocess_mode 'pil' atau 'draft'
+            preprocess_mode: 'keras' (jalur lama), 'pil', atau 'draft' (decode JPEG langsung
+                di skala kecil, jauh lebih cepat buat foto resolusi tinggi)
+            cache_path: Path file SQLite buat cache prediksi antar run (None = gak pake cache)
+            cache_max_entries: Maksimal entri cache sebelum yang lama dibuang
+            recursive: Ikut proses gambar di subfolder (folder kategori hasil sortir dilewatin).
+                Defaultnya False, sama kayak dulu: cuma level paling atas
+            extensions: Ekstensi gambar yang diproses (default: .png/.jpg/.jpeg, lihat
+                folder_scanner.EXTENDED_IMAGE_EXTENSIONS buat HEIC/WEBP/BMP)
+            placement_mode: Cara naruh gambar ke folder kategori: 'copy', 'move', 'hardlink',
+                'reflink', 'symlink', atau 'auto' (default). 'auto' milih yang termurah di
+                filesystem-nya (reflink > hardlink > copy) dan file aslinya tetap di tempat
+            placement_workers: Jumlah worker yang naruh file barengan di luar thread inferensi
+            placement_queue_size: Maksimal file yang nunggu ditaruh sebelum inferensi ikut nunggu
+            use_journal: Catat tiap keputusan dan penempatan ke journal di <folder>/.gallery_runs,
+                biar run yang keputus bisa dilanjutin tanpa naruh file dua kali
         """
         self.model = None
         self.labels = ["foods", "landscape", "people", "receipts", "screenshots"]
+        self.batch_size = max(1, int(batch_size))
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.decode_backend = decode_backend
+        self.preprocess_mode = preprocess_mode
+        self.cache_path = cache_path
+        self.cache_max_entries = cache_max_entries
+        self.cache = None
+        self.recursive = recursive
+        self.extensions = extensions
+        self.placement_mode = placement_mode
+        self.placement_workers = placement_workers
+        self.placement_queue_size = placement_queue_size
+        self.use_journal = use_journal
+        self._watch_stop = None
         
         # Simpan callbacks
         self.on_progress_update = on_progress_update
@@ -34,15 +82,52 @@ class GalleryClassifier:
     def load_model(self, model_path):
         """Load model klasifikasi"""
         self.model = keras.saving.load_model(model_path)
+        
+        # Cache prediksi dipisah per model, jadi ganti model otomatis gak kena cache lama
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        if self.cache_path:
+            self.cache = PredictionCache(self.cache_path, model_fingerprint(model_path),
+                                         self.cache_max_entries)
+        
         return self.model is not None
     
-    def process_folder(self, folder_path, selected_categories=None):
+    def close_cache(self):
+        """Tutup cache prediksi, dipanggil pas GUI/CLI selesai"""
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+    
+    def _flush_cache(self):
+        """Commit sisa tulisan cache di akhir run, termasuk last_used dari cache hit"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.flush()
+        except Exception as e:
+            if self.on_status_update:
+                self.on_status_update(f"Peringatan: gagal nyimpen cache ({str(e)})")
+    
+    def invalidate_cache(self, all_models=False):
+        """
+        Bersihin cache prediksi
+        
+        Args:
+            all_models: Kalo True semua entri dihapus, kalo False cuma entri dari model lain
+        """
+        if self.cache is not None:
+            self.cache.invalidate(all_models)
+    
+    def process_folder(self, folder_path, selected_categories=None, resume=True):
         """
         Proses semua gambar di folder, klasifikasi, terus urutin ke kategori
         
         Args:
             folder_path: Path ke folder yang ada gambarnya
             selected_categories: List kategori yang mau diproses (kalo None, semua diproses)
+            resume: Kalo run sebelumnya di folder ini keputus, lanjutin dari journal-nya.
+                File yang udah beres dilewatin, penempatan yang kepotong dibereskan dulu
         """
         if self.model is None:
             if self.on_error:
@@ -54,17 +139,32 @@ class GalleryClassifier:
             selected_categories = self.labels
         
         try:
-            # Bikin folder tujuan buat kategori yang dipilih kalo belum ada
-            for label in selected_categories:
-                dest_path = os.path.join(folder_path, label)
-                if not os.path.exists(dest_path):
-                    os.makedirs(dest_path)
-            
-            # Ambil file gambar
-            image_files = [f for f in os.listdir(folder_path) 
-                         if os.path.isfile(os.path.join(folder_path, f)) and 
-                         f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            total_images = len(image_files)
+            # Walk folder sambil jalan, gambar pertama langsung diproses tanpa nunggu
+            # listing selesai. Folder kategori (hasil sortir) gak ikut di-scan
+            scanner = self._create_scanner(folder_path)
+            run = self._start_run(folder_path, selected_categories, resume, scanner)
+            
+            image_entries = scanner.scan()
+            if run["done"]:
+                image_entries = self._skip_journaled(run, image_entries)
+            
+            try:
+                try:
+                    self._classify_paths(run, self._entry_paths(run, image_entries))
+                finally:
+                    # on_complete baru dipanggil setelah semua file beneran udah ditaruh
+                    run["placer"].close()
+                # Run yang selesai normal gak bakal dilanjutin lagi
+                if run["journal"] is not None:
+                    run["journal"].complete(processed=run["processed"], skipped=run["skipped"])
+            finally:
+                if run["journal"] is not None:
+                    run["journal"].close()
+                self._flush_cache()
+            
+            processed = run["processed"]
+            skipped = run["skipped"]
+            total_images = scanner.files_found
             
             if total_images == 0:
                 if self.on_status_update:
@@ -72,76 +172,468 @@ class GalleryClassifier:
                 if self.on_complete:
                     self.on_complete({label: 0 for label in selected_categories}, 0, 0)
                 return
+            
+            # Proses selesai
+            if self.on_complete:
+                # Filter jumlah biar cuma ada kategori yang dipilih
+                filtered_counts = {k: v for k, v in run["category_counts"].items() if k in selected_categories}
+                self.on_complete(filtered_counts, processed, total_images)
                 
-            # Catat jumlah per kategori
-            category_counts = {label: 0 for label in self.labels}
-            processed = 0
-            skipped = 0
+            if self.on_status_update:
+                self.on_status_update(f"Selesai! {processed} gambar udah diurutin ke kategori yang dipilih. {skipped} gambar dilewati.")
             
-            # Proses tiap gambar
-            for i, img_file in enumerate(image_files):
+        except Exception as e:
+            if self.on_error:
+                self.on_error("", str(e))
+
+    def watch_folder(self, folder_path, selected_categories=None, stop_event=None, debounce=2.0,
+                     poll_interval=5.0, backend='auto', process_existing=True, resume=True):
+        """
+        Pantau folder terus klasifikasi gambar baru begitu selesai ditulis
+        
+        Model tetap nongkrong di memori selama dipantau. Gambar yang baru masuk atau
+        berubah dikumpulin sampai debounce detik gak ada perubahan, terus diproses per
+        batch kecil (maksimal batch_size) lewat loader, cache, journal, sama antrian
+        penempatan yang sama kayak process_folder. Semua batch masuk ke satu run, jadi
+        undo_last_run ngebatalin satu sesi pantau sekaligus.
+        
+        Blocking sampai stop_event di-set atau stop_watch() dipanggil.
+        
+        Args:
+            folder_path: Path ke folder yang dipantau
+            selected_categories: List kategori yang mau diproses (kalo None, semua diproses)
+            stop_event: threading.Event buat berhentiin pantauan (kalo None, dibikinin)
+            debounce: Detik tanpa perubahan sebelum file dianggap selesai ditulis
+            poll_interval: Jeda antar scan kalo inotify gak ada
+            backend: 'auto', 'inotify', atau 'poll' (lihat FolderWatcher)
+            process_existing: Proses dulu gambar yang udah ada sebelum mulai mantau
+            resume: Lanjutin run yang keputus di folder ini, sama kayak process_folder
+        """
+        if self.model is None:
+            if self.on_error:
+                self.on_error("", "Model belum di-load. Load dulu ya!")
+            return
+        
+        if selected_categories is None or len(selected_categories) == 0:
+            selected_categories = self.labels
+        
+        self._watch_stop = stop_event or threading.Event()
+        watcher = None
+        try:
+            run = self._start_run(folder_path, selected_categories, resume, None)
+            # (ukuran, mtime) terakhir tiap file yang udah diproses, biar file yang
+            # ketangkep watcher pas scan awal gak diproses dua kali
+            run["signatures"] = {}
+            
+            try:
                 try:
-                    # Update progress
-                    progress = (i / total_images) * 100
-                    if self.on_progress_update:
-                        self.on_progress_update(progress)
-                    
-                    if self.on_status_update:
-                        self.on_status_update(f"Lagi proses gambar {i+1} dari {total_images}")
+                    # Watcher dipasang sebelum scan awal biar file yang masuk pas scan gak kelewat
+                    watcher = FolderWatcher(
+                        folder_path, self.extensions,
+                        exclude_dirs=[os.path.join(folder_path, label) for label in self.labels],
+                        recursive=self.recursive, debounce=debounce,
+                        poll_interval=poll_interval, backend=backend
+                    )
                     
-                    # Load dan preprocess gambar
-                    img_path = os.path.join(folder_path, img_file)
-                    img = load_img(img_path)
+                    if process_existing:
+                        run["scanner"] = self._create_scanner(folder_path)
+                        image_entries = run["scanner"].scan()
+                        if run["done"]:
+                            image_entries = self._skip_journaled(run, image_entries)
+                        image_entries = self._skip_unchanged(run, image_entries)
+                        self._classify_paths(run, self._entry_paths(run, image_entries))
+                        run["scanner"] = None
                     
-                    # Preprocess buat model
-                    img_array = img_to_array(img)
-                    img_resized = tf.image.resize(img_array, (224, 224))
-                    img_normalized = img_resized / 255.0
-                    img_batch = np.expand_dims(img_normalized, axis=0)
-                    
-                    # Bikin prediksi
-                    prediction = self.model.predict(img_batch, verbose=0)
-                    predicted_class = self.labels[np.argmax(prediction)]
-                    confidence = np.max(prediction)
+                    if self.on_status_update:
+                        self.on_status_update(f"Mantau folder ({watcher.backend})... "
+                                              f"{run['processed']} gambar udah diurutin.")
                     
-                    # Cuma pindahin gambar kalo kelas prediksinya ada di kategori yang dipilih
-                    if predicted_class in selected_categories:
-                        # Pindahin gambar ke folder yang sesuai
-                        dest_path = os.path.join(folder_path, predicted_class, img_file)
-                        shutil.copy(img_path, dest_path)
-                        
-                        # Update jumlah
-                        category_counts[predicted_class] += 1
-                        processed += 1
-                        
-                        # Catat klasifikasi kalo ada callback
-                        if self.on_image_classified:
-                            self.on_image_classified(img_file, predicted_class, confidence)
-                    else:
-                        skipped += 1
-                        if self.on_image_classified:
-                            self.on_image_classified(
-                                img_file, 
-                                f"{predicted_class} (dilewati - gak ada di kategori yang dipilih)", 
-                                confidence
-                            )
-                
-                except Exception as e:
-                    if self.on_error:
-                        self.on_error(img_file, str(e))
+                    # Tiap batch dari watcher langsung diprediksi pake model yang udah ke-load
+                    for entries in watcher.watch(self._watch_stop, self.batch_size):
+                        self._classify_paths(run, self._entry_paths(run, self._skip_unchanged(run, entries)))
+                        self._flush_cache()
+                        if self.on_status_update:
+                            self.on_status_update(f"Mantau folder ({watcher.backend})... "
+                                                  f"{run['processed']} gambar udah diurutin.")
+                finally:
+                    if watcher is not None:
+                        watcher.close()
+                    run["placer"].close()
+                if run["journal"] is not None:
+                    run["journal"].complete(processed=run["processed"], skipped=run["skipped"])
+            finally:
+                if run["journal"] is not None:
+                    run["journal"].close()
+                self._flush_cache()
             
-            # Proses selesai
             if self.on_complete:
-                # Filter jumlah biar cuma ada kategori yang dipilih
-                filtered_counts = {k: v for k, v in category_counts.items() if k in selected_categories}
-                self.on_complete(filtered_counts, processed, total_images)
-                
+                filtered_counts = {k: v for k, v in run["category_counts"].items() if k in selected_categories}
+                self.on_complete(filtered_counts, run["processed"], run["seen"])
+            
             if self.on_status_update:
-                self.on_status_update(f"Selesai! {processed} gambar udah diurutin ke kategori yang dipilih. {skipped} gambar dilewati.")
+                self.on_status_update(f"Pantauan dihentiin. {run['processed']} gambar udah diurutin, "
+                                      f"{run['skipped']} gambar dilewati.")
+        
+        except Exception as e:
+            if self.on_error:
+                self.on_error("", str(e))
+
+    def stop_watch(self):
+        """Hentiin watch_folder yang lagi jalan"""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+
+    def _create_scanner(self, folder_path):
+        return FolderScanner(
+            folder_path, self.extensions,
+            exclude_dirs=[os.path.join(folder_path, label) for label in self.labels],
+            recursive=self.recursive
+        )
+
+    def _start_run(self, folder_path, selected_categories, resume, scanner):
+        """
+        Siapin state satu run: folder kategori, journal, sama antrian penempatan
+        
+        Returns:
+            Dict state run yang dipake bareng semua tahap klasifikasi
+        """
+        # Bikin folder tujuan buat kategori yang dipilih kalo belum ada
+        for label in selected_categories:
+            dest_path = os.path.join(folder_path, label)
+            if not os.path.exists(dest_path):
+                os.makedirs(dest_path)
+        
+        # State satu run: jumlah per kategori, counter, sama hash gambar yang belum ke-cache
+        run = {
+            "folder_path": folder_path,
+            "selected_categories": selected_categories,
+            "category_counts": {label: 0 for label in self.labels},
+            "scanner": scanner,
+            "seen": 0,
+            "processed": 0,
+            "skipped": 0,
+            "content_hashes": {},
+            "done": set(),
+            "lock": threading.Lock(),
+        }
+        
+        placement_mode = resolve_placement_mode(self.placement_mode, folder_path)
+        run["journal"] = self._open_journal(run, placement_mode, resume)
+        if run["journal"] is not None and run["journal"].mode:
+            # Run yang dilanjutin tetap pake mode penempatan run aslinya
+            placement_mode = run["journal"].mode
+        
+        # Penempatan file jalan di worker sendiri, thread ini cuma ngasih keputusan
+        run["placer"] = PlacementQueue(
+            placement_mode, self.placement_workers, self.placement_queue_size,
+            on_placed=lambda src, dest, mode, tag: self._on_placed(run, src, tag),
+            on_failed=lambda src, error, tag: self._on_place_failed(src, error),
+            journal=run["journal"]
+        )
+        return run
+
+    def _entry_paths(self, run, image_entries):
+        """Path gambar yang masih perlu di-decode, yang ada di cache langsung diurutin"""
+        if self.cache is not None:
+            return self._skip_cached(run, image_entries)
+        return (entry.path for entry in image_entries)
+
+    def _skip_unchanged(self, run, image_entries):
+        """Saring file yang udah diproses di sesi pantau ini dan belum berubah sejak itu"""
+        signatures = run["signatures"]
+        for entry in image_entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            signature = (st.st_size, st.st_mtime_ns)
+            abs_path = os.path.abspath(entry.path)
+            if signatures.get(abs_path) == signature:
+                continue
+            signatures[abs_path] = signature
+            yield entry
+
+    def _preprocess_image(self, img_path, mode=None):
+        """
+        Load gambar terus ubah jadi array 224x224
+        
+        Mode 'keras' return float yang udah dinormalisasi, mode 'pil'/'draft' return
+        uint8 (normalisasinya lewat normalize_image)
+        """
+        mode = mode or self.preprocess_mode
+        if mode == 'keras':
+            img = load_img(img_path)
+            img_array = img_to_array(img)
+            img_resized = tf.image.resize(img_array, (224, 224))
+            return img_resized / 255.0
+        return load_image_uint8(img_path, draft=mode == 'draft')
+    
+    def compare_preprocess_modes(self, labelled_folder, modes=('keras', 'draft'), limit_per_class=None):
+        """
+        Bandingin akurasi jalur preprocess lama sama jalur cepat di sampel berlabel
+        
+        Args:
+            labelled_folder: Folder dengan struktur <folder>/<label>/*.jpg sesuai self.labels
+            modes: Mode preprocess yang dibandingin, yang pertama jadi acuan
+            limit_per_class: Maksimal gambar per kelas
+            
+        Returns:
+            Dict per mode berisi accuracy, accuracy_delta, agreement (lihat image_pipeline)
+        """
+        if self.model is None:
+            raise ValueError("Model belum di-load. Load dulu ya!")
+        
+        samples = list_labelled_images(labelled_folder, self.labels, limit_per_class)
+        if not samples:
+            raise ValueError(f"Gak ada gambar berlabel di {labelled_folder}")
+        
+        def predict_fn(img_batch):
+            predictions = self.model.predict(img_batch, batch_size=len(img_batch), verbose=0)
+            return np.argmax(predictions, axis=1)
+        
+        return compare_preprocess_modes(samples, self._preprocess_image, predict_fn, modes,
+                                        self.batch_size, self.num_workers)
+    
+    def undo_last_run(self, folder_path):
+        """
+        Batalin run terakhir di folder_path pake journal-nya
+        
+        File yang dipindah dibalikin pake rename, salinan sama link dihapus (salinan
+        cuma kalo isinya masih sama persis kayak file aslinya). Dipanggil lagi berarti
+        run sebelumnya yang dibatalin, dan undo yang keputus bisa diulang.
+        
+        Returns:
+            Dict ringkasan (lihat run_journal.undo_run), atau None kalo gak ada run
+            yang bisa dibatalin atau undo-nya gagal
+        """
+        try:
+            journal_path = latest_undoable_journal(folder_path)
+            if journal_path is None:
+                if self.on_status_update:
+                    self.on_status_update("Gak ada run yang bisa dibatalin di folder ini.")
+                return None
+            
+            def report(done, total):
+                if self.on_progress_update:
+                    self.on_progress_update(done / total * 100)
             
+            summary = undo_run(journal_path, self.placement_workers, report)
+            if self.on_error:
+                for path, message in summary["errors"]:
+                    self.on_error(os.path.basename(path), message)
+            
+            if self.on_status_update:
+                self.on_status_update(f"Undo selesai: {summary['restored']} file dibalikin, "
+                                      f"{summary['removed']} salinan dihapus, {len(summary['errors'])} gagal.")
+            return summary
+        
         except Exception as e:
             if self.on_error:
                 self.on_error("", str(e))
+            return None
+
+    def _open_journal(self, run, placement_mode, resume):
+        """
+        Buka journal buat run ini: lanjutin journal yang belum selesai, atau bikin baru
+        
+        Returns:
+            RunJournal, atau None kalo journal dimatiin
+        """
+        if not self.use_journal:
+            return None
+        
+        folder_path = run["folder_path"]
+        journal, state = RunJournal.resume_latest(folder_path) if resume else (None, None)
+        if journal is None:
+            return RunJournal.create(folder_path, placement_mode,
+                                     categories=list(run["selected_categories"]))
+        
+        # Penempatan yang kepotong crash dibereskan dulu sebelum ada file baru yang disentuh
+        journal.recover(state)
+        run["done"] = state.done_paths()
+        if self.on_status_update:
+            self.on_status_update(f"Lanjutin run sebelumnya, {len(run['done'])} file udah beres")
+        return journal
+
+    def _skip_journaled(self, run, image_entries):
+        """Saring gambar yang menurut journal udah beres di run yang dilanjutin"""
+        done = run["done"]
+        for entry in image_entries:
+            if os.path.abspath(entry.path) in done:
+                # Tetap dihitung biar progress-nya nyampe 100%
+                run["seen"] += 1
+                continue
+            yield entry
+
+    def _classify_paths(self, run, image_paths):
+        """Decode, prediksi per batch, terus urutin semua gambar dari image_paths"""
+        # Decode jalan di background, model tinggal ambil per batch
+        loader = create_loader(self.decode_backend, self._preprocess_image,
+                               self.num_workers, self.queue_size,
+                               draft=self.preprocess_mode == 'draft',
+                               preprocess_mode=self.preprocess_mode)
+        
+        # Buffer float32 dialokasiin sekali per run, tiap batch ditulis ulang di situ
+        buffer = BatchBuffer(self.batch_size)
+        batch = []
+        for img_path, img_array, error in loader.iterate(image_paths):
+            img_file = os.path.basename(img_path)
+            self._report_progress(run)
+            
+            if error is not None:
+                if self.on_error:
+                    self.on_error(img_file, str(error))
+                continue
+            
+            # Hasil decode langsung disalin ke buffer, biar slot shared memory-nya
+            # (backend process) bisa dipake lagi
+            buffer.add(img_array)
+            batch.append((img_file, img_path))
+            if buffer.full():
+                self._classify_batch(run, batch, buffer.finalize())
+                buffer.reset()
+                batch = []
+        
+        # Sisa gambar yang belum genap satu batch
+        if batch:
+            self._classify_batch(run, batch, buffer.finalize())
+
+    def _report_progress(self, run):
+        """Update progress sama status buat gambar berikutnya di run ini"""
+        i = run["seen"]
+        run["seen"] += 1
+        
+        # Mode pantau gak punya total, cukup laporin udah gambar ke berapa
+        scanner = run["scanner"]
+        if scanner is None:
+            if self.on_status_update:
+                self.on_status_update(f"Lagi proses gambar baru ke-{i+1}")
+            return
+        
+        # Total masih perkiraan selama walk folder belum selesai
+        total = max(scanner.estimated_total(), i + 1)
+        total_text = str(total) if scanner.finished else f"~{total}"
+        
+        progress = (i / total) * 100
+        if self.on_progress_update:
+            self.on_progress_update(progress)
+        
+        if self.on_status_update:
+            self.on_status_update(f"Lagi proses gambar {i+1} dari {total_text}")
+    
+    def _skip_cached(self, run, image_entries):
+        """
+        Saring gambar yang prediksinya udah ada di cache
+        
+        Hash isi file cuma dihitung ulang kalo (inode, ukuran, mtime) file-nya berubah
+        sejak run terakhir. Gambar yang ketemu di cache langsung diurutin tanpa decode
+        dan inferensi, sisanya diterusin ke loader. Hash-nya dicatat biar hasilnya bisa
+        disimpen nanti.
+        """
+        for entry in image_entries:
+            img_path = entry.path
+            try:
+                key = stat_key(entry)
+                abs_path = os.path.abspath(img_path)
+                content_hash = self.cache.lookup_hash(abs_path, key)
+                if content_hash is None:
+                    content_hash = hash_file(img_path)
+                    self.cache.record_hash(abs_path, key, content_hash)
+                cached = self.cache.get(content_hash)
+            except Exception:
+                # Biar error-nya muncul di tahap decode kayak biasa
+                yield img_path
+                continue
+            
+            if cached is None:
+                run["content_hashes"][img_path] = content_hash
+                yield img_path
+                continue
+            
+            self._report_progress(run)
+            _, prediction = cached
+            self._handle_prediction(run, os.path.basename(img_path), img_path, prediction)
+    
+    def _classify_batch(self, run, batch, img_batch):
+        """
+        Prediksi satu batch gambar sekaligus, terus urutin hasilnya satu-satu
+        
+        Args:
+            run: State run dari process_folder
+            batch: List (nama file, path) sesuai urutan gambar di img_batch
+            img_batch: Array float32 (N, 224, 224, 3) yang udah dinormalisasi
+        """
+        try:
+            # Satu panggilan predict buat satu batch
+            predictions = self.model.predict(img_batch, batch_size=len(batch), verbose=0)
+        except Exception as e:
+            if self.on_error:
+                for img_file, _ in batch:
+                    self.on_error(img_file, str(e))
+            return
+        
+        # Simpen ke cache biar run berikutnya gak perlu inferensi ulang
+        if self.cache is not None:
+            try:
+                self.cache.put_many(
+                    (run["content_hashes"].pop(img_path), prediction)
+                    for (_, img_path), prediction in zip(batch, predictions)
+                    if img_path in run["content_hashes"]
+                )
+            except Exception as e:
+                # Cache cuma buat ngebut, gagal nyimpen bukan error per file dan gak bikin run gagal
+                if self.on_status_update:
+                    self.on_status_update(f"Peringatan: gagal nyimpen cache ({str(e)})")
+        
+        for (img_file, img_path), prediction in zip(batch, predictions):
+            self._handle_prediction(run, img_file, img_path, prediction)
+    
+    def _handle_prediction(self, run, img_file, img_path, prediction):
+        """Urutin satu gambar sesuai hasil prediksinya"""
+        try:
+            predicted_class = self.labels[np.argmax(prediction)]
+            confidence = np.max(prediction)
+            selected = predicted_class in run["selected_categories"]
+            
+            # Keputusannya dicatat dulu, run yang dilanjutin gak perlu inferensi ulang
+            if run["journal"] is not None:
+                run["journal"].decision(img_path, predicted_class, confidence, selected)
+            
+            # Cuma pindahin gambar kalo kelas prediksinya ada di kategori yang dipilih
+            if selected:
+                # Masukin ke antrian penempatan, jumlah sama callback di-update pas udah ditaruh
+                dest_dir = os.path.join(run["folder_path"], predicted_class)
+                run["placer"].submit(img_path, dest_dir, img_file, (img_file, predicted_class, confidence))
+            else:
+                run["skipped"] += 1
+                if self.on_image_classified:
+                    self.on_image_classified(
+                        img_file, 
+                        f"{predicted_class} (dilewati - gak ada di kategori yang dipilih)", 
+                        confidence
+                    )
+        
+        except Exception as e:
+            if self.on_error:
+                self.on_error(img_file, str(e))
+    
+    def _on_placed(self, run, img_path, tag):
+        """Dipanggil worker penempatan pas satu gambar berhasil ditaruh"""
+        img_file, predicted_class, confidence = tag
+        
+        # Update jumlah
+        with run["lock"]:
+            run["category_counts"][predicted_class] += 1
+            run["processed"] += 1
+        
+        # Catat klasifikasi kalo ada callback
+        if self.on_image_classified:
+            self.on_image_classified(img_file, predicted_class, confidence)
+    
+    def _on_place_failed(self, img_path, error):
+        """Dipanggil worker penempatan pas gagal naruh gambar"""
+        if self.on_error:
+            self.on_error(os.path.basename(img_path), str(error))
 
     def classify_single_image(self, image_path):
         """Klasifikasi satu gambar dan return kelas prediksi sama kepercayaan diri"""
@@ -150,13 +642,7 @@ class GalleryClassifier:
             
         try:
             # Load dan preprocess gambar
-            img = load_img(image_path)
-            
-            # Preprocess buat model
-            img_array = img_to_array(img)
-            img_resized = tf.image.resize(img_array, (224, 224))
-            img_normalized = img_resized / 255.0
-            img_batch = np.expand_dims(img_normalized, axis=0)
+            img_batch = np.expand_dims(normalize_image(self._preprocess_image(image_path)), axis=0)
             
             # Bikin prediksi
             prediction = self.model.predict(img_batch, verbose=0)
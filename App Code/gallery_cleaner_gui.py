@@ -106,6 +106,12 @@ class GalleryCleanerGUI:
         folder_frame = ttk.LabelFrame(main_frame, text="Sumber Gambar", padding=15)  # Padding diperbesar
         folder_frame.pack(fill=tk.X, padx=15, pady=15)  # Padding diperbesar
         
+        # Subfolder tidak ikut diproses kecuali dicentang, agar susunan folder yang ada tidak berubah
+        self.include_subfolders = tk.BooleanVar(value=False)
+        subfolder_check = ttk.Checkbutton(folder_frame, text="Sertakan subfolder",
+                                          variable=self.include_subfolders)
+        subfolder_check.pack(side=tk.BOTTOM, anchor=tk.W, padx=10, pady=(10, 0))
+        
         folder_entry = ttk.Entry(folder_frame, textvariable=self.folder_path, width=50)
         folder_entry.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)  # Padding diperbesar
         
@@ -169,6 +175,11 @@ class GalleryCleanerGUI:
                                      command=self.start_classification, state="disabled")
         self.start_button.pack(side=tk.LEFT, padx=10)  # Padding diperbesar
         
+        # Kembalikan semua file dari run terakhir di folder yang dipilih
+        self.undo_button = ttk.Button(controls_frame, text="Undo Run Terakhir", 
+                                    command=self.undo_last_run)
+        self.undo_button.pack(side=tk.LEFT, padx=10)
+        
         # Frame progress
         progress_frame = ttk.LabelFrame(main_frame, text="Progress", padding=15)  # Padding diperbesar
         progress_frame.pack(fill=tk.X, padx=15, pady=10)  # Padding diperbesar
@@ -251,6 +262,9 @@ class GalleryCleanerGUI:
         
         # Nonaktifkan tombol mulai selama pemrosesan
         self.start_button.config(state="disabled")
+        self.undo_button.config(state="disabled")
+        
+        self.classifier.recursive = self.include_subfolders.get()
         
         # Mulai klasifikasi dalam thread terpisah dengan kategori yang dipilih
         threading.Thread(
@@ -259,6 +273,40 @@ class GalleryCleanerGUI:
             daemon=True
         ).start()
     
+    def undo_last_run(self):
+        folder = self.folder_path.get()
+        if not folder:
+            messagebox.showwarning("Folder Belum Dipilih", "Silakan pilih folder yang akan di-undo.")
+            return
+        
+        if not messagebox.askyesno("Undo Run Terakhir", 
+                                   f"Kembalikan semua file dari run terakhir di {folder}?"):
+            return
+        
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, f"Membatalkan run terakhir di {folder}...\n")
+        self.progress_var.set(0)
+        
+        # Nonaktifkan tombol selama undo
+        self.start_button.config(state="disabled")
+        self.undo_button.config(state="disabled")
+        
+        threading.Thread(target=self._undo_thread, args=(folder,), daemon=True).start()
+    
+    def _undo_thread(self, folder):
+        summary = self.classifier.undo_last_run(folder)
+        self.root.after(0, lambda: self.undo_finished(summary))
+    
+    def undo_finished(self, summary):
+        if summary is not None:
+            self.log_result(f"\nRun {summary['run_id']} dibatalkan: {summary['restored']} file dikembalikan, "
+                            f"{summary['removed']} salinan dihapus, {len(summary['errors'])} gagal.")
+        self.progress_var.set(100)
+        # Tombol mulai hanya aktif jika model sudah dimuat
+        if self.classifier.model is not None:
+            self.start_button.config(state="normal")
+        self.undo_button.config(state="normal")
+    
     # Metode callback untuk classifier
     def update_progress(self, progress_value):
         self.root.after(0, lambda: self.progress_var.set(progress_value))
@@ -277,6 +325,7 @@ class GalleryCleanerGUI:
         self.root.after(0, lambda: self.show_summary(category_counts, processed, total))
         self.root.after(0, lambda: self.update_status_text(f"Selesai! {processed} gambar diurutkan ke dalam kategori."))
         self.root.after(0, lambda: self.start_button.config(state="normal"))
+        self.root.after(0, lambda: self.undo_button.config(state="normal"))
         self.root.after(0, lambda: self.progress_var.set(100))
     
     def log_result(self, message):
@@ -310,6 +359,8 @@ def main():
     root = tk.Tk()
     app = GalleryCleanerGUI(root)
     root.mainloop()
+    # Jendela udah ditutup, tulis sisa update cache sebelum keluar
+    app.classifier.close_cache()
 
 if __name__ == "__main__":
     main()
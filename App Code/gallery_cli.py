@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+import multiprocessing
+from file_placer import PLACEMENT_MODES
+from folder_watcher import WATCH_BACKENDS
+
+
+# Kode keluar: 0 semua beres, 1 ada gambar yang gagal, 2 argumen salah (argparse),
+# 3 run-nya gagal total (model gak ke-load, folder gak ada, ...), 130 dihentiin Ctrl+C
+EXIT_OK = 0
+EXIT_FILE_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_FATAL = 3
+EXIT_INTERRUPTED = 130
+
+
+class JsonLinesReporter:
+    """
+    Ubah callback classifier jadi event JSON, satu baris per event di stdout.
+
+    Callback-nya dipanggil dari thread inferensi sama worker penempatan, jadi
+    nulisnya dikunci biar baris dari dua thread gak campur.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.errors = 0
+        self.fatal = False
+        self.root = None
+        self._last_percent = None
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=float)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def start_root(self, root):
+        self.root = root
+        self._last_percent = None
+        self.emit("start", root=root)
+
+    def on_progress_update(self, progress):
+        # Progress dateng per gambar, yang dikirim cuma pas persennya naik
+        percent = int(progress)
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.emit("progress", root=self.root, percent=percent)
+
+    def on_status_update(self, message):
+        self.emit("status", root=self.root, message=message)
+
+    def on_image_classified(self, img_file, predicted_class, confidence):
+        # Kelas di luar kategori yang dipilih dateng sebagai "kelas (dilewati - ...)"
+        category, _, note = predicted_class.partition(" (")
+        self.emit("classified", root=self.root, file=img_file, category=category,
+                  confidence=float(confidence), placed=not note)
+
+    def on_error(self, img_file, message):
+        # Error tanpa nama file berarti run-nya sendiri yang gagal
+        if img_file:
+            self.errors += 1
+        else:
+            self.fatal = True
+        self.emit("error", root=self.root, file=img_file or None, message=message)
+
+    def on_complete(self, category_counts, processed, total):
+        self.emit("complete", root=self.root, counts=category_counts,
+                  processed=processed, total=total)
+
+    def callbacks(self):
+        return {
+            "on_progress_update": self.on_progress_update,
+            "on_status_update": self.on_status_update,
+            "on_image_classified": self.on_image_classified,
+            "on_error": self.on_error,
+            "on_complete": self.on_complete,
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Urutin gambar ke folder kategori tanpa GUI, output-nya JSON lines di stdout"
+    )
+    parser.add_argument("roots", nargs="+", help="Folder gambar yang mau diurutin")
+    parser.add_argument("--model", required=True, help="Path model Keras (.keras, .h5)")
+    parser.add_argument("--categories", nargs="+", default=None,
+                        help="Kategori yang diurutin (default: semua)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Gambar per panggilan predict")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Jumlah worker decoder gambar (default: jumlah CPU, maksimal 8)")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="Maksimal gambar ter-decode yang nunggu diambil model")
+    parser.add_argument("--decode-backend", choices=("thread", "process"), default="thread")
+    parser.add_argument("--preprocess-mode", choices=("keras", "pil", "draft"), default="keras")
+    parser.add_argument("--placement-mode", choices=PLACEMENT_MODES, default="auto")
+    parser.add_argument("--placement-workers", type=int, default=4,
+                        help="Jumlah worker yang naruh file barengan")
+    parser.add_argument("--cache", default=None, help="File SQLite buat cache prediksi antar run")
+    parser.add_argument("--recursive", action="store_true", help="Gambar di subfolder ikut diproses")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Mulai run baru walaupun run sebelumnya belum selesai")
+    parser.add_argument("--no-journal", action="store_true", help="Gak usah nulis journal run")
+    parser.add_argument("--watch", action="store_true",
+                        help="Pantau folder terus urutin gambar baru sampai dihentiin (Ctrl+C)")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Detik tanpa perubahan sebelum gambar baru diproses")
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="Jeda scan ulang kalo inotify gak ada")
+    parser.add_argument("--watch-backend", choices=WATCH_BACKENDS, default="auto")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.watch and len(args.roots) > 1:
+        parser.error("--watch cuma bisa buat satu folder")
+    if args.decode_backend == 'process' and args.preprocess_mode == 'keras':
+        parser.error("--decode-backend process cuma decode pake PIL, pake --preprocess-mode pil atau draft")
+    reporter = JsonLinesReporter()
+    classifier = None
+
+    try:
+        # TensorFlow baru di-import di sini, jadi --help tetap cepat
+        from gallery_classifier import GalleryClassifier
+
+        classifier = GalleryClassifier(
+            batch_size=args.batch_size, num_workers=args.workers, queue_size=args.queue_size,
+            decode_backend=args.decode_backend, preprocess_mode=args.preprocess_mode,
+            cache_path=args.cache, recursive=args.recursive,
+            placement_workers=args.placement_workers, placement_mode=args.placement_mode,
+            use_journal=not args.no_journal,
+            **reporter.callbacks()
+        )
+
+        unknown = [c for c in args.categories or [] if c not in classifier.labels]
+        if unknown:
+            parser.error(f"Kategori gak dikenal: {', '.join(unknown)}. "
+                         f"Pilihan: {', '.join(classifier.labels)}")
+
+        try:
+            classifier.load_model(args.model)
+        except Exception as e:
+            reporter.emit("error", file=None, message=f"Gagal load model: {str(e)}")
+            return EXIT_FATAL
+        reporter.emit("model_loaded", model=os.path.abspath(args.model))
+
+        for root in args.roots:
+            root = os.path.abspath(root)
+            reporter.start_root(root)
+            if not os.path.isdir(root):
+                reporter.on_error("", f"Folder gak ditemukan: {root}")
+                continue
+            if not args.watch:
+                classifier.process_folder(root, args.categories, resume=not args.no_resume)
+                continue
+
+            stop_event = threading.Event()
+            # Ctrl+C/SIGTERM berhentiin pantauan dengan rapi: antrian penempatan
+            # dikosongin dan journal ditutup sebagai run yang selesai
+            handlers = {}
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                handlers[signum] = signal.signal(signum, lambda *_: stop_event.set())
+            try:
+                classifier.watch_folder(root, args.categories, stop_event, args.debounce,
+                                        args.poll_interval, args.watch_backend,
+                                        resume=not args.no_resume)
+            finally:
+                for signum, handler in handlers.items():
+                    signal.signal(signum, handler)
+
+    except KeyboardInterrupt:
+        reporter.emit("interrupted")
+        return EXIT_INTERRUPTED
+    finally:
+        # Update LRU dan catatan stat yang belum ke-commit ikut ditulis
+        if classifier is not None:
+            classifier.close_cache()
+
+    if reporter.fatal:
+        return EXIT_FATAL
+    return EXIT_FILE_ERRORS if reporter.errors else EXIT_OK
+
+
+# Urutin tanpa GUI: python gallery_cli.py --model model.keras folder1 folder2 --categories foods people
+# Pantau folder sinkronisasi: python gallery_cli.py --model model.keras --watch folder_sync
+if __name__ == "__main__":
+    # Wajib buat decode backend 'process' di build PyInstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())
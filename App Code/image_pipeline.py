@@ -0,0 +1,467 @@
+import os
+import time
+import functools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from PIL import Image
+from folder_scanner import IMAGE_EXTENSIONS
+
+# HEIC/HEIF (foto iPhone) cuma bisa dibuka kalo pillow-heif terinstal
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    pass
+
+# 'keras': load_img + tf.image.resize (jalur lama), 'pil': decode penuh + resize PIL,
+# 'draft': decode JPEG langsung di skala kecil (DCT scaling) + resize PIL
+PREPROCESS_MODES = ('keras', 'pil', 'draft')
+
+
+def load_image_uint8(img_path, target_size=(224, 224), draft=False):
+    """
+    Decode gambar pake PIL terus resize ke target_size, tanpa TensorFlow
+    
+    Args:
+        img_path: Path ke file gambar
+        target_size: Ukuran output (tinggi, lebar)
+        draft: Kalo True, JPEG di-decode langsung di skala 1/2, 1/4 atau 1/8 yang paling
+            kecil tapi masih >= target_size. Jauh lebih cepat buat foto HP 12-48 MP
+        
+    Returns:
+        Array uint8 RGB dengan shape (tinggi, lebar, 3)
+    """
+    height, width = target_size
+    with Image.open(img_path) as img:
+        if draft and img.format == "JPEG":
+            img.draft("RGB", (width, height))
+        img = img.convert("RGB")
+        img = img.resize((width, height), Image.BILINEAR)
+        return np.asarray(img, dtype=np.uint8)
+
+
+def normalize_image(img_array):
+    """Ubah array uint8 (0-255) jadi float32 0-1, array yang udah float dibiarin"""
+    if img_array.dtype == np.uint8:
+        img_float = img_array.astype(np.float32)
+        img_float *= np.float32(1.0 / 255.0)
+        return img_float
+    return img_array
+
+
+class BatchBuffer:
+    """
+    Buffer float32 NHWC yang dialokasiin sekali dan dipake ulang tiap batch.
+    
+    Gambar uint8 hasil decode PIL langsung disalin (sekalian di-cast) ke slot-nya,
+    terus normalisasi 0-1 dikerjain in-place sekali buat seluruh batch. Jadi gak ada
+    array float per gambar, gak ada np.stack, dan gak ada op TensorFlow sama sekali.
+    
+    Buat model yang preprocessing-nya udah di dalam graph (input uint8), buffer-nya
+    bisa dibikin uint8: piksel disalin apa adanya dan gak ada normalisasi sama sekali.
+    """
+    
+    def __init__(self, batch_size, target_size=(224, 224), dtype=np.float32):
+        """
+        Inisialisasi BatchBuffer
+        
+        Args:
+            batch_size: Maksimal gambar per batch
+            target_size: Ukuran gambar (tinggi, lebar)
+            dtype: np.float32 (nilai 0-1) atau np.uint8 (nilai mentah 0-255)
+        """
+        height, width = target_size
+        self.dtype = np.dtype(dtype)
+        self.buffer = np.empty((max(1, int(batch_size)), height, width, 3), dtype=self.dtype)
+        # Slot yang isinya masih 0-255 (dari uint8) dan perlu dinormalisasi
+        self._raw = np.zeros(len(self.buffer), dtype=bool)
+        self.size = 0
+    
+    def __len__(self):
+        return self.size
+    
+    def full(self):
+        return self.size >= len(self.buffer)
+    
+    def add(self, img_array):
+        """
+        Salin satu gambar ke slot berikutnya
+        
+        Args:
+            img_array: Array uint8 0-255 atau float yang udah dinormalisasi, shape (tinggi, lebar, 3)
+        """
+        if self.full():
+            raise ValueError("BatchBuffer udah penuh, panggil finalize() dan reset() dulu")
+        if self.dtype == np.uint8 and getattr(img_array, 'dtype', None) != np.uint8:
+            # Gambar float 0-1 (mode 'keras') dibalikin ke skala 0-255
+            img_array = np.clip(np.rint(np.asarray(img_array) * 255.0), 0, 255)
+            np.copyto(self.buffer[self.size], img_array, casting='unsafe')
+            self.size += 1
+            return
+        np.copyto(self.buffer[self.size], img_array, casting='unsafe')
+        self._raw[self.size] = getattr(img_array, 'dtype', None) == np.uint8
+        self.size += 1
+    
+    def finalize(self):
+        """
+        Normalisasi slot uint8 in-place dan return view batch-nya
+        
+        Returns:
+            View (N, tinggi, lebar, 3) ke buffer. Cuma valid sampai reset()
+        """
+        batch = self.buffer[:self.size]
+        if self.dtype == np.uint8:
+            return batch
+        raw = self._raw[:self.size]
+        if raw.all():
+            batch *= np.float32(1.0 / 255.0)
+        elif raw.any():
+            batch[raw] *= np.float32(1.0 / 255.0)
+        raw[:] = False
+        return batch
+    
+    def reset(self):
+        """Kosongin buffer buat batch berikutnya (memorinya tetap dipake ulang)"""
+        self._raw[:] = False
+        self.size = 0
+
+
+def list_labelled_images(root_folder, labels, limit_per_class=None):
+    """
+    Ambil sampel berlabel dari struktur <root_folder>/<label>/*.jpg
+    
+    Returns:
+        List (path, index label)
+    """
+    samples = []
+    for label_idx, label in enumerate(labels):
+        label_dir = os.path.join(root_folder, label)
+        if not os.path.isdir(label_dir):
+            continue
+        files = sorted(f for f in os.listdir(label_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+        if limit_per_class:
+            files = files[:limit_per_class]
+        samples.extend((os.path.join(label_dir, f), label_idx) for f in files)
+    return samples
+
+
+class PrefetchLoader:
+    """
+    Pipeline producer/consumer buat decode dan resize gambar di background.
+
+    Beberapa worker decoder ngisi antrian terbatas berisi tensor yang udah siap,
+    sementara thread inferensi tinggal ngambil dari antrian itu. Jadi CPU yang
+    decode JPEG gak nganggur pas model lagi jalan, dan sebaliknya.
+    """
+
+    def __init__(self, preprocess_fn, num_workers=None, queue_size=64):
+        """
+        Inisialisasi PrefetchLoader
+
+        Args:
+            preprocess_fn: Fungsi (path) -> array gambar yang siap masuk model
+            num_workers: Jumlah thread decoder (default: jumlah CPU, maksimal 8)
+            queue_size: Maksimal gambar yang lagi di-decode/nunggu diambil. Ini yang
+                bikin pemakaian memori tetap datar walaupun foldernya gede banget
+        """
+        if num_workers is None:
+            num_workers = min(8, os.cpu_count() or 1)
+        self.preprocess_fn = preprocess_fn
+        self.num_workers = max(1, int(num_workers))
+        self.queue_size = max(1, int(queue_size))
+
+    def iterate(self, paths):
+        """
+        Decode gambar secara paralel dan kembalikan hasilnya sesuai urutan input
+
+        Args:
+            paths: Iterable path gambar (boleh generator, dibaca sambil jalan)
+
+        Yields:
+            Tuple (path, array, error). Kalo decode gagal, array None dan error berisi exception-nya
+        """
+        paths = iter(paths)
+        pending = deque()
+        exhausted = False
+        executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="decoder")
+
+        try:
+            while True:
+                # Isi antrian sampai penuh, tapi gak lebih dari queue_size
+                while not exhausted and len(pending) < self.queue_size:
+                    try:
+                        path = next(paths)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append((path, executor.submit(self.preprocess_fn, path)))
+
+                if not pending:
+                    break
+
+                path, future = pending.popleft()
+                try:
+                    result = (path, future.result(), None)
+                except Exception as e:
+                    result = (path, None, e)
+                yield result
+        finally:
+            # Kalo consumer berhenti di tengah jalan, batalin yang belum sempat jalan
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# State buat proses worker, di-set sekali lewat initializer
+_worker_shm = None
+_worker_slots = None
+
+
+def _attach_shared_memory(name):
+    """Buka shared memory yang dibikin parent, yang nge-unlink tetap parent"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 belum punya parameter track. Resource tracker-nya dipake
+        # bareng sama parent, jadi daftar dua kali juga aman
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_shared_worker(shm_name, shape):
+    global _worker_shm, _worker_slots
+    _worker_shm = _attach_shared_memory(shm_name)
+    _worker_slots = np.ndarray(shape, dtype=np.uint8, buffer=_worker_shm.buf)
+
+
+def _decode_into_slot(img_path, slot, target_size, draft):
+    _worker_slots[slot] = load_image_uint8(img_path, target_size, draft)
+
+
+class SharedMemoryLoader:
+    """
+    Versi PrefetchLoader yang decode di proses terpisah biar gak kena GIL.
+    
+    Hasil decode (uint8) ditulis worker langsung ke slot di shared memory, jadi
+    gak ada pickling buffer piksel antar proses. Parent cuma dapet view ke slot itu.
+    Worker selalu decode pake PIL (load_image_uint8), gak ada jalur 'keras' di sini.
+    """
+
+    def __init__(self, num_workers=None, queue_size=64, target_size=(224, 224), draft=False):
+        """
+        Inisialisasi SharedMemoryLoader
+        
+        Args:
+            num_workers: Jumlah proses decoder (default: jumlah CPU)
+            queue_size: Maksimal gambar yang lagi di-decode/nunggu diambil
+            target_size: Ukuran output gambar (tinggi, lebar)
+            draft: Decode JPEG di skala kecil dulu (lihat load_image_uint8)
+        """
+        self.num_workers = max(1, int(num_workers or os.cpu_count() or 1))
+        self.queue_size = max(1, int(queue_size))
+        self.target_size = tuple(target_size)
+        self.draft = draft
+
+    def iterate(self, paths):
+        """
+        Decode gambar di proses worker dan kembalikan hasilnya sesuai urutan input
+        
+        Args:
+            paths: Iterable path gambar (boleh generator, dibaca sambil jalan)
+            
+        Yields:
+            Tuple (path, array uint8, error). Array-nya view ke shared memory dan cuma
+            valid sampai item berikutnya diminta, jadi copy/konversi dulu kalo mau disimpen
+        """
+        height, width = self.target_size
+        # Satu slot ekstra buat item yang lagi dipegang consumer
+        num_slots = self.queue_size + 1
+        shape = (num_slots, height, width, 3)
+        
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        slots = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        free_slots = deque(range(num_slots))
+        # Worker dibikin pake 'spawn', bukan fork: fork di Linux jalan pas thread
+        # TensorFlow/ONNX Runtime di parent udah aktif dan bisa bikin worker deadlock
+        executor = ProcessPoolExecutor(max_workers=self.num_workers,
+                                       mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_shared_worker,
+                                       initargs=(shm.name, shape))
+        
+        paths = iter(paths)
+        pending = deque()
+        exhausted = False
+        
+        try:
+            while True:
+                while not exhausted and len(pending) < self.queue_size and free_slots:
+                    try:
+                        path = next(paths)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    slot = free_slots.popleft()
+                    future = executor.submit(_decode_into_slot, path, slot, self.target_size, self.draft)
+                    pending.append((path, slot, future))
+                
+                if not pending:
+                    break
+                
+                path, slot, future = pending.popleft()
+                try:
+                    future.result()
+                    result = (path, slots[slot], None)
+                except Exception as e:
+                    result = (path, None, e)
+                yield result
+                
+                # Consumer udah minta item berikutnya, slot ini boleh dipake lagi
+                result = None
+                free_slots.append(slot)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            del slots
+            try:
+                shm.close()
+            except BufferError:
+                # Masih ada view yang dipegang consumer, biarin GC yang nutup
+                pass
+            shm.unlink()
+
+
+def create_loader(backend, preprocess_fn, num_workers=None, queue_size=64, draft=False,
+                  target_size=(224, 224), preprocess_mode=None):
+    """
+    Bikin loader sesuai backend decode yang dipilih
+    
+    Args:
+        backend: 'thread' (PrefetchLoader pake preprocess_fn) atau 'process' (SharedMemoryLoader)
+        preprocess_fn: Fungsi preprocess buat backend thread
+        num_workers: Jumlah worker decoder
+        queue_size: Kedalaman antrian
+        draft: Buat backend process, decode JPEG di skala kecil dulu
+        target_size: Ukuran output backend process (tinggi, lebar)
+        preprocess_mode: Mode preprocess yang dipake classifier. Backend process cuma
+            bisa decode pake PIL, jadi mode 'keras' ditolak
+    
+    Raises:
+        ValueError: Backend gak dikenal, atau backend 'process' dipake bareng mode 'keras'
+    """
+    if backend == 'process':
+        if preprocess_mode == 'keras':
+            raise ValueError("Backend decode 'process' cuma decode pake PIL, gak bisa dipake "
+                             "sama preprocess mode 'keras'. Pake mode 'pil' atau 'draft'")
+        return SharedMemoryLoader(num_workers, queue_size, target_size, draft)
+    if backend == 'thread':
+        return PrefetchLoader(preprocess_fn, num_workers, queue_size)
+    raise ValueError(f"Backend decode tidak dikenal: {backend}. Pilihan: 'thread', 'process'")
+
+
+def compare_preprocess_modes(samples, preprocess_fn, predict_fn, modes=('keras', 'draft'),
+                             batch_size=32, num_workers=None):
+    """
+    Bandingin akurasi beberapa mode preprocess di sampel berlabel
+    
+    Args:
+        samples: List (path, index label), misalnya dari list_labelled_images
+        preprocess_fn: Fungsi (path, mode) -> array gambar
+        predict_fn: Fungsi (batch float32 NHWC) -> index kelas per gambar
+        modes: Mode yang dibandingin, mode pertama jadi acuan
+        batch_size: Ukuran batch buat prediksi
+        num_workers: Jumlah thread decoder
+        
+    Returns:
+        Dict {mode: {"accuracy", "correct", "total", "failed", "seconds",
+        "accuracy_delta", "agreement"}}. Delta dan agreement dihitung terhadap mode pertama
+    """
+    paths = [path for path, _ in samples]
+    predictions = {}
+    report = {}
+    
+    for mode in modes:
+        loader = PrefetchLoader(functools.partial(preprocess_fn, mode=mode), num_workers, batch_size * 2)
+        preds = [-1] * len(samples)
+        batch, batch_idx = BatchBuffer(batch_size), []
+        start = time.perf_counter()
+        
+        for i, (_, img_array, error) in enumerate(loader.iterate(paths)):
+            if error is None:
+                batch.add(img_array)
+                batch_idx.append(i)
+            if batch.full():
+                for j, pred in zip(batch_idx, predict_fn(batch.finalize())):
+                    preds[j] = int(pred)
+                batch.reset()
+                batch_idx = []
+        if len(batch):
+            for j, pred in zip(batch_idx, predict_fn(batch.finalize())):
+                preds[j] = int(pred)
+        
+        correct = sum(1 for pred, (_, label) in zip(preds, samples) if pred == label)
+        predictions[mode] = preds
+        report[mode] = {
+            "accuracy": correct / len(samples) if samples else 0.0,
+            "correct": correct,
+            "total": len(samples),
+            "failed": preds.count(-1),
+            "seconds": time.perf_counter() - start,
+        }
+    
+    baseline = modes[0]
+    for mode in modes:
+        same = sum(1 for a, b in zip(predictions[mode], predictions[baseline]) if a == b)
+        report[mode]["accuracy_delta"] = report[mode]["accuracy"] - report[baseline]["accuracy"]
+        report[mode]["agreement"] = same / len(samples) if samples else 0.0
+    
+    return report
+
+
+def benchmark_decode(folder_path, num_workers=None, queue_size=64, limit=None):
+    """
+    Bandingin throughput decode (gambar/detik) antara backend thread dan process
+    
+    Args:
+        folder_path: Folder yang isinya gambar buat benchmark
+        num_workers: Jumlah worker buat kedua backend
+        queue_size: Kedalaman antrian
+        limit: Maksimal jumlah gambar yang dipake
+        
+    Returns:
+        Dict {backend: {"images": n, "seconds": t, "images_per_sec": x}}
+    """
+    image_paths = [os.path.join(folder_path, f) for f in sorted(os.listdir(folder_path))
+                   if f.lower().endswith(IMAGE_EXTENSIONS)]
+    if limit:
+        image_paths = image_paths[:limit]
+    
+    results = {}
+    for backend in ('thread', 'process'):
+        loader = create_loader(backend, load_image_uint8, num_workers, queue_size)
+        count = 0
+        start = time.perf_counter()
+        for _, img_array, error in loader.iterate(image_paths):
+            if error is None:
+                count += 1
+        elapsed = time.perf_counter() - start
+        results[backend] = {
+            "images": count,
+            "seconds": elapsed,
+            "images_per_sec": count / elapsed if elapsed > 0 else 0.0,
+        }
+    return results
+
+
+# Benchmark decode: python image_pipeline.py <folder> [--workers N]
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark decode gambar: thread vs process")
+    parser.add_argument("folder", help="Folder berisi gambar")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah worker decoder")
+    parser.add_argument("--queue-size", type=int, default=64, help="Kedalaman antrian")
+    parser.add_argument("--limit", type=int, default=None, help="Maksimal jumlah gambar")
+    args = parser.parse_args()
+    
+    for backend, result in benchmark_decode(args.folder, args.workers, args.queue_size, args.limit).items():
+        print(f"{backend:>8}: {result['images']} gambar dalam {result['seconds']:.2f} detik "
+              f"({result['images_per_sec']:.1f} gambar/detik)")
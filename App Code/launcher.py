@@ -1,6 +1,7 @@
 import sys
 import traceback
 import os
+import multiprocessing
 
 def main():
     try:
@@ -24,4 +25,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Wajib buat decode backend 'process' di build PyInstaller
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,245 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+
+def hash_file(file_path, chunk_size=1 << 20):
+    """Hash isi file (BLAKE2b 160-bit), dibaca per chunk biar hemat memori"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_fingerprint(model_path):
+    """
+    Fingerprint file model, dipake buat misahin cache antar versi model
+
+    Kalo model-nya folder (SavedModel), semua file di dalamnya ikut di-hash
+    """
+    if not os.path.isdir(model_path):
+        return hash_file(model_path)
+
+    digest = hashlib.blake2b(digest_size=20)
+    for root, dirs, files in os.walk(model_path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, model_path).encode('utf-8'))
+            digest.update(hash_file(file_path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def stat_key(entry):
+    """Tuple (inode, ukuran, mtime_ns) dari os.DirEntry, dipake buat pre-filter sebelum hashing"""
+    st = entry.stat()
+    return entry.inode(), st.st_size, st.st_mtime_ns
+
+
+class PredictionCache:
+    """
+    Cache prediksi di disk (SQLite) biar gambar yang gak berubah gak perlu di-decode
+    dan diinferensi ulang tiap run.
+
+    Key-nya hash isi file + fingerprint model, yang disimpen index kelas dan vektor
+    softmax lengkap. Kalo jumlah entri lewat max_entries, entri yang paling lama gak
+    dipake dibuang duluan.
+
+    Biar gak perlu hash semua file tiap run, hash terakhir tiap path juga dicatat
+    bareng (inode, ukuran, mtime_ns). Selama stat-nya sama, hash lama langsung dipake.
+    """
+
+    # Cek jumlah entri buat eviction tiap segini kali put
+    EVICT_CHECK_INTERVAL = 1000
+    # Catatan stat ditulis ke disk per segini entri
+    STAT_FLUSH_INTERVAL = 500
+
+    def __init__(self, db_path, model_fp, max_entries=200000):
+        """
+        Inisialisasi PredictionCache
+
+        Args:
+            db_path: Path file SQLite cache
+            model_fp: Fingerprint model yang lagi dipake (lihat model_fingerprint)
+            max_entries: Maksimal entri di cache sebelum eviction
+        """
+        self.db_path = db_path
+        self.model_fp = model_fp
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._puts_since_check = 0
+        self._pending_stats = []
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " content_hash TEXT NOT NULL,"
+            " model_fp TEXT NOT NULL,"
+            " class_idx INTEGER NOT NULL,"
+            " probs BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (content_hash, model_fp))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_last_used ON predictions (last_used)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_stats ("
+            " path TEXT PRIMARY KEY,"
+            " inode INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " content_hash TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def lookup_hash(self, path, key):
+        """
+        Ambil hash isi file dari catatan stat
+
+        Args:
+            path: Path absolut file
+            key: Tuple (inode, ukuran, mtime_ns) dari stat_key
+
+        Returns:
+            Hash lama kalo stat-nya masih sama, None kalo file baru/berubah
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inode, size, mtime_ns, content_hash FROM file_stats WHERE path = ?",
+                (path,)
+            ).fetchone()
+        if row is None or tuple(row[:3]) != tuple(key):
+            return None
+        return row[3]
+
+    def record_hash(self, path, key, content_hash):
+        """Catat hash file beserta stat-nya. Ditulis ke disk per batch"""
+        with self._lock:
+            self._pending_stats.append((path, key[0], key[1], key[2], content_hash))
+            if len(self._pending_stats) >= self.STAT_FLUSH_INTERVAL:
+                self._flush_stats()
+
+    def _flush_stats(self):
+        if self._pending_stats:
+            self._conn.executemany("INSERT OR REPLACE INTO file_stats VALUES (?, ?, ?, ?, ?)",
+                                   self._pending_stats)
+            self._conn.commit()
+            self._pending_stats = []
+
+    def get(self, content_hash):
+        """
+        Ambil prediksi dari cache
+
+        Returns:
+            Tuple (class_idx, probs float32) atau None kalo gak ada
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT class_idx, probs FROM predictions WHERE content_hash = ? AND model_fp = ?",
+                (content_hash, self.model_fp)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE predictions SET last_used = ? WHERE content_hash = ? AND model_fp = ?",
+                (time.time(), content_hash, self.model_fp)
+            )
+        return row[0], np.frombuffer(row[1], dtype=np.float32)
+
+    def put_many(self, entries):
+        """
+        Simpen banyak prediksi sekaligus dalam satu transaksi
+
+        Args:
+            entries: Iterable (content_hash, probs)
+        """
+        now = time.time()
+        rows = []
+        for content_hash, probs in entries:
+            probs = np.asarray(probs, dtype=np.float32).ravel()
+            rows.append((content_hash, self.model_fp, int(np.argmax(probs)), probs.tobytes(), now))
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)", rows)
+            self._flush_stats()
+            self._conn.commit()
+            self._puts_since_check += len(rows)
+            if self._puts_since_check >= self.EVICT_CHECK_INTERVAL:
+                self._puts_since_check = 0
+                self._evict()
+
+    def put(self, content_hash, probs):
+        """Simpen satu prediksi"""
+        self.put_many([(content_hash, probs)])
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM predictions WHERE rowid IN "
+                "(SELECT rowid FROM predictions ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+        
+        # INSERT OR REPLACE bikin rowid baru, jadi rowid kecil = catatan stat paling lama
+        count = self._conn.execute("SELECT COUNT(*) FROM file_stats").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM file_stats WHERE rowid IN "
+                "(SELECT rowid FROM file_stats ORDER BY rowid LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+
+    def invalidate(self, all_models=False):
+        """
+        Hapus entri cache
+
+        Args:
+            all_models: Kalo True, semua entri dihapus. Kalo False, cuma entri dari
+                model lain (versi lama) yang dihapus
+        """
+        with self._lock:
+            if all_models:
+                self._pending_stats = []
+                self._conn.execute("DELETE FROM predictions")
+                self._conn.execute("DELETE FROM file_stats")
+            else:
+                self._conn.execute("DELETE FROM predictions WHERE model_fp != ?", (self.model_fp,))
+            self._conn.commit()
+
+    def flush(self):
+        """
+        Tulis catatan stat yang masih numpuk dan commit update last_used dari get
+
+        Dipanggil tiap run selesai, jadi run yang isinya cache hit doang (atau kurang
+        dari STAT_FLUSH_INTERVAL file) tetap nyimpen catatan stat-nya
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._flush_stats()
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            # Tulis catatan stat dan update last_used yang belum ke-commit
+            self._flush_stats()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
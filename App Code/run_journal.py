@@ -0,0 +1,430 @@
+import os
+import json
+import time
+import errno
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from folder_scanner import same_content
+
+
+# Journal disimpen di folder tersembunyi di dalam folder gambar. FolderScanner
+# ngelewatin folder yang namanya diawali titik, jadi journal-nya gak ikut di-scan
+JOURNAL_DIR = ".gallery_runs"
+JOURNAL_EXT = ".jsonl"
+
+
+def journal_dir(folder_path):
+    return os.path.join(folder_path, JOURNAL_DIR)
+
+
+def list_journals(folder_path):
+    """Path semua journal run di folder_path, urut dari yang paling lama"""
+    directory = journal_dir(folder_path)
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith(JOURNAL_EXT))
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_journal(path):
+    """
+    Baca semua record journal
+
+    Baris yang kepotong (proses mati pas lagi nulis) dilewatin, record sebelum
+    dan sesudahnya tetap kepake
+    """
+    records = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def _trim_torn_tail(path, chunk_size=4096):
+    """
+    Potong baris terakhir yang gak diakhiri newline (sisa crash pas lagi nulis)
+
+    Tanpa ini record pertama dari run yang dilanjutin bakal nyambung ke baris
+    rusak itu dan ikut kebuang pas dibaca
+    """
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        cut = 0
+        pos = end
+        while pos > 0:
+            step = min(chunk_size, pos)
+            f.seek(pos - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                cut = pos - step + newline + 1
+                break
+            pos -= step
+        if cut != end:
+            f.truncate(cut)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class JournalState:
+    """
+    Status terakhir tiap file menurut journal
+
+    Record-nya di-replay urut, jadi record yang lebih baru (misalnya 'placed' setelah
+    'intent') nimpa status sebelumnya
+    """
+
+    def __init__(self, records):
+        self.header = None
+        self.decisions = {}  # src -> record 'decision'
+        self.intents = {}    # src -> record 'intent' yang belum ada hasilnya
+        self.placed = {}     # src -> record 'placed'
+        self.failed = {}     # src -> record 'failed'
+        self.existed = set() # src yang file tujuannya udah ada sebelum run ini
+        self.completed = False
+        self.undone = False
+
+        for record in records:
+            op = record.get("op")
+            src = record.get("src")
+            if op == "run":
+                self.header = record
+            elif op == "decision":
+                self.decisions[src] = record
+            elif op == "intent":
+                self.intents[src] = record
+                self.failed.pop(src, None)
+                if record.get("existed"):
+                    self.existed.add(src)
+                else:
+                    self.existed.discard(src)
+            elif op == "placed":
+                self.intents.pop(src, None)
+                self.placed[src] = record
+            elif op in ("failed", "rolled_back"):
+                self.intents.pop(src, None)
+                if op == "failed":
+                    self.failed[src] = record
+            elif op == "complete":
+                self.completed = True
+            elif op == "undo":
+                # Run yang lagi/udah di-undo gak boleh dilanjutin lagi
+                self.completed = True
+            elif op == "undone":
+                self.placed.pop(src, None)
+            elif op == "undo_complete":
+                self.undone = True
+
+    def done_paths(self):
+        """File yang gak perlu diproses lagi: udah ditaruh, atau kelasnya gak dipilih"""
+        done = set(self.placed)
+        done.update(src for src, record in self.decisions.items() if not record.get("selected"))
+        return done
+
+
+class RunJournal:
+    """
+    Journal append-only (JSON lines) buat satu run process_folder.
+
+    Tiap keputusan dan penempatan file dicatat sebelum/sesudah kejadian. Record
+    'intent' (file X bakal ditaruh di Y) wajib udah di-fsync sebelum file-nya
+    disentuh, tapi fsync-nya dikumpulin: worker yang nunggu pertama nge-fsync semua
+    record yang numpuk, worker lain cukup nunggu hasilnya. Jadi satu fsync nutup
+    banyak file sekaligus.
+    """
+
+    def __init__(self, path, sync_every=256, create=False):
+        """
+        Buka (atau bikin) file journal buat ditambahin
+
+        Args:
+            path: Path file journal
+            sync_every: Record yang gak ditunggu siapa-siapa tetap di-fsync tiap segini record
+            create: Bikin file baru, FileExistsError kalo path-nya udah ada (journal run
+                lain gak boleh ketimpa atau kecampur)
+        """
+        self.path = path
+        self.sync_every = max(1, int(sync_every))
+        # Mode penempatan run ini (dari header), dipake lagi pas run-nya dilanjutin
+        self.mode = None
+        self._file = open(path, 'x' if create else 'a', encoding='utf-8')
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+
+    @classmethod
+    def create(cls, folder_path, mode, **header):
+        """Bikin journal baru di folder_path dan tulis record 'run' sebagai header"""
+        directory = journal_dir(folder_path)
+        os.makedirs(directory, exist_ok=True)
+        # Nama file = waktu mulai sampai nanodetik, jadi list_journals tetap urut waktu
+        now_ns = time.time_ns()
+        while True:
+            seconds, nanos = divmod(now_ns, 1_000_000_000)
+            run_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(seconds)) + f"-{nanos:09d}"
+            try:
+                journal = cls(os.path.join(directory, run_id + JOURNAL_EXT), create=True)
+                break
+            except FileExistsError:
+                # Run lain kebetulan dapet timestamp yang sama (jam OS kasar), geser dikit
+                now_ns += 1
+        journal.mode = mode
+        journal.sync_seq(journal.append("run", run_id=run_id, folder=os.path.abspath(folder_path),
+                                        mode=mode, started=time.time(), **header))
+        return journal
+
+    @classmethod
+    def resume_latest(cls, folder_path):
+        """
+        Buka lagi journal terakhir di folder_path kalo run-nya belum selesai
+
+        Returns:
+            Tuple (RunJournal, JournalState) atau (None, None) kalo gak ada yang perlu dilanjutin
+        """
+        journals = list_journals(folder_path)
+        if not journals:
+            return None, None
+        state = JournalState(read_journal(journals[-1]))
+        if state.completed or state.header is None:
+            return None, None
+        _trim_torn_tail(journals[-1])
+        journal = cls(journals[-1])
+        journal.mode = state.header.get("mode")
+        journal.append("resume", time=time.time())
+        return journal, state
+
+    def append(self, op, **fields):
+        """
+        Tambahin satu record ke journal
+
+        Returns:
+            Nomor urut record, buat sync_seq
+        """
+        record = {"op": op}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._cond:
+            self._file.write(line)
+            self._seq += 1
+            seq = self._seq
+            backlog = seq - self._synced_seq
+        if backlog >= self.sync_every:
+            self.sync_seq(seq)
+        return seq
+
+    def sync_seq(self, seq):
+        """Tunggu sampai record nomor seq udah aman di disk (group commit)"""
+        with self._cond:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    # Ada thread lain yang lagi fsync, tunggu hasilnya
+                    self._cond.wait()
+                    continue
+                self._syncing = True
+                target = self._seq
+                self._file.flush()
+                fd = self._file.fileno()
+                self._cond.release()
+                synced = False
+                try:
+                    os.fsync(fd)
+                    synced = True
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    if synced:
+                        self._synced_seq = max(self._synced_seq, target)
+                    self._cond.notify_all()
+
+    def sync(self):
+        """fsync semua record yang udah ditulis"""
+        with self._cond:
+            seq = self._seq
+        self.sync_seq(seq)
+
+    def decision(self, src, category, confidence, selected):
+        return self.append("decision", src=os.path.abspath(src), category=category,
+                           confidence=float(confidence), selected=bool(selected))
+
+    def intent(self, src, dest, mode):
+        # 'existed': file di dest udah ada sebelumnya (file sama dari run lama), jangan dihapus pas recovery
+        return self.append("intent", src=os.path.abspath(src), dest=os.path.abspath(dest),
+                           mode=mode, existed=os.path.lexists(dest))
+
+    def placed(self, src, dest, mode):
+        return self.append("placed", src=os.path.abspath(src), dest=os.path.abspath(dest), mode=mode)
+
+    def failed(self, src, error):
+        return self.append("failed", src=os.path.abspath(src), error=str(error))
+
+    def complete(self, **summary):
+        self.sync_seq(self.append("complete", finished=time.time(), **summary))
+
+    def recover(self, state):
+        """
+        Beresin penempatan yang kepotong crash (ada 'intent' tapi belum ada hasilnya)
+
+        Keadaan di disk dicek per file. Yang udah beres dicatat 'placed', yang belum
+        (atau setengah jalan) dibalikin ke kondisi awal dan dicatat 'rolled_back',
+        jadi file aslinya diproses ulang secara normal. File asli gak pernah dihapus.
+
+        Returns:
+            Tuple (jumlah yang ternyata udah beres, jumlah yang di-rollback)
+        """
+        finished = rolled_back = 0
+        for src, record in list(state.intents.items()):
+            dest, mode = record["dest"], record["mode"]
+            src_exists = os.path.lexists(src)
+            dest_exists = os.path.lexists(dest)
+
+            if mode == 'move':
+                done = dest_exists and not src_exists
+                # Move beda filesystem = copy terus hapus, dest bisa aja baru setengah
+                partial = dest_exists and src_exists and not record.get("existed")
+            elif mode == 'symlink':
+                # Symlink dibikin atomik (rename dari path sementara), ada berarti udah jadi
+                done = os.path.islink(dest)
+                partial = False
+            else:
+                # Copy (termasuk fallback hardlink/reflink ke copy) bisa berhenti di tengah.
+                # File di dest cuma dihapus kalo file aslinya masih ada
+                done = dest_exists and src_exists and same_content(src, dest)
+                partial = dest_exists and src_exists and not done and not record.get("existed")
+
+            if done:
+                self.placed(src, dest, mode)
+                state.intents.pop(src, None)
+                state.placed[src] = record
+                finished += 1
+                continue
+
+            if partial:
+                try:
+                    os.remove(dest)
+                except OSError:
+                    pass
+            self.append("rolled_back", src=src, dest=dest)
+            state.intents.pop(src, None)
+            rolled_back += 1
+
+        self.sync()
+        return finished, rolled_back
+
+    def close(self):
+        """fsync sisa record terus tutup file"""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+
+def _undo_placement(src, dest, mode, existed):
+    """
+    Balikin satu penempatan
+
+    Returns:
+        'restored' (file dipindah balik ke src), 'removed' (salinan/link di dest
+        dihapus), atau 'kept' (dest udah ada sebelum run, dibiarin)
+
+    Raises:
+        OSError/ValueError kalo keadaan di disk gak cocok sama journal
+    """
+    if mode == 'symlink':
+        if os.path.islink(dest) and os.readlink(dest) == src:
+            os.remove(dest)
+            return 'removed'
+        raise ValueError(f"Symlink {dest} udah berubah, gak dihapus")
+
+    if mode == 'move' or not os.path.lexists(src):
+        # File aslinya cuma ada di dest (dipindah, atau aslinya udah dihapus user)
+        if os.path.lexists(src):
+            raise FileExistsError(errno.EEXIST, "Path asli udah dipake file lain", src)
+        os.makedirs(os.path.dirname(src), exist_ok=True)
+        try:
+            # Satu filesystem: cukup rename, datanya gak disalin ulang
+            os.rename(dest, src)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(dest, src)
+        return 'restored'
+
+    if existed:
+        return 'kept'
+
+    # Copy/hardlink/reflink: salinan cuma dihapus kalo isinya beneran sama kayak aslinya
+    if not same_content(src, dest):
+        raise ValueError(f"Isi {dest} beda sama file aslinya, gak dihapus")
+    os.remove(dest)
+    return 'removed'
+
+
+def latest_undoable_journal(folder_path):
+    """Journal run terakhir yang masih punya penempatan buat di-undo, None kalo gak ada"""
+    for path in reversed(list_journals(folder_path)):
+        state = JournalState(read_journal(path))
+        if not state.undone and state.placed:
+            return path
+    return None
+
+
+def undo_run(journal_path, num_workers=8, on_progress=None):
+    """
+    Undo semua penempatan di satu run, urut mundur sesuai journal
+
+    Penempatan dikelompokin per folder asal. Tiap folder dikerjain satu worker
+    (urut mundur), folder-folder yang beda jalan paralel. Tiap penempatan yang
+    berhasil dibalikin langsung dicatat 'undone', jadi undo yang keputus bisa
+    diulang tanpa nyentuh file yang udah balik.
+
+    Args:
+        journal_path: Path journal run yang mau di-undo
+        num_workers: Jumlah folder yang dikerjain barengan
+        on_progress: Callback (jumlah selesai, total) tiap satu penempatan beres
+
+    Returns:
+        Dict {"run_id", "restored", "removed", "kept", "errors": [(path, pesan)]}
+    """
+    state = JournalState(read_journal(journal_path))
+    placements = list(state.placed.items())
+
+    groups = {}
+    for src, record in placements:
+        groups.setdefault(os.path.dirname(src), []).append((src, record))
+
+    summary = {"run_id": (state.header or {}).get("run_id"),
+               "restored": 0, "removed": 0, "kept": 0, "errors": []}
+    lock = threading.Lock()
+    journal = RunJournal(journal_path)
+    journal.sync_seq(journal.append("undo", started=time.time()))
+
+    def undo_group(items):
+        for src, record in reversed(items):
+            dest = record["dest"]
+            try:
+                result = _undo_placement(src, dest, record["mode"], src in state.existed)
+                journal.append("undone", src=src, dest=dest, result=result)
+            except Exception as e:
+                result = None
+                with lock:
+                    summary["errors"].append((dest, str(e)))
+            with lock:
+                if result:
+                    summary[result] += 1
+                done = summary["restored"] + summary["removed"] + summary["kept"] + len(summary["errors"])
+            if on_progress:
+                on_progress(done, len(placements))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(num_workers)), thread_name_prefix="undo") as executor:
+            list(executor.map(undo_group, groups.values()))
+        if not summary["errors"]:
+            journal.append("undo_complete", finished=time.time())
+    finally:
+        journal.close()
+    return summary
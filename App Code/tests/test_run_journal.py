@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_journal import RunJournal, JournalState, read_journal, list_journals
+
+
+def _torn_journal(folder):
+    """Journal run yang keputus pas lagi nulis record terakhir"""
+    src = os.path.join(folder, "a.jpg")
+    dest = os.path.join(folder, "cat", "a.jpg")
+    journal = RunJournal.create(folder, "move")
+    journal.append("decision", src=src, category="cat")
+    journal.sync()
+    journal._file.write('{"op": "intent", "src": "/x/b.j')
+    journal._file.flush()
+    journal._file.close()
+    return src, dest
+
+
+def test_resume_after_torn_record_keeps_new_records(tmp_path):
+    folder = str(tmp_path)
+    src, dest = _torn_journal(folder)
+
+    journal, state = RunJournal.resume_latest(folder)
+    assert journal is not None
+    journal.placed(src, dest, "move")
+    journal.close()
+
+    records = read_journal(list_journals(folder)[-1])
+    assert [record["op"] for record in records] == ["run", "decision", "resume", "placed"]
+    assert src in JournalState(records).placed
+
+
+def test_read_journal_skips_undecodable_lines(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"op": "run"}\n{"op": "inte\n{"op": "resume"}\n')
+
+    assert [record["op"] for record in read_journal(path)] == ["run", "resume"]
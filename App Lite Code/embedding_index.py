@@ -0,0 +1,628 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+
+
+# File di dalam folder store embedding
+VECTORS_FILE = "embeddings.f16"
+FILES_DB = "files.db"
+INDEX_FILE = "ivf_index.npz"
+INDEX_VECTORS_FILE = "ivf_vectors.f16"
+
+# Di bawah jumlah ini brute force sudah cukup cepat, index IVF tidak dibangun
+IVF_MIN_VECTORS = 20000
+
+# Ukuran buffer float32 untuk konversi potongan float16 saat pencarian. Jumlah baris per
+# potongan mengikuti dimensi, jadi embedding 2048 dimensi tidak membuat temporary ratusan MB
+SCRATCH_BYTES = 8 << 20
+
+
+def l2_normalize(vectors):
+    """Normalisasi tiap baris ke panjang 1 (float32), agar cosine similarity = dot product"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.float32(1e-12))
+
+
+def _chunk_scores(chunk, queries, scratch=None):
+    """
+    Skor (baris, query) untuk satu potongan matriks float16
+
+    Jika scratch (buffer float32 minimal sebesar chunk) diberikan, konversi ke float32
+    ditulis ke sana, bukan ke array baru
+    """
+    if scratch is None:
+        return chunk.astype(np.float32) @ queries.T
+    converted = scratch[:len(chunk)]
+    np.copyto(converted, chunk)
+    return converted @ queries.T
+
+
+def _merge_top_k(best_scores, best_rows, scores, rows, k):
+    """Gabungkan kandidat baru ke top-k sementara milik satu query"""
+    if best_scores is not None:
+        scores = np.concatenate([best_scores, scores])
+        rows = np.concatenate([best_rows, rows])
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, rows = scores[keep], rows[keep]
+    return scores, rows
+
+
+def _finalize_top_k(scores, rows, k):
+    """Urutkan hasil top-k dan isi kekurangannya dengan -1 / -inf"""
+    out_rows = np.full(k, -1, dtype=np.int64)
+    out_scores = np.full(k, -np.inf, dtype=np.float32)
+    if scores is not None and len(scores):
+        order = np.argsort(-scores, kind='stable')[:k]
+        out_rows[:len(order)] = rows[order]
+        # Pembulatan float16 bisa membuat skor sedikit di atas 1
+        out_scores[:len(order)] = np.clip(scores[order], -1.0, 1.0)
+    return out_scores, out_rows
+
+
+def assign_clusters(vectors, centroids, chunk_rows=16384):
+    """
+    Cari centroid terdekat (cosine) untuk setiap baris vectors
+
+    Args:
+        vectors: Matriks (N, dim) float16/float32 yang sudah dinormalisasi
+        centroids: Matriks (jumlah cluster, dim) float32 yang sudah dinormalisasi
+        chunk_rows: Baris yang dikonversi ke float32 sekaligus
+
+    Returns:
+        Array int32 (N,) index cluster
+    """
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_rows):
+        scores = _chunk_scores(vectors[start:start + chunk_rows], centroids)
+        labels[start:start + len(scores)] = np.argmax(scores, axis=1)
+    return labels
+
+
+def kmeans(vectors, n_clusters, iterations=10, seed=0):
+    """
+    K-means sferis (cosine) untuk vektor yang sudah dinormalisasi
+
+    Dipakai untuk melatih centroid index IVF, dan bisa dipakai langsung untuk
+    mengelompokkan seluruh galeri.
+
+    Args:
+        vectors: Matriks (N, dim), sebaiknya sampel yang muat di memori
+        n_clusters: Jumlah cluster
+        iterations: Jumlah iterasi Lloyd
+        seed: Seed inisialisasi
+
+    Returns:
+        Tuple (centroids float32 (n_clusters, dim), label int32 (N,))
+    """
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n_clusters = max(1, min(int(n_clusters), len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = assign_clusters(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=n_clusters)
+
+        # Cluster kosong diisi ulang dengan titik acak agar jumlah cluster tetap
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = l2_normalize(sums)
+
+    return centroids, assign_clusters(vectors, centroids)
+
+
+class EmbeddingStore:
+    """
+    Penyimpanan embedding gambar di disk.
+
+    Vektor disimpan sebagai matriks float16 yang di-memory-map (embeddings.f16), satu
+    baris per isi file dan sudah dinormalisasi L2. Peta file ke baris (file ID) ada di
+    SQLite (files.db): setiap path menunjuk ke satu baris, dan baris dikenali dari hash
+    isi file. File yang dipindah (misalnya setelah diurutkan ke folder kategori) atau
+    duplikat cukup menunjuk ke baris yang sudah ada, tanpa inferensi ulang.
+
+    Baris tidak pernah ditimpa, hanya ditambah. Baris yang tidak lagi ditunjuk path mana
+    pun dianggap mati dan dilewati saat pencarian.
+    """
+
+    # Catatan path ditulis ke disk per sekian entri
+    LINK_FLUSH_INTERVAL = 500
+
+    def __init__(self, store_dir, model_fp=None):
+        """
+        Inisialisasi EmbeddingStore
+
+        Args:
+            store_dir: Folder store (dibuat jika belum ada)
+            model_fp: Fingerprint model embedding. Jika berbeda dengan yang tersimpan,
+                isi store dikosongkan karena embedding dari model lain tidak sebanding
+        """
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self._pending_links = []
+        self._matrix = None
+        self._live = None
+        self.was_reset = False
+
+        os.makedirs(store_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(store_dir, FILES_DB), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " row INTEGER PRIMARY KEY,"
+            " content_hash TEXT NOT NULL UNIQUE)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " row INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_files_row ON files (row)")
+        self._conn.commit()
+
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self.count = int(meta.get("count", 0))
+        self.model_fp = meta.get("model_fp")
+
+        if model_fp is not None and model_fp != self.model_fp:
+            if self.count:
+                self.was_reset = True
+                self.reset()
+            self.model_fp = model_fp
+            self._set_meta(model_fp=model_fp)
+            self._conn.commit()
+
+        if self.dim is not None:
+            self._open_matrix()
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.store_dir, VECTORS_FILE)
+
+    def _set_meta(self, **values):
+        self._conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                               [(key, str(value)) for key, value in values.items()])
+
+    def _open_matrix(self, min_rows=0):
+        """Memory-map file vektor, file diperbesar (kapasitas digandakan) jika perlu"""
+        row_bytes = self.dim * np.dtype(np.float16).itemsize
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        capacity = size // row_bytes
+        if capacity < max(min_rows, 1):
+            capacity = max(min_rows, capacity * 2, 1024)
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            with open(self.vectors_path, 'ab') as f:
+                f.truncate(capacity * row_bytes)
+        elif self._matrix is not None:
+            return
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float16, mode='r+',
+                                 shape=(capacity, self.dim))
+
+    def reset(self):
+        """Kosongkan store beserta index-nya"""
+        with self._lock:
+            self._matrix = None
+            self._pending_links = []
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM vectors")
+            self._conn.execute("DELETE FROM meta WHERE key IN ('dim', 'count')")
+            self._conn.commit()
+            for name in (VECTORS_FILE, INDEX_FILE, INDEX_VECTORS_FILE):
+                path = os.path.join(self.store_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            self.dim = None
+            self.count = 0
+            self._live = None
+
+    def lookup(self, path, key):
+        """
+        Baris embedding untuk path, selama file-nya belum berubah
+
+        Args:
+            path: Path absolut file
+            key: Tuple (inode, ukuran, mtime_ns) dari prediction_cache.stat_key
+
+        Returns:
+            Index baris, atau None jika path baru atau file-nya berubah
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT row, inode, size, mtime_ns FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None or tuple(row[1:]) != tuple(key):
+            return None
+        return row[0]
+
+    def find_hash(self, content_hash):
+        """Baris embedding untuk isi file dengan hash ini, None jika belum ada"""
+        with self._lock:
+            row = self._conn.execute("SELECT row FROM vectors WHERE content_hash = ?",
+                                     (content_hash,)).fetchone()
+        return row[0] if row else None
+
+    def link(self, path, key, row):
+        """Arahkan path ke baris yang sudah ada (file dipindah atau duplikat). Ditulis per batch"""
+        with self._lock:
+            self._pending_links.append((path, int(row), key[0], key[1], key[2]))
+            if len(self._pending_links) >= self.LINK_FLUSH_INTERVAL:
+                self._flush_links()
+
+    def _flush_links(self):
+        if self._pending_links:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                                   self._pending_links)
+            self._conn.commit()
+            self._pending_links = []
+            self._live = None
+
+    def add_many(self, entries, vectors):
+        """
+        Tambahkan embedding satu batch
+
+        Vektor ditulis dan di-flush ke file dulu, baru kemudian peta file-nya di-commit.
+        Jika proses mati di tengah, baris yang belum di-commit ditimpa di run berikutnya.
+
+        Args:
+            entries: List (path absolut, stat key, hash isi) sesuai urutan vectors
+            vectors: Array (N, dim)
+
+        Returns:
+            List index baris untuk setiap entri
+        """
+        vectors = l2_normalize(vectors)
+        if len(entries) != len(vectors):
+            raise ValueError("Jumlah entri dan vektor tidak sama")
+        if not entries:
+            return []
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_meta(dim=self.dim)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Dimensi embedding {vectors.shape[1]} tidak sama dengan store ({self.dim})")
+
+            start = self.count
+            self._open_matrix(start + len(vectors))
+            self._matrix[start:start + len(vectors)] = vectors
+            self._matrix.flush()
+
+            rows = []
+            for offset, (path, key, content_hash) in enumerate(entries):
+                row = start + offset
+                cursor = self._conn.execute("INSERT OR IGNORE INTO vectors VALUES (?, ?)", (row, content_hash))
+                if cursor.rowcount == 0:
+                    # Isi yang sama muncul dua kali di batch ini, baris barunya tidak dipakai
+                    row = self._conn.execute("SELECT row FROM vectors WHERE content_hash = ?",
+                                             (content_hash,)).fetchone()[0]
+                rows.append(row)
+                self._pending_links.append((path, row, key[0], key[1], key[2]))
+
+            self.count = start + len(vectors)
+            self._set_meta(count=self.count)
+            self._flush_links()
+            self._conn.commit()
+        return rows
+
+    def vectors(self):
+        """Matriks (count, dim) float16 ter-memory-map, baris mati ikut di dalamnya"""
+        if self._matrix is None:
+            return np.empty((0, self.dim or 0), dtype=np.float16)
+        return self._matrix[:self.count]
+
+    def live_mask(self):
+        """Array bool (count,), True untuk baris yang masih ditunjuk minimal satu path"""
+        with self._lock:
+            self._flush_links()
+            if self._live is None or len(self._live) != self.count:
+                rows = np.fromiter((r for (r,) in self._conn.execute("SELECT DISTINCT row FROM files")),
+                                   dtype=np.int64)
+                live = np.zeros(self.count, dtype=bool)
+                live[rows[rows < self.count]] = True
+                self._live = live
+            return self._live
+
+    def row_for_path(self, path):
+        """Baris embedding untuk path (tanpa cek stat), None jika tidak ada"""
+        with self._lock:
+            self._flush_links()
+            row = self._conn.execute("SELECT row FROM files WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def paths_for_rows(self, rows):
+        """
+        Path untuk setiap baris
+
+        Returns:
+            Dict {baris: [path, ...]}, satu baris bisa punya beberapa path (duplikat)
+        """
+        rows = [int(r) for r in rows if r >= 0]
+        result = {row: [] for row in rows}
+        if not rows:
+            return result
+        with self._lock:
+            self._flush_links()
+            placeholders = ",".join("?" * len(rows))
+            for row, path in self._conn.execute(
+                f"SELECT row, path FROM files WHERE row IN ({placeholders}) ORDER BY path", rows
+            ):
+                result[row].append(path)
+        return result
+
+    def prune_missing(self):
+        """
+        Hapus path yang file-nya sudah tidak ada dari peta file
+
+        Returns:
+            Jumlah path yang dihapus
+        """
+        with self._lock:
+            self._flush_links()
+            missing = [(path,) for (path,) in self._conn.execute("SELECT path FROM files")
+                       if not os.path.exists(path)]
+            if missing:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", missing)
+                self._conn.commit()
+                self._live = None
+        return len(missing)
+
+    def flush(self):
+        with self._lock:
+            self._flush_links()
+
+    def close(self):
+        with self._lock:
+            self._flush_links()
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            self._conn.close()
+
+
+class NearestNeighborIndex:
+    """
+    Pencarian top-k tetangga terdekat (cosine) di atas EmbeddingStore.
+
+    Tanpa index, pencarian berupa brute force per potongan matriks float16. Setelah
+    build(), vektor dikelompokkan dengan k-means menjadi nlist inverted list (IVF) yang
+    disalin berurutan per list ke ivf_vectors.f16. Query hanya membandingkan nprobe list
+    dengan centroid terdekat, jadi untuk jutaan gambar cukup membaca beberapa ribu baris.
+    Baris yang ditambahkan setelah build dicari secara brute force sampai index dibangun
+    ulang (lihat update).
+    """
+
+    def __init__(self, store, nprobe=8, chunk_rows=16384):
+        """
+        Inisialisasi NearestNeighborIndex, index IVF yang tersimpan di store langsung dimuat
+
+        Args:
+            store: EmbeddingStore
+            nprobe: Jumlah list IVF yang diperiksa per query (lebih besar = lebih akurat, lebih lambat)
+            chunk_rows: Baris per potongan untuk brute force
+        """
+        self.store = store
+        self.nprobe = nprobe
+        self.chunk_rows = chunk_rows
+        self.centroids = None
+        self._offsets = None
+        self._rows = None
+        self._vectors = None
+        self.built_count = 0
+        self._load()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.store.store_dir, INDEX_FILE)
+
+    @property
+    def index_vectors_path(self):
+        return os.path.join(self.store.store_dir, INDEX_VECTORS_FILE)
+
+    def _load(self):
+        if not os.path.exists(self.index_path) or self.store.dim is None:
+            return
+        try:
+            with np.load(self.index_path) as data:
+                centroids = data["centroids"]
+                offsets = data["offsets"]
+                rows = data["rows"]
+                built_count = int(data["built_count"])
+            if centroids.shape[1] != self.store.dim or built_count > self.store.count:
+                return
+            vectors = np.memmap(self.index_vectors_path, dtype=np.float16, mode='r',
+                                shape=(len(rows), self.store.dim)) if len(rows) else None
+        except (OSError, ValueError, KeyError):
+            # Index rusak atau tidak lengkap, pencarian kembali ke brute force
+            return
+        self.centroids, self._offsets, self._rows = centroids, offsets, rows
+        self._vectors = vectors
+        self.built_count = built_count
+
+    @property
+    def has_ivf(self):
+        return self.centroids is not None
+
+    def build(self, nlist=None, iterations=10, sample_size=None, seed=0):
+        """
+        Bangun index IVF dari semua baris hidup di store
+
+        Args:
+            nlist: Jumlah inverted list (default: akar jumlah vektor)
+            iterations: Iterasi k-means
+            sample_size: Jumlah vektor untuk melatih centroid (default: 32 per list,
+                dibatasi sekitar 256 MB float32)
+            seed: Seed sampling dan inisialisasi k-means
+        """
+        matrix = self.store.vectors()
+        built_count = len(matrix)
+        live_rows = np.flatnonzero(self.store.live_mask()[:built_count])
+        if not len(live_rows):
+            raise ValueError("Store embedding masih kosong")
+
+        dim = matrix.shape[1]
+        nlist = int(nlist or max(1, np.sqrt(len(live_rows))))
+        nlist = min(nlist, len(live_rows))
+        if sample_size is None:
+            sample_size = min(nlist * 32, (256 << 20) // (dim * 4))
+        sample_size = max(nlist, min(sample_size, len(live_rows)))
+
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(live_rows, sample_size, replace=False))
+        centroids, _ = kmeans(matrix[sample_rows], nlist, iterations, seed)
+
+        # Kelompokkan semua baris per list, lalu salin berurutan agar satu list = satu potongan file
+        labels = np.empty(len(live_rows), dtype=np.int32)
+        for start in range(0, len(live_rows), self.chunk_rows):
+            chunk_rows = live_rows[start:start + self.chunk_rows]
+            labels[start:start + len(chunk_rows)] = assign_clusters(matrix[chunk_rows], centroids)
+        order = np.argsort(labels, kind='stable')
+        rows = live_rows[order]
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+
+        self.centroids = None
+        self._vectors = None
+        tmp_path = self.index_vectors_path + ".tmp"
+        vectors = np.memmap(tmp_path, dtype=np.float16, mode='w+', shape=(len(rows), dim))
+        for start in range(0, len(rows), self.chunk_rows):
+            vectors[start:start + self.chunk_rows] = matrix[rows[start:start + self.chunk_rows]]
+        vectors.flush()
+        del vectors
+        os.replace(tmp_path, self.index_vectors_path)
+
+        tmp_path = self.index_path + ".tmp.npz"
+        np.savez(tmp_path, centroids=centroids, offsets=offsets, rows=rows,
+                 built_count=np.int64(built_count))
+        os.replace(tmp_path, self.index_path)
+        self._load()
+
+    def update(self, min_vectors=IVF_MIN_VECTORS, max_unindexed_fraction=0.1, **build_options):
+        """
+        Bangun (ulang) index IVF jika store cukup besar dan bagian yang belum ter-index
+        melewati max_unindexed_fraction
+
+        Returns:
+            True jika index dibangun ulang
+        """
+        count = self.store.count
+        if count < min_vectors:
+            return False
+        if self.has_ivf and count - self.built_count <= max_unindexed_fraction * count:
+            return False
+        self.build(**build_options)
+        return True
+
+    def _scratch(self, dim):
+        """
+        Buffer float32 (baris per potongan, dim) untuk konversi float16 saat pencarian
+
+        Baris per potongan dibatasi chunk_rows dan SCRATCH_BYTES. Buffer dibuat per
+        pencarian (bukan per potongan), jadi pencarian paralel tetap aman.
+        """
+        rows = max(1, min(self.chunk_rows, SCRATCH_BYTES // (4 * max(1, dim))))
+        return np.empty((rows, dim), dtype=np.float32)
+
+    def _brute_force(self, queries, k, start=0):
+        """Top-k brute force untuk baris [start, count) store"""
+        matrix = self.store.vectors()
+        live = self.store.live_mask()
+        best = [(None, None)] * len(queries)
+        scratch = self._scratch(matrix.shape[1])
+        for chunk_start in range(start, len(matrix), len(scratch)):
+            chunk = matrix[chunk_start:chunk_start + len(scratch)]
+            scores = _chunk_scores(chunk, queries, scratch)
+            rows = np.arange(chunk_start, chunk_start + len(chunk))
+            alive = live[chunk_start:chunk_start + len(chunk)]
+            if not alive.all():
+                scores, rows = scores[alive], rows[alive]
+            for i in range(len(queries)):
+                best[i] = _merge_top_k(best[i][0], best[i][1], scores[:, i], rows, k)
+        return best
+
+    def search(self, queries, k=10, nprobe=None, exact=False):
+        """
+        Cari k baris paling mirip untuk setiap query
+
+        Args:
+            queries: Vektor (dim,) atau matriks (Q, dim), tidak perlu dinormalisasi
+            k: Jumlah hasil per query
+            nprobe: Override jumlah list IVF yang diperiksa
+            exact: Paksa brute force walaupun index IVF ada
+
+        Returns:
+            Tuple (skor float32 (Q, k), baris int64 (Q, k)). Skor adalah cosine
+            similarity, slot kosong berisi baris -1 dengan skor -inf
+        """
+        queries = l2_normalize(queries)
+        k = max(1, int(k))
+        if self.store.count == 0:
+            return (np.full((len(queries), k), -np.inf, dtype=np.float32),
+                    np.full((len(queries), k), -1, dtype=np.int64))
+
+        if exact or not self.has_ivf:
+            best = self._brute_force(queries, k)
+        else:
+            best = self._search_ivf(queries, k, nprobe or self.nprobe)
+
+        results = [_finalize_top_k(scores, rows, k) for scores, rows in best]
+        return (np.stack([scores for scores, _ in results]),
+                np.stack([rows for _, rows in results]))
+
+    def _search_ivf(self, queries, k, nprobe):
+        nprobe = min(nprobe, len(self.centroids))
+        live = self.store.live_mask()
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        # Baris baru setelah build belum masuk list mana pun
+        best = (self._brute_force(queries, k, self.built_count)
+                if self.store.count > self.built_count else [(None, None)] * len(queries))
+
+        scratch = self._scratch(self._vectors.shape[1])
+
+        def merge(i, filled, row_parts):
+            scores = scratch[:filled] @ queries[i]
+            rows = np.concatenate(row_parts)
+            # Path yang dipindah ke baris lain atau dihapus setelah build
+            alive = live[rows]
+            if not alive.all():
+                scores, rows = scores[alive], rows[alive]
+            best[i] = _merge_top_k(best[i][0], best[i][1], scores, rows, k)
+
+        for i in range(len(queries)):
+            # Isi list IVF yang diperiksa dikonversi berurutan ke scratch, diskor tiap penuh
+            filled, row_parts = 0, []
+            for c in probes[i]:
+                start, end = self._offsets[c], self._offsets[c + 1]
+                while start < end:
+                    take = min(end - start, len(scratch) - filled)
+                    np.copyto(scratch[filled:filled + take], self._vectors[start:start + take])
+                    row_parts.append(self._rows[start:start + take])
+                    filled += take
+                    start += take
+                    if filled == len(scratch):
+                        merge(i, filled, row_parts)
+                        filled, row_parts = 0, []
+            if filled:
+                merge(i, filled, row_parts)
+        return best
+
+    def close(self):
+        self._vectors = None
@@ -0,0 +1,307 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+from folder_scanner import FolderScanner, IMAGE_EXTENSIONS
+
+
+# Flag inotify dari <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+WATCH_BACKENDS = ('auto', 'inotify', 'poll')
+
+
+class Inotify:
+    """Pembungkus tipis inotify Linux lewat ctypes, biar gak butuh paket tambahan"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self, timeout):
+        """
+        Tunggu event paling lama timeout detik
+
+        Returns:
+            List (wd, mask, nama file) - nama kosong buat event folder itu sendiri
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b'\0'))
+            offset += name_len
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class WatchedFile:
+    """
+    Pengganti os.DirEntry buat file dari watcher, biar bisa lewat jalur yang sama
+    kayak hasil FolderScanner (cache prediksi, filter journal)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._stat = None
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def inode(self):
+        return self.stat().st_ino
+
+    def signature(self):
+        """(ukuran, mtime) buat ngecek file ini berubah atau gak sejak terakhir diproses"""
+        st = self.stat()
+        return st.st_size, st.st_mtime_ns
+
+
+class FolderWatcher:
+    """
+    Pantau folder dan kumpulin gambar baru/berubah jadi batch kecil.
+
+    Di Linux pake inotify (event langsung dari kernel). Kalo gak ada (OS lain, limit
+    watch habis, filesystem jaringan), fallback ke polling: folder di-scan ulang tiap
+    poll_interval dan (ukuran, mtime) tiap file dibandingin sama scan sebelumnya.
+
+    File baru dianggap siap kalo udah debounce detik gak ada event/perubahan lagi,
+    jadi file yang masih disalin (sync HP, dsb.) gak kebaca setengah jadi.
+    """
+
+    def __init__(self, root_path, extensions=None, exclude_dirs=(), recursive=True,
+                 debounce=2.0, poll_interval=5.0, backend='auto'):
+        """
+        Inisialisasi FolderWatcher
+
+        Args:
+            root_path: Folder yang dipantau
+            extensions: Ekstensi file yang dianggap gambar (default: IMAGE_EXTENSIONS)
+            exclude_dirs: Folder yang gak dipantau, misalnya folder kategori hasil sortir
+            recursive: Ikut pantau subfolder (folder tersembunyi dilewatin)
+            debounce: Detik tanpa perubahan sebelum file dianggap selesai ditulis
+            poll_interval: Jeda antar scan buat backend polling
+            backend: 'auto' (inotify kalo bisa), 'inotify', atau 'poll'
+        """
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(f"Backend watch tidak dikenal: {backend}. Pilihan: {', '.join(WATCH_BACKENDS)}")
+
+        self.root_path = root_path
+        self.extensions = tuple(ext.lower() for ext in (extensions or IMAGE_EXTENSIONS))
+        self.exclude_dirs = [os.path.abspath(d) for d in exclude_dirs]
+        self._excluded = {os.path.normcase(d) for d in self.exclude_dirs}
+        self.recursive = recursive
+        self.debounce = float(debounce)
+        self.poll_interval = float(poll_interval)
+
+        # path -> waktu event/perubahan terakhir
+        self._pending = {}
+        self._inotify = None
+        self._watch_dirs = {}
+        self._snapshot = {}
+
+        if backend in ('auto', 'inotify') and sys.platform.startswith('linux'):
+            try:
+                self._start_inotify()
+            except OSError:
+                if backend == 'inotify':
+                    raise
+                self.close()
+        elif backend == 'inotify':
+            raise OSError(errno.ENOSYS, "inotify cuma ada di Linux")
+
+        self.backend = 'inotify' if self._inotify is not None else 'poll'
+        if self.backend == 'poll':
+            self._snapshot = self._scan_snapshot()
+
+    def _is_image(self, name):
+        return name.lower().endswith(self.extensions)
+
+    def _should_watch_dir(self, path):
+        name = os.path.basename(path)
+        return not name.startswith('.') and os.path.normcase(os.path.abspath(path)) not in self._excluded
+
+    # ---- inotify ----
+
+    def _start_inotify(self):
+        self._inotify = Inotify()
+        self._add_tree(self.root_path, mark_files=False)
+
+    def _add_tree(self, dir_path, mark_files):
+        """Pasang watch di dir_path (dan subfolder-nya). Folder yang baru nongol ikut dicek isinya"""
+        stack = [dir_path]
+        now = time.monotonic()
+        while stack:
+            current = stack.pop()
+            try:
+                wd = self._inotify.add_watch(current)
+            except OSError as e:
+                # Limit watch habis berarti inotify gak bisa dipake buat folder ini
+                if e.errno == errno.ENOSPC:
+                    raise
+                continue
+            self._watch_dirs[wd] = current
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive and self._should_watch_dir(entry.path):
+                                stack.append(entry.path)
+                        elif mark_files and self._is_image(entry.name):
+                            # File di folder yang dipindah masuk gak dapet event sendiri
+                            self._pending[entry.path] = now
+            except OSError:
+                continue
+
+    def _poll_inotify(self, timeout):
+        now = time.monotonic()
+        for wd, mask, name in self._inotify.read_events(timeout):
+            if mask & IN_Q_OVERFLOW:
+                # Event kebanyakan dan ada yang kebuang, cek ulang semua file
+                self._mark_all_files()
+                continue
+            if mask & IN_IGNORED:
+                self._watch_dirs.pop(wd, None)
+                continue
+            dir_path = self._watch_dirs.get(wd)
+            if dir_path is None or not name:
+                continue
+            path = os.path.join(dir_path, name)
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and self._should_watch_dir(path):
+                    self._add_tree(path, mark_files=True)
+            elif self._is_image(name):
+                self._pending[path] = now
+
+    def _mark_all_files(self):
+        now = time.monotonic()
+        scanner = FolderScanner(self.root_path, self.extensions, self.exclude_dirs, self.recursive)
+        for entry in scanner.scan():
+            self._pending[entry.path] = now
+
+    # ---- polling ----
+
+    def _scan_snapshot(self):
+        snapshot = {}
+        scanner = FolderScanner(self.root_path, self.extensions, self.exclude_dirs, self.recursive)
+        for entry in scanner.scan():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _poll_scan(self):
+        now = time.monotonic()
+        snapshot = self._scan_snapshot()
+        for path, signature in snapshot.items():
+            if self._snapshot.get(path) != signature:
+                # File baru atau berubah sejak scan sebelumnya, debounce-nya diulang
+                self._pending[path] = now
+        self._snapshot = snapshot
+
+    # ---- loop utama ----
+
+    def _take_ready(self):
+        """Ambil file yang udah debounce detik gak berubah"""
+        now = time.monotonic()
+        ready = [path for path, last in self._pending.items() if now - last >= self.debounce]
+        for path in ready:
+            del self._pending[path]
+        return [WatchedFile(path) for path in sorted(ready) if os.path.isfile(path)]
+
+    def watch(self, stop_event, max_batch=None):
+        """
+        Generator batch gambar yang siap diproses, jalan sampai stop_event di-set
+
+        Args:
+            stop_event: threading.Event buat berhentiin watch
+            max_batch: Maksimal file per batch (None = semua yang siap)
+
+        Yields:
+            List WatchedFile gambar yang baru/berubah dan udah selesai ditulis
+        """
+        next_poll = time.monotonic() + self.poll_interval
+        while not stop_event.is_set():
+            # Timeout pendek biar stop_event cepet kerasa
+            timeout = 0.5
+            if self._pending:
+                soonest = min(self._pending.values()) + self.debounce - time.monotonic()
+                timeout = max(0.05, min(timeout, soonest))
+
+            if self._inotify is not None:
+                try:
+                    self._poll_inotify(timeout)
+                except OSError:
+                    # Limit watch habis pas ada folder baru, lanjut pake polling
+                    self.close()
+                    self.backend = 'poll'
+                    self._snapshot = self._scan_snapshot()
+                    self._mark_all_files()
+            else:
+                stop_event.wait(timeout)
+                if time.monotonic() >= next_poll:
+                    self._poll_scan()
+                    next_poll = time.monotonic() + self.poll_interval
+
+            ready = self._take_ready()
+            if not max_batch:
+                if ready:
+                    yield ready
+                continue
+            for start in range(0, len(ready), max_batch):
+                yield ready[start:start + max_batch]
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watch_dirs = {}
@@ -5,7 +5,7 @@ import threading
 import sys
 import ctypes
 from optimized_classifier import OptimizedClassifier
-from model_optimizer import ModelOptimizer
+from model_optimizer import ModelOptimizer, EXPORT_PRESETS
 
 class LiteGalleryApp:
     def __init__(self, root):
@@ -136,6 +136,12 @@ class LiteGalleryApp:
         folder_frame = ttk.LabelFrame(parent, text="Sumber Gambar", padding=15)
         folder_frame.pack(fill=tk.X, padx=15, pady=8)
         
+        # Subfolder gak ikut diproses kecuali dicentang, biar susunan folder yang ada gak diacak
+        self.include_subfolders = tk.BooleanVar(value=False)
+        subfolder_check = ttk.Checkbutton(folder_frame, text="Ikut proses subfolder",
+                                          variable=self.include_subfolders)
+        subfolder_check.pack(side=tk.BOTTOM, anchor=tk.W, padx=5, pady=(8, 0))
+        
         folder_entry = ttk.Entry(folder_frame, textvariable=self.folder_path, width=50)
         folder_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         
@@ -174,6 +180,11 @@ class LiteGalleryApp:
                                     command=self.start_classification)
         self.start_button.pack(side=tk.LEFT, padx=5)
         
+        # Balikin semua file dari run terakhir di folder yang dipilih
+        self.undo_button = ttk.Button(controls_frame, text="Undo Run Terakhir", 
+                                    command=self.undo_last_run)
+        self.undo_button.pack(side=tk.LEFT, padx=5)
+        
         # Frame progress
         progress_frame = ttk.LabelFrame(parent, text="Progress", padding=15)
         progress_frame.pack(fill=tk.X, padx=15, pady=8)
@@ -246,14 +257,26 @@ class LiteGalleryApp:
                                    variable=self.target_format, value="onnx")
         onnx_radio.pack(side=tk.LEFT, padx=10)
         
-        # Opsi kuantisasi
-        quant_frame = ttk.Frame(options_frame)
-        quant_frame.pack(fill=tk.X, pady=8)
+        # Preset kuantisasi TFLite
+        preset_frame = ttk.Frame(options_frame)
+        preset_frame.pack(fill=tk.X, pady=8)
+        
+        preset_label = ttk.Label(preset_frame, text="Preset TFLite:")
+        preset_label.pack(side=tk.LEFT, padx=5)
+        
+        self.export_preset = tk.StringVar(value=EXPORT_PRESETS[0])
+        preset_combo = ttk.Combobox(preset_frame, textvariable=self.export_preset,
+                                    values=EXPORT_PRESETS, state="readonly", width=15)
+        preset_combo.pack(side=tk.LEFT, padx=5)
+        
+        preset_hint = ttk.Label(preset_frame, text="(full_int8 butuh dataset representatif)")
+        preset_hint.pack(side=tk.LEFT, padx=5)
         
-        self.quantize = tk.BooleanVar(value=False)
-        quant_check = ttk.Checkbutton(quant_frame, text="Aktifin Kuantisasi (ukuran lebih kecil, akurasi mungkin turun)", 
-                                     variable=self.quantize)
-        quant_check.pack(side=tk.LEFT, padx=5)
+        # Preprocessing digabung ke model, runtime tinggal kasih buffer uint8 hasil decode
+        self.fuse_preprocessing = tk.BooleanVar(value=False)
+        fuse_check = ttk.Checkbutton(options_frame, text="Preprocessing di dalam model (input uint8)",
+                                     variable=self.fuse_preprocessing)
+        fuse_check.pack(anchor=tk.W, padx=5, pady=4)
         
         # Dataset representatif buat kuantisasi
         rep_dataset_frame = ttk.Frame(options_frame)
@@ -294,6 +317,26 @@ class LiteGalleryApp:
                                command=self.convert_model)
         convert_btn.pack(side=tk.LEFT, padx=5)
         
+        export_all_btn = ttk.Button(controls_frame, text="Export Semua Preset", 
+                                  command=self.export_all_presets)
+        export_all_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Tabel hasil export semua preset
+        results_frame = ttk.LabelFrame(parent, text="Hasil Preset", padding=15)
+        results_frame.pack(fill=tk.X, padx=15, pady=8)
+        
+        columns = ("preset", "size", "latency", "path")
+        self.preset_table = ttk.Treeview(results_frame, columns=columns, show="headings", height=5)
+        self.preset_table.heading("preset", text="Preset")
+        self.preset_table.heading("size", text="Ukuran (MB)")
+        self.preset_table.heading("latency", text="Latensi (ms/gambar)")
+        self.preset_table.heading("path", text="File")
+        self.preset_table.column("preset", width=120, anchor=tk.W)
+        self.preset_table.column("size", width=110, anchor=tk.E)
+        self.preset_table.column("latency", width=150, anchor=tk.E)
+        self.preset_table.column("path", width=300, anchor=tk.W)
+        self.preset_table.pack(fill=tk.X, expand=True)
+        
         # Frame log
         log_frame = ttk.LabelFrame(parent, text="Log Konversi", padding=15)
         log_frame.pack(fill=tk.BOTH, padx=15, pady=8, expand=True)
@@ -309,7 +352,9 @@ class LiteGalleryApp:
         self.log_text.insert(tk.END, "Tool ini bantu kamu convert model ke format yang dioptimasi:\n")
         self.log_text.insert(tk.END, "• TensorFlow Lite (.tflite): Ukuran lebih kecil, lebih cepat di mobile\n")
         self.log_text.insert(tk.END, "• ONNX (.onnx): Performa lebih baik di Windows/DirectML\n\n")
-        self.log_text.insert(tk.END, "Aktifin kuantisasi buat ukuran model lebih kecil tapi akurasi mungkin sedikit turun.\n")
+        self.log_text.insert(tk.END, "Preset TFLite: fp32 (tanpa kuantisasi), dynamic_int8 dan fp16 (ukuran lebih kecil),\n")
+        self.log_text.insert(tk.END, "full_int8 (paling kecil, butuh dataset representatif). Akurasi mungkin sedikit turun.\n")
+        self.log_text.insert(tk.END, "Klik 'Export Semua Preset' buat bandingin ukuran dan latensi semua preset.\n")
     
     def select_all_categories(self):
         """Pilih semua checkboxes kategori"""
@@ -372,6 +417,7 @@ class LiteGalleryApp:
             if success:
                 self.root.after(0, lambda: self.status_text.set("Model berhasil di-load. Siap klasifikasi gambar."))
                 self.root.after(0, lambda: self.result_text.insert(tk.END, "Model berhasil di-load!\n"))
+                self.root.after(0, lambda: self.start_button.config(state="normal"))
             else:
                 self.root.after(0, lambda: self.status_text.set("Gagal load model."))
                 self.root.after(0, lambda: self.result_text.insert(tk.END, "Gagal load model.\n"))
@@ -409,6 +455,9 @@ class LiteGalleryApp:
         
         # Matiin tombol start selama processing
         self.start_button.config(state="disabled")
+        self.undo_button.config(state="disabled")
+        
+        self.classifier.recursive = self.include_subfolders.get()
         
         # Mulai klasifikasi di thread terpisah dengan kategori yang dipilih
         threading.Thread(
@@ -417,12 +466,45 @@ class LiteGalleryApp:
             daemon=True
         ).start()
     
+    def undo_last_run(self):
+        folder = self.folder_path.get()
+        if not folder:
+            messagebox.showwarning("Folder Belum Dipilih", "Pilih folder yang mau di-undo dulu ya.")
+            return
+        
+        if not messagebox.askyesno("Undo Run Terakhir", 
+                                   f"Balikin semua file dari run terakhir di {folder}?"):
+            return
+        
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, f"Undo run terakhir di {folder}...\n")
+        self.progress_var.set(0)
+        self.start_button.config(state="disabled")
+        self.undo_button.config(state="disabled")
+        
+        threading.Thread(target=self._undo_thread, args=(folder,), daemon=True).start()
+    
+    def _undo_thread(self, folder):
+        summary = self.classifier.undo_last_run(folder)
+        self.root.after(0, lambda: self.undo_finished(summary))
+    
+    def undo_finished(self, summary):
+        if summary is not None:
+            self.log_result(f"\nRun {summary['run_id']} dibatalin: {summary['restored']} file dibalikin, "
+                            f"{summary['removed']} salinan dihapus, {len(summary['errors'])} gagal.")
+        self.progress_var.set(100)
+        # Tombol start cuma aktif lagi kalo model udah ke-load
+        if self.classifier.model is not None:
+            self.start_button.config(state="normal")
+        self.undo_button.config(state="normal")
+    
     def convert_model(self):
         input_path = self.input_model_path.get()
         output_path = self.output_model_path.get() or None
         format_type = self.target_format.get()
-        quantize = self.quantize.get()
-        rep_dataset_path = self.rep_dataset_path.get() if quantize else None
+        preset = self.export_preset.get()
+        rep_dataset_path = self.rep_dataset_path.get() if preset == 'full_int8' else None
+        fuse_preprocessing = self.fuse_preprocessing.get()
         
         if not input_path:
             messagebox.showwarning("Model Input Belum Dipilih", "Pilih file model input dulu ya.")
@@ -433,16 +515,68 @@ class LiteGalleryApp:
         self.log_text.insert(tk.END, f"Mulai konversi model...\n")
         self.log_text.insert(tk.END, f"Model input: {input_path}\n")
         self.log_text.insert(tk.END, f"Format target: {format_type}\n")
-        self.log_text.insert(tk.END, f"Kuantisasi: {'Aktif' if quantize else 'Mati'}\n\n")
+        if format_type == "tflite":
+            self.log_text.insert(tk.END, f"Preset: {preset}\n")
+        if fuse_preprocessing:
+            self.log_text.insert(tk.END, "Preprocessing digabung ke model (input uint8)\n")
+        self.log_text.insert(tk.END, "\n")
         
         # Mulai konversi di thread terpisah
         threading.Thread(
             target=self._convert_model_thread, 
-            args=(input_path, output_path, format_type, quantize, rep_dataset_path), 
+            args=(input_path, output_path, format_type, preset, rep_dataset_path, fuse_preprocessing), 
             daemon=True
         ).start()
     
-    def _convert_model_thread(self, input_path, output_path, format_type, quantize, rep_dataset_path):
+    def export_all_presets(self):
+        input_path = self.input_model_path.get()
+        output_path = self.output_model_path.get()
+        rep_dataset_path = self.rep_dataset_path.get() or None
+        
+        if not input_path:
+            messagebox.showwarning("Model Input Belum Dipilih", "Pilih file model input dulu ya.")
+            return
+        
+        # Folder output ikut path output kalau diisi, kalau nggak di samping model input
+        output_dir = os.path.dirname(output_path) if output_path else None
+        
+        # Bersihin log dan tabel sebelumnya
+        self.log_text.delete(1.0, tk.END)
+        self.log_text.insert(tk.END, f"Export semua preset dari {input_path}...\n")
+        if not rep_dataset_path:
+            self.log_text.insert(tk.END, "Folder dataset representatif kosong, preset full_int8 dilewati.\n")
+        self.log_text.insert(tk.END, "\n")
+        for item in self.preset_table.get_children():
+            self.preset_table.delete(item)
+        
+        threading.Thread(
+            target=self._export_all_presets_thread, 
+            args=(input_path, output_dir, rep_dataset_path), 
+            daemon=True
+        ).start()
+    
+    def _export_all_presets_thread(self, input_path, output_dir, rep_dataset_path):
+        def add_row(result):
+            if result["error"]:
+                values = (result["preset"], "-", "-", f"Gagal: {result['error']}")
+            else:
+                values = (result["preset"], f"{result['size_mb']:.2f}", f"{result['latency_ms']:.2f}",
+                          os.path.basename(result["path"]))
+            self.root.after(0, lambda: self.preset_table.insert("", tk.END, values=values))
+        
+        try:
+            results = self.optimizer.export_all_presets(input_path, output_dir, rep_dataset_path,
+                                                        on_result=add_row)
+            succeeded = sum(1 for result in results if not result["error"])
+            self.root.after(0, lambda: self.log_text.insert(tk.END, 
+                                                         f"Selesai! {succeeded} dari {len(results)} model berhasil diukur.\n"))
+        except Exception as e:
+            error_msg = str(e)
+            self.root.after(0, lambda: self.log_text.insert(tk.END, f"\nError pas export preset: {error_msg}\n"))
+            self.root.after(0, lambda: messagebox.showerror("Error Export", f"Error export preset: {error_msg}"))
+    
+    def _convert_model_thread(self, input_path, output_path, format_type, preset, rep_dataset_path,
+                              fuse_preprocessing=False):
         try:
             # Redirect log optimizer ke UI
             original_write = sys.stdout.write
@@ -460,15 +594,17 @@ class LiteGalleryApp:
                 if format_type == "tflite":
                     # Buat TFLite, cek perlu pake dataset representatif apa nggak
                     rep_dataset = None
-                    if quantize and rep_dataset_path:
+                    if rep_dataset_path:
                         rep_dataset = self.optimizer.generate_representative_dataset(rep_dataset_path)
                         
-                    # Convert model
-                    output_file = self.optimizer.convert_to_tflite(
+                    # Convert model sesuai preset
+                    output_file = self.optimizer.export_preset(
                         input_path, 
+                        preset, 
                         output_path, 
-                        quantize=quantize, 
-                        representative_dataset=rep_dataset
+                        representative_dataset=rep_dataset,
+                        fuse_preprocessing=fuse_preprocessing,
+                        verify=True
                     )
                     
                     self.root.after(0, lambda: self.log_text.insert(tk.END, 
@@ -476,7 +612,8 @@ class LiteGalleryApp:
                                                                  
                 elif format_type == "onnx":
                     # Convert ke ONNX
-                    output_file = self.optimizer.convert_to_onnx(input_path, output_path)
+                    output_file = self.optimizer.convert_to_onnx(input_path, output_path,
+                                                                 fuse_preprocessing=fuse_preprocessing)
                     
                     self.root.after(0, lambda: self.log_text.insert(tk.END, 
                                                                  f"\nKonversi selesai! Model ONNX disimpan di: {output_file}\n"))
@@ -515,6 +652,7 @@ class LiteGalleryApp:
         self.root.after(0, lambda: self.show_summary(category_counts, processed, total))
         self.root.after(0, lambda: self.update_status_text(f"Selesai! {processed} gambar disortir ke kategori."))
         self.root.after(0, lambda: self.start_button.config(state="normal"))
+        self.root.after(0, lambda: self.undo_button.config(state="normal"))
         self.root.after(0, lambda: self.progress_var.set(100))
     
     def log_result(self, message):
@@ -544,6 +682,8 @@ def main():
     root = tk.Tk()
     app = LiteGalleryApp(root)
     root.mainloop()
+    # Jendela udah ditutup, tulis sisa update cache sebelum keluar
+    app.classifier.close_cache()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+import multiprocessing
+from file_placer import PLACEMENT_MODES
+from folder_watcher import WATCH_BACKENDS
+
+
+# Kode keluar: 0 semua berhasil, 1 ada gambar yang gagal, 2 argumen salah (argparse),
+# 3 run gagal total (model tidak bisa di-load, folder tidak ada, ...), 130 dihentikan Ctrl+C
+EXIT_OK = 0
+EXIT_FILE_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_FATAL = 3
+EXIT_INTERRUPTED = 130
+
+
+class JsonLinesReporter:
+    """
+    Mengubah callback classifier menjadi event JSON, satu baris per event di stdout.
+
+    Callback dipanggil dari thread inferensi dan worker penempatan, jadi penulisan
+    dikunci agar baris dari dua thread tidak tercampur.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.errors = 0
+        self.fatal = False
+        self.root = None
+        self._last_percent = None
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=float)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def start_root(self, root):
+        self.root = root
+        self._last_percent = None
+        self.emit("start", root=root)
+
+    def on_progress_update(self, progress):
+        # Progress datang per gambar, yang dikirim hanya saat persentasenya berubah
+        percent = int(progress)
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.emit("progress", root=self.root, percent=percent)
+
+    def on_status_update(self, message):
+        self.emit("status", root=self.root, message=message)
+
+    def on_image_classified(self, img_file, predicted_class, confidence):
+        # Kelas di luar kategori yang dipilih datang sebagai "kelas (dilewati - ...)"
+        category, _, note = predicted_class.partition(" (")
+        self.emit("classified", root=self.root, file=img_file, category=category,
+                  confidence=float(confidence), placed=not note)
+
+    def on_error(self, img_file, message):
+        # Error tanpa nama file berarti run itu sendiri yang gagal
+        if img_file:
+            self.errors += 1
+        else:
+            self.fatal = True
+        self.emit("error", root=self.root, file=img_file or None, message=message)
+
+    def on_complete(self, category_counts, processed, total):
+        self.emit("complete", root=self.root, counts=category_counts,
+                  processed=processed, total=total)
+
+    def callbacks(self):
+        return {
+            "on_progress_update": self.on_progress_update,
+            "on_status_update": self.on_status_update,
+            "on_image_classified": self.on_image_classified,
+            "on_error": self.on_error,
+            "on_complete": self.on_complete,
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Urutkan gambar ke folder kategori tanpa GUI, output berupa JSON lines di stdout"
+    )
+    parser.add_argument("roots", nargs="*", help="Folder gambar yang akan diurutkan")
+    parser.add_argument("--model", required=True, help="Path model (.tflite, .onnx, .keras, .h5)")
+    parser.add_argument("--categories", nargs="+", default=None,
+                        help="Kategori yang diurutkan (default: semua)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Gambar per inferensi")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Jumlah worker decoder gambar (default: jumlah CPU, maksimal 8)")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="Maksimal gambar ter-decode yang menunggu diambil model")
+    parser.add_argument("--decode-backend", choices=("thread", "process"), default="thread")
+    parser.add_argument("--preprocess-mode", choices=("auto", "keras", "pil", "draft"), default="auto")
+    parser.add_argument("--placement-mode", choices=PLACEMENT_MODES, default="move")
+    parser.add_argument("--placement-workers", type=int, default=4,
+                        help="Jumlah worker yang menaruh file bersamaan")
+    parser.add_argument("--cache", default=None, help="File SQLite untuk cache prediksi antar run")
+    parser.add_argument("--recursive", action="store_true", help="Gambar di subfolder ikut diproses")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Mulai run baru walaupun run sebelumnya belum selesai")
+    parser.add_argument("--no-journal", action="store_true", help="Tidak menulis journal run")
+    parser.add_argument("--watch", action="store_true",
+                        help="Pantau folder dan urutkan gambar baru sampai dihentikan (Ctrl+C)")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Detik tanpa perubahan sebelum gambar baru diproses")
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="Jeda scan ulang jika inotify tidak tersedia")
+    parser.add_argument("--watch-backend", choices=WATCH_BACKENDS, default="auto")
+    parser.add_argument("--embeddings", metavar="STORE", default=None,
+                        help="Simpan embedding gambar ke folder store ini, bukan mengurutkan")
+    parser.add_argument("--embedding-model", default=None,
+                        help="Model embedding hasil export (default: potong head model Keras --model)")
+    parser.add_argument("--similar", metavar="IMAGE", default=None,
+                        help="Cari gambar yang mirip dengan IMAGE di store --embeddings")
+    parser.add_argument("--top-k", type=int, default=10, help="Jumlah hasil --similar")
+    parser.add_argument("--tflite-threads", type=int, default=None, help="num_threads interpreter TFLite")
+    parser.add_argument("--tflite-interpreters", type=int, default=1,
+                        help="Jumlah interpreter TFLite yang berjalan paralel")
+    parser.add_argument("--onnx-threads", type=int, default=None, help="intra_op_num_threads ONNX Runtime")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.watch and len(args.roots) > 1:
+        parser.error("--watch hanya bisa untuk satu folder")
+    if args.similar and not args.embeddings:
+        parser.error("--similar membutuhkan --embeddings")
+    if args.decode_backend == 'process' and args.preprocess_mode == 'keras':
+        parser.error("--decode-backend process hanya men-decode dengan PIL, gunakan --preprocess-mode "
+                     "auto, pil, atau draft")
+    if not args.roots and not args.similar:
+        parser.error("Minimal satu folder, atau --similar")
+    reporter = JsonLinesReporter()
+    classifier = None
+
+    try:
+        from optimized_classifier import OptimizedClassifier
+
+        classifier = OptimizedClassifier(
+            batch_size=args.batch_size, num_workers=args.workers, queue_size=args.queue_size,
+            decode_backend=args.decode_backend, preprocess_mode=args.preprocess_mode,
+            cache_path=args.cache, recursive=args.recursive,
+            placement_workers=args.placement_workers, placement_mode=args.placement_mode,
+            use_journal=not args.no_journal,
+            tflite_num_threads=args.tflite_threads,
+            tflite_num_interpreters=args.tflite_interpreters,
+            onnx_intra_op_threads=args.onnx_threads,
+            **reporter.callbacks()
+        )
+
+        unknown = [c for c in args.categories or [] if c not in classifier.labels]
+        if unknown:
+            parser.error(f"Kategori tidak dikenal: {', '.join(unknown)}. "
+                         f"Pilihan: {', '.join(classifier.labels)}")
+
+        # Log classifier tetap di stderr, stdout khusus untuk JSON lines
+        if not classifier.load_model(args.model):
+            return EXIT_FATAL
+        reporter.emit("model_loaded", model=os.path.abspath(args.model),
+                      model_type=classifier.model_type)
+        if args.embedding_model and not classifier.load_embedding_model(args.embedding_model):
+            return EXIT_FATAL
+
+        for root in args.roots:
+            root = os.path.abspath(root)
+            reporter.start_root(root)
+            if not os.path.isdir(root):
+                reporter.on_error("", f"Folder tidak ditemukan: {root}")
+                continue
+            if args.embeddings:
+                stats = classifier.extract_embeddings(root, args.embeddings)
+                if stats is not None:
+                    reporter.emit("embeddings", root=root, store=os.path.abspath(args.embeddings), **stats)
+                continue
+            if not args.watch:
+                classifier.process_folder(root, args.categories, resume=not args.no_resume)
+                continue
+
+            stop_event = threading.Event()
+            # Ctrl+C/SIGTERM menghentikan pemantauan dengan rapi: antrian penempatan
+            # dikosongkan dan journal ditutup sebagai run yang selesai
+            handlers = {}
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                handlers[signum] = signal.signal(signum, lambda *_: stop_event.set())
+            try:
+                classifier.watch_folder(root, args.categories, stop_event, args.debounce,
+                                        args.poll_interval, args.watch_backend,
+                                        resume=not args.no_resume)
+            finally:
+                for signum, handler in handlers.items():
+                    signal.signal(signum, handler)
+
+        if args.similar:
+            try:
+                results = classifier.find_similar(args.similar, args.embeddings, args.top_k)
+            except Exception as e:
+                reporter.on_error("", str(e))
+            else:
+                reporter.emit("similar", image=os.path.abspath(args.similar),
+                              results=[{"file": path, "score": score} for path, score in results])
+
+    except KeyboardInterrupt:
+        reporter.emit("interrupted")
+        return EXIT_INTERRUPTED
+    finally:
+        # Update LRU dan catatan stat yang belum ke-commit ikut ditulis
+        if classifier is not None:
+            classifier.close_cache()
+
+    if reporter.fatal:
+        return EXIT_FATAL
+    return EXIT_FILE_ERRORS if reporter.errors else EXIT_OK
+
+
+# Urutkan tanpa GUI: python lite_cli.py --model model.tflite folder1 folder2 --categories foods people
+# Pantau folder sinkronisasi: python lite_cli.py --model model.tflite --watch folder_sync
+# Embedding: python lite_cli.py --model model.keras --embeddings store folder, lalu
+#   python lite_cli.py --model model.keras --embeddings store --similar foto.jpg
+if __name__ == "__main__":
+    # Wajib buat decode backend 'process' di build PyInstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())
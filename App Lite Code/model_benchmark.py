@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+
+
+def peak_rss_mb():
+    """Peak RSS proses ini dalam MB, None kalau tidak bisa diukur"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux melaporkan KB, macOS byte
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def describe_model(model_path):
+    """
+    Tebak varian model dari isinya
+
+    Returns:
+        'keras', 'onnx', 'tflite-int8', 'tflite-fp16', atau 'tflite-fp32'
+    """
+    file_ext = os.path.splitext(model_path)[1].lower()
+    if file_ext in ('.keras', '.h5'):
+        return 'keras'
+    if file_ext == '.onnx':
+        return 'onnx'
+    if file_ext != '.tflite':
+        return file_ext.lstrip('.')
+
+    from tflite_runner import load_tflite_interpreter_class
+    interpreter = load_tflite_interpreter_class()(model_path=model_path)
+    input_dtype = interpreter.get_input_details()[0]['dtype']
+    if input_dtype in (np.int8, np.uint8):
+        return 'tflite-int8'
+    if any(tensor['dtype'] == np.float16 for tensor in interpreter.get_tensor_details()):
+        return 'tflite-fp16'
+    return 'tflite-fp32'
+
+
+def load_inputs(count, image_folder=None, target_size=(224, 224)):
+    """
+    Siapkan batch input float32 NHWC
+
+    Args:
+        count: Jumlah gambar
+        image_folder: Folder gambar asli, kalau None pakai input acak dengan seed tetap
+        target_size: Ukuran gambar (tinggi, lebar)
+    """
+    height, width = target_size
+    if not image_folder:
+        return np.random.default_rng(0).random((count, height, width, 3), dtype=np.float32)
+
+    from image_pipeline import BatchBuffer, load_image_uint8, IMAGE_EXTENSIONS
+    image_files = sorted(os.path.join(image_folder, f) for f in os.listdir(image_folder)
+                         if f.lower().endswith(IMAGE_EXTENSIONS))
+    if not image_files:
+        raise ValueError(f"Tidak ada gambar yang ditemukan di {image_folder}")
+
+    buffer = BatchBuffer(count, target_size)
+    for i in range(count):
+        buffer.add(load_image_uint8(image_files[i % len(image_files)], target_size))
+    return buffer.finalize()
+
+
+def percentile_ms(latencies, q):
+    return float(np.percentile(latencies, q) * 1000)
+
+
+def benchmark_model(model_path, batch_sizes=(1, 8, 32), iterations=50, image_folder=None,
+                    classifier_options=None):
+    """
+    Ukur satu model di proses ini
+
+    Cold load diukur dari import OptimizedClassifier sampai load_model selesai, jadi
+    paling akurat kalau dipanggil di proses baru (lihat run_benchmarks).
+
+    Args:
+        model_path: Path ke model (.keras, .h5, .tflite, .onnx)
+        batch_sizes: Ukuran batch untuk pengukuran throughput
+        iterations: Jumlah pengulangan per pengukuran (setelah pemanasan)
+        image_folder: Folder gambar untuk input, None berarti input sintetis
+        classifier_options: Argumen tambahan untuk OptimizedClassifier (thread, XNNPACK, ...)
+
+    Returns:
+        Dict hasil pengukuran
+    """
+    start = time.perf_counter()
+    from optimized_classifier import OptimizedClassifier
+    import_seconds = time.perf_counter() - start
+
+    classifier = OptimizedClassifier(**(classifier_options or {}))
+    classifier.logger.disabled = True
+    start = time.perf_counter()
+    if not classifier.load_model(model_path):
+        raise ValueError(f"Gagal memuat model: {model_path}")
+    load_seconds = time.perf_counter() - start
+
+    inputs = load_inputs(max(batch_sizes), image_folder)
+
+    # Latensi satu gambar: pemanasan dulu, lalu tiap panggilan diukur sendiri
+    single = inputs[:1]
+    classifier.predict_batch(single)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        classifier.predict_batch(single)
+        latencies.append(time.perf_counter() - start)
+
+    throughput = {}
+    for batch_size in batch_sizes:
+        img_batch = inputs[:batch_size]
+        try:
+            classifier.predict_batch(img_batch)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                classifier.predict_batch(img_batch)
+            elapsed = time.perf_counter() - start
+            throughput[str(batch_size)] = batch_size * iterations / elapsed if elapsed > 0 else 0.0
+        except Exception as e:
+            throughput[str(batch_size)] = None
+            throughput[f"{batch_size}_error"] = str(e)
+
+    return {
+        "model": os.path.abspath(model_path),
+        "variant": describe_model(model_path),
+        "size_mb": os.path.getsize(model_path) / (1024 * 1024) if os.path.isfile(model_path) else None,
+        "cold_load_seconds": import_seconds + load_seconds,
+        "import_seconds": import_seconds,
+        "load_model_seconds": load_seconds,
+        "latency_ms": {
+            "p50": percentile_ms(latencies, 50),
+            "p95": percentile_ms(latencies, 95),
+            "p99": percentile_ms(latencies, 99),
+            "mean": float(np.mean(latencies) * 1000),
+        },
+        "images_per_sec": throughput,
+        "peak_rss_mb": peak_rss_mb(),
+        "tensorflow_loaded": "tensorflow" in sys.modules,
+    }
+
+
+def run_benchmarks(model_paths, batch_sizes=(1, 8, 32), iterations=50, image_folder=None,
+                   classifier_options=None, isolate=True):
+    """
+    Ukur beberapa model dan kumpulkan hasilnya
+
+    Args:
+        model_paths: List path model
+        isolate: Jalankan tiap model di proses Python baru, supaya cold load dan
+            peak RSS tiap model tidak tercampur dengan model lain
+
+    Returns:
+        Dict {"environment", "settings", "results"} yang siap ditulis sebagai JSON
+    """
+    settings = {
+        "batch_sizes": list(batch_sizes),
+        "iterations": iterations,
+        "image_folder": os.path.abspath(image_folder) if image_folder else None,
+        "classifier_options": classifier_options or {},
+        "isolated": isolate,
+    }
+
+    results = []
+    for model_path in model_paths:
+        try:
+            if isolate:
+                results.append(_benchmark_in_subprocess(model_path, settings))
+            else:
+                results.append(benchmark_model(model_path, batch_sizes, iterations,
+                                               image_folder, classifier_options))
+        except Exception as e:
+            results.append({"model": os.path.abspath(model_path), "error": str(e)})
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": settings,
+        "results": results,
+    }
+
+
+def _benchmark_in_subprocess(model_path, settings):
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(settings), model_path],
+        cwd=app_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit code {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_summary(report):
+    """Cetak ringkasan hasil benchmark dalam bentuk tabel"""
+    batch_sizes = report["settings"]["batch_sizes"]
+    header = f"{'model':<30} {'varian':<12} {'load (s)':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8}"
+    header += "".join(f" {'b' + str(b) + ' img/s':>11}" for b in batch_sizes)
+    print(header)
+    for r in report["results"]:
+        name = os.path.basename(r["model"])[:30]
+        if "error" in r:
+            print(f"{name:<30} gagal: {r['error']}")
+            continue
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "n/a"
+        line = (f"{name:<30} {r['variant']:<12} {r['cold_load_seconds']:>9.2f} "
+                f"{r['latency_ms']['p50']:>8.2f} {r['latency_ms']['p95']:>8.2f} "
+                f"{r['latency_ms']['p99']:>8.2f} {rss:>8}")
+        for b in batch_sizes:
+            value = r["images_per_sec"].get(str(b))
+            line += f" {value:>11.1f}" if value is not None else f" {'gagal':>11}"
+        print(line)
+
+
+# Benchmark model: python model_benchmark.py model.keras model.tflite model.onnx [--images folder]
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        # Mode internal: satu model di proses baru, hasilnya dicetak sebagai JSON
+        worker_settings = json.loads(sys.argv[2])
+        print(json.dumps(benchmark_model(sys.argv[3], worker_settings["batch_sizes"],
+                                         worker_settings["iterations"],
+                                         worker_settings["image_folder"],
+                                         worker_settings["classifier_options"])))
+        sys.exit(0)
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark model Keras, TFLite, dan ONNX")
+    parser.add_argument("models", nargs="+", help="Path model (.keras, .h5, .tflite, .onnx)")
+    parser.add_argument("--images", default=None, help="Folder gambar untuk input (default: sintetis)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32],
+                        help="Ukuran batch untuk pengukuran throughput")
+    parser.add_argument("--iterations", type=int, default=50, help="Pengulangan per pengukuran")
+    parser.add_argument("--tflite-threads", type=int, default=None, help="num_threads interpreter TFLite")
+    parser.add_argument("--onnx-threads", type=int, default=None, help="intra_op_num_threads ONNX Runtime")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Jalankan semua model di proses ini (cold load dan RSS jadi tidak akurat)")
+    parser.add_argument("--output", default="benchmark_results.json", help="File JSON hasil benchmark")
+    args = parser.parse_args()
+
+    options = {}
+    if args.tflite_threads:
+        options["tflite_num_threads"] = args.tflite_threads
+    if args.onnx_threads:
+        options["onnx_intra_op_threads"] = args.onnx_threads
+
+    report = run_benchmarks(args.models, args.batch_sizes, args.iterations, args.images,
+                            options, isolate=not args.no_isolate)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(report)
+    print(f"\nHasil lengkap disimpan ke {args.output}")
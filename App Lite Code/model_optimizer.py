@@ -1,22 +1,137 @@
 import os
-import tensorflow as tf
+import time
+import random
+import hashlib
+import tempfile
+import functools
 import numpy as np
 import logging
-from tensorflow import keras
+
+# Preset export TFLite: fp32 (tanpa kuantisasi), dynamic_int8 (bobot int8, aktivasi float),
+# full_int8 (bobot dan aktivasi int8, butuh dataset representatif), fp16 (bobot float16)
+EXPORT_PRESETS = ('fp32', 'dynamic_int8', 'full_int8', 'fp16')
+
+def build_embedding_model(model):
+    """
+    Potong head klasifikasi model Keras sehingga output-nya embedding
+    
+    Embedding diambil dari input Dense terakhir (Activation/Softmax di ujung dilewati),
+    yaitu fitur hasil pooling ResNet50/Xception untuk model di repo ini. Dropout di
+    antaranya tidak aktif saat inferensi, jadi tidak berpengaruh.
+    
+    Args:
+        model: Model Keras klasifikasi
+        
+    Returns:
+        Model Keras dengan input yang sama dan output (N, dimensi embedding)
+    """
+    from tensorflow import keras
+    
+    head = len(model.layers) - 1
+    while head > 0 and isinstance(model.layers[head], (keras.layers.Activation, keras.layers.Softmax)):
+        head -= 1
+    if not isinstance(model.layers[head], keras.layers.Dense):
+        raise ValueError(f"Layer terakhir model bukan Dense ({model.layers[head].__class__.__name__}), "
+                         f"embedding tidak bisa ditentukan")
+    return keras.Model(model.inputs, model.layers[head].input, name=f"{model.name}_embedding")
 
 class ModelOptimizer:
     """Utility untuk mengonversi dan mengoptimalkan model deep learning"""
     
     def __init__(self):
         self.logger = logging.getLogger("ModelOptimizer")
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        # Handler cuma dipasang sekali, instance berikutnya (misalnya saat benchmark) pakai yang sama
+        if not self.logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
         self.logger.setLevel(logging.INFO)
     
+    def _input_signature(self, model, batch_size=None):
+        """
+        Signature input model dengan dimensi batch yang dipilih
+        
+        Args:
+            model: Model Keras
+            batch_size: Ukuran batch tetap, atau None untuk batch dinamis
+        """
+        import tensorflow as tf
+        
+        input_shape = [batch_size] + list(model.inputs[0].shape[1:])
+        # Model dengan preprocessing di dalam graph punya input uint8
+        return [tf.TensorSpec(input_shape, tf.as_dtype(model.inputs[0].dtype), name='input')]
+    
+    def _fuse_preprocessing(self, model, batch_size=None, raw_input_size=None):
+        """
+        Bungkus model dengan preprocessing di dalam graph
+        
+        Model hasilnya menerima gambar uint8 HWC 0-255 apa adanya. Cast ke float,
+        resize (jika raw_input_size berbeda dengan input model), dan rescale 1/255
+        dikerjakan di dalam graph, jadi runtime cukup menyalin buffer hasil decode.
+        
+        Args:
+            model: Model Keras dengan input float 0-1
+            batch_size: Ukuran batch tetap, None berarti dinamis
+            raw_input_size: Ukuran gambar (tinggi, lebar) yang diberikan runtime,
+                None berarti sama dengan ukuran input model
+        """
+        from tensorflow import keras
+        
+        model_size = tuple(model.inputs[0].shape[1:3])
+        raw_size = tuple(raw_input_size) if raw_input_size else model_size
+        
+        inputs = keras.Input(shape=raw_size + (3,), batch_size=batch_size, dtype='uint8', name='input')
+        x = keras.layers.Rescaling(1.0 / 255.0, name='rescale')(inputs)
+        if raw_size != model_size:
+            x = keras.layers.Resizing(model_size[0], model_size[1], name='resize')(x)
+        return keras.Model(inputs, model(x))
+    
+    def _uint8_dataset(self, representative_dataset, raw_input_size=None):
+        """Ubah sampel dataset representatif float 0-1 jadi uint8 untuk model fused"""
+        def uint8_samples():
+            import tensorflow as tf
+            
+            for (sample,) in representative_dataset():
+                if raw_input_size and tuple(sample.shape[1:3]) != tuple(raw_input_size):
+                    sample = tf.image.resize(sample, raw_input_size).numpy()
+                yield [np.clip(np.rint(sample * 255.0), 0, 255).astype(np.uint8)]
+        
+        return uint8_samples
+    
+    def _batched_dataset(self, representative_dataset, batch_size):
+        """
+        Gabungkan sampel dataset representatif (batch 1) jadi batch berukuran batch_size
+        
+        Batch terakhir yang kurang diisi dengan mengulang sampel di batch itu, jadi
+        sampel sisa tetap ikut kalibrasi dan dataset yang lebih kecil dari batch_size
+        tetap menghasilkan satu batch.
+        
+        Raises:
+            ValueError: Jika dataset representatif tidak menghasilkan sampel sama sekali
+        """
+        def batched():
+            samples = []
+            produced = False
+            for (sample,) in representative_dataset():
+                samples.append(sample)
+                if len(samples) == batch_size:
+                    yield [np.concatenate(samples)]
+                    produced = True
+                    samples = []
+            
+            if samples:
+                while len(samples) < batch_size:
+                    samples.extend(samples[:batch_size - len(samples)])
+                yield [np.concatenate(samples)]
+            elif not produced:
+                raise ValueError("Dataset representatif kosong, tidak ada sampel untuk kalibrasi full_int8")
+        
+        return batched
+    
     def convert_to_tflite(self, model_path, output_path=None, quantize=False, 
-                          representative_dataset=None, target_formats=None):
+                          representative_dataset=None, target_formats=None, batch_size=None,
+                          fuse_preprocessing=False, raw_input_size=None):
         """
         Mengonversi model Keras ke format TensorFlow Lite
         
@@ -26,10 +141,20 @@ class ModelOptimizer:
             quantize: Apakah model akan di-quantize (mengurangi ukuran, mungkin mempengaruhi akurasi)
             representative_dataset: Fungsi yang menyediakan data representatif untuk quantization
             target_formats: Daftar format target (misalnya, [tf.float16])
+            batch_size: Ukuran batch tetap untuk input model. None (default) berarti batch
+                dinamis, runtime bisa me-resize input ke ukuran batch berapa pun
+            fuse_preprocessing: Jika True, input model menjadi uint8 0-255 dan rescale
+                (serta resize) dikerjakan di dalam graph, lihat _fuse_preprocessing
+            raw_input_size: Ukuran gambar (tinggi, lebar) untuk model fused, None berarti
+                sama dengan input model
             
         Returns:
             Path ke model TFLite yang dikonversi
         """
+        # TensorFlow baru di-import saat konversi, agar aplikasi Lite tetap cepat dibuka
+        import tensorflow as tf
+        from tensorflow import keras
+        
         if output_path is None:
             base_path = os.path.splitext(model_path)[0]
             output_path = f"{base_path}.tflite"
@@ -37,6 +162,16 @@ class ModelOptimizer:
         self.logger.info(f"Memuat model dari {model_path}")
         model = keras.models.load_model(model_path)
         
+        # Input Keras dengan batch None menghasilkan input TFLite berbatch dinamis,
+        # untuk batch tetap model dibungkus ulang dengan Input berukuran batch tersebut
+        self.logger.info(f"Dimensi batch: {batch_size or 'dinamis'}")
+        if fuse_preprocessing:
+            self.logger.info("Preprocessing (uint8 -> float, resize, rescale) digabung ke dalam model")
+            model = self._fuse_preprocessing(model, batch_size, raw_input_size)
+        elif batch_size:
+            inputs = keras.Input(shape=tuple(model.inputs[0].shape[1:]), batch_size=batch_size, name='input')
+            model = keras.Model(inputs, model(inputs))
+        
         # Membuat TFLite converter
         converter = tf.lite.TFLiteConverter.from_keras_model(model)
         
@@ -48,9 +183,15 @@ class ModelOptimizer:
             # Jika dataset representatif disediakan, gunakan untuk quantization integer penuh
             if representative_dataset:
                 self.logger.info("Menggunakan dataset representatif untuk quantization")
+                if fuse_preprocessing:
+                    representative_dataset = self._uint8_dataset(representative_dataset, raw_input_size)
+                if batch_size and batch_size > 1:
+                    representative_dataset = self._batched_dataset(representative_dataset, batch_size)
                 converter.representative_dataset = representative_dataset
                 converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
-                converter.inference_input_type = tf.int8
+                # Input model fused sudah uint8 mentah, tidak perlu dikuantisasi lagi
+                if not fuse_preprocessing:
+                    converter.inference_input_type = tf.int8
                 converter.inference_output_type = tf.int8
         
         # Mengatur format target jika ditentukan
@@ -78,17 +219,222 @@ class ModelOptimizer:
         
         return output_path
 
-    def convert_to_onnx(self, model_path, output_path=None):
+    def export_preset(self, model_path, preset, output_path=None, representative_dataset=None,
+                      batch_size=None, fuse_preprocessing=False, raw_input_size=None,
+                      verify=False, verify_batch_sizes=(1, 8, 32)):
+        """
+        Export model Keras ke TFLite dengan preset kuantisasi bernama
+        
+        Args:
+            model_path: Path ke model Keras
+            preset: Salah satu EXPORT_PRESETS
+            output_path: Path output (default: <model>_<preset>.tflite)
+            representative_dataset: Fungsi dataset representatif, wajib untuk full_int8
+            batch_size: Ukuran batch tetap, None berarti dinamis
+            fuse_preprocessing: Input uint8 dengan preprocessing di dalam graph
+            raw_input_size: Ukuran gambar untuk model fused (tinggi, lebar)
+            verify: Jalankan verify_export setelah export
+            verify_batch_sizes: Ukuran batch yang diuji saat verify
+            
+        Returns:
+            Path ke model TFLite hasil export
+            
+        Raises:
+            ValueError: Jika verify=True dan model hasil export gagal dijalankan di salah
+                satu ukuran batch
+        """
+        if preset not in EXPORT_PRESETS:
+            raise ValueError(f"Preset tidak dikenal: {preset}. Pilihan: {', '.join(EXPORT_PRESETS)}")
+        if preset == 'full_int8' and representative_dataset is None:
+            raise ValueError("Preset full_int8 membutuhkan dataset representatif")
+        
+        if output_path is None:
+            base_path = os.path.splitext(model_path)[0]
+            output_path = f"{base_path}_{preset}.tflite"
+        
+        self.logger.info(f"Export preset {preset}")
+        convert = functools.partial(self.convert_to_tflite, batch_size=batch_size,
+                                    fuse_preprocessing=fuse_preprocessing,
+                                    raw_input_size=raw_input_size)
+        if preset == 'fp32':
+            exported_path = convert(model_path, output_path)
+        elif preset == 'dynamic_int8':
+            # Optimize.DEFAULT tanpa dataset representatif = kuantisasi dynamic range
+            exported_path = convert(model_path, output_path, quantize=True)
+        elif preset == 'full_int8':
+            exported_path = convert(model_path, output_path, quantize=True,
+                                    representative_dataset=representative_dataset)
+        else:
+            import tensorflow as tf
+            exported_path = convert(model_path, output_path, quantize=True, target_formats=[tf.float16])
+        
+        if verify:
+            self._check_export(model_path, exported_path, verify_batch_sizes)
+        return exported_path
+    
+    def _check_export(self, model_path, exported_path, batch_sizes):
+        """
+        Jalankan verify_export dan anggap export gagal jika ada ukuran batch yang error
+        
+        Raises:
+            ValueError: Berisi ukuran batch yang gagal beserta error-nya
+        """
+        results = self.verify_export(model_path, exported_path, batch_sizes=batch_sizes, num_runs=1)
+        failed = [result for result in results if result["error"]]
+        if failed:
+            details = "; ".join(f"batch {result['batch_size']}: {result['error']}" for result in failed)
+            raise ValueError(f"Verifikasi {os.path.basename(exported_path)} gagal ({details})")
+    
+    def measure_latency(self, model_path, num_runs=20):
+        """
+        Ukur latensi satu gambar secara cepat lewat OptimizedClassifier
+        
+        Returns:
+            Median latensi dalam milidetik
+        """
+        from optimized_classifier import OptimizedClassifier
+        
+        classifier = OptimizedClassifier()
+        if not classifier.load_model(model_path):
+            raise ValueError(f"Gagal memuat model: {model_path}")
+        
+        img_batch = np.random.default_rng(0).random((1, 224, 224, 3), dtype=np.float32)
+        classifier.predict_batch(img_batch)  # Pemanasan
+        latencies = []
+        for _ in range(num_runs):
+            start = time.perf_counter()
+            classifier.predict_batch(img_batch)
+            latencies.append(time.perf_counter() - start)
+        return float(np.median(latencies) * 1000)
+    
+    def export_all_presets(self, model_path, output_dir=None, representative_folder=None,
+                           batch_size=None, num_runs=20, on_result=None, verify=True):
+        """
+        Export semua preset sekaligus lalu ukur ukuran dan latensi masing-masing
+        
+        Args:
+            model_path: Path ke model Keras
+            output_dir: Folder output (default: folder model asli)
+            representative_folder: Folder gambar untuk full_int8. Kalau kosong, full_int8 dilewati
+            batch_size: Ukuran batch tetap, None berarti dinamis
+            num_runs: Jumlah pengukuran latensi per model
+            on_result: Callback (dict hasil) yang dipanggil setiap satu model selesai
+            verify: Jalankan verify_export untuk setiap preset, preset yang gagal
+                dicatat dengan error (bukan sebagai hasil yang berhasil)
+            
+        Returns:
+            List dict {"preset", "path", "size_mb", "latency_ms", "error"}. Baris pertama
+            adalah model Keras asli sebagai pembanding
+        """
+        output_dir = output_dir or os.path.dirname(os.path.abspath(model_path))
+        base_name = os.path.splitext(os.path.basename(model_path))[0]
+        representative_dataset = None
+        if representative_folder:
+            representative_dataset = self.generate_representative_dataset(representative_folder)
+        
+        results = []
+        
+        def record(preset, path, error=None):
+            result = {"preset": preset, "path": path, "size_mb": None, "latency_ms": None, "error": error}
+            if error is None:
+                try:
+                    result["size_mb"] = os.path.getsize(path) / (1024 * 1024)
+                    result["latency_ms"] = self.measure_latency(path, num_runs)
+                except Exception as e:
+                    result["error"] = str(e)
+            if result["error"]:
+                self.logger.error(f"Preset {preset}: {result['error']}")
+            else:
+                self.logger.info(f"Preset {preset}: {result['size_mb']:.2f} MB, {result['latency_ms']:.2f} ms/gambar")
+            results.append(result)
+            if on_result:
+                on_result(result)
+        
+        record('keras', model_path)
+        for preset in EXPORT_PRESETS:
+            output_path = os.path.join(output_dir, f"{base_name}_{preset}.tflite")
+            if preset == 'full_int8' and representative_dataset is None:
+                record(preset, None, "Butuh folder dataset representatif")
+                continue
+            try:
+                self.export_preset(model_path, preset, output_path, representative_dataset, batch_size)
+            except Exception as e:
+                record(preset, None, str(e))
+                continue
+            if verify:
+                try:
+                    self._check_export(model_path, output_path, (1, 8, 32))
+                except Exception as e:
+                    # File tetap ada untuk diperiksa, tapi tidak dilaporkan sebagai berhasil
+                    record(preset, output_path, str(e))
+                    continue
+            record(preset, output_path)
+        
+        return results
+    
+    def export_embedding_model(self, model_path, output_path=None, model_format='tflite', preset='fp32',
+                               representative_dataset=None, batch_size=None, fuse_preprocessing=False,
+                               raw_input_size=None):
+        """
+        Export model embedding (model tanpa head klasifikasi, lihat build_embedding_model)
+        
+        Model TFLite/ONNX hanya punya output softmax, jadi untuk ekstraksi embedding di
+        OptimizedClassifier model embedding di-export terpisah lewat jalur konversi yang sama.
+        
+        Args:
+            model_path: Path ke model Keras klasifikasi
+            output_path: Path output (default: <model>_embedding.tflite/.onnx)
+            model_format: 'tflite' atau 'onnx'
+            preset: Preset kuantisasi untuk TFLite (lihat EXPORT_PRESETS)
+            representative_dataset: Fungsi dataset representatif, wajib untuk full_int8
+            batch_size: Ukuran batch tetap, None berarti dinamis
+            fuse_preprocessing: Input uint8 dengan preprocessing di dalam graph
+            raw_input_size: Ukuran gambar untuk model fused (tinggi, lebar)
+            
+        Returns:
+            Path ke model embedding hasil export
+        """
+        from tensorflow import keras
+        
+        if model_format not in ('tflite', 'onnx'):
+            raise ValueError(f"Format tidak dikenal: {model_format}. Pilihan: tflite, onnx")
+        
+        if output_path is None:
+            base_path = os.path.splitext(model_path)[0]
+            output_path = f"{base_path}_embedding.{model_format}"
+        
+        self.logger.info(f"Memuat model dari {model_path}")
+        embedding_model = build_embedding_model(keras.models.load_model(model_path))
+        self.logger.info(f"Dimensi embedding: {embedding_model.outputs[0].shape[-1]}")
+        
+        # Jalur konversi membaca model dari file, model embedding disimpan sementara
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            embedding_path = os.path.join(tmp_dir, "embedding.keras")
+            embedding_model.save(embedding_path)
+            if model_format == 'onnx':
+                return self.convert_to_onnx(embedding_path, output_path, batch_size,
+                                            fuse_preprocessing, raw_input_size)
+            return self.export_preset(embedding_path, preset, output_path, representative_dataset,
+                                      batch_size, fuse_preprocessing, raw_input_size)
+    
+    def convert_to_onnx(self, model_path, output_path=None, batch_size=None,
+                        fuse_preprocessing=False, raw_input_size=None):
         """
         Mengonversi model Keras ke format ONNX
         
         Args:
             model_path: Path ke model Keras
             output_path: Path output untuk model ONNX
+            batch_size: Ukuran batch tetap untuk input model, None (default) berarti batch dinamis
+            fuse_preprocessing: Input uint8 dengan preprocessing di dalam graph
+            raw_input_size: Ukuran gambar untuk model fused (tinggi, lebar)
             
         Returns:
             Path ke model ONNX yang dikonversi
         """
+        import tensorflow as tf
+        from tensorflow import keras
+        
         try:
             import tf2onnx
             import onnx
@@ -102,16 +448,21 @@ class ModelOptimizer:
         
         self.logger.info(f"Memuat model dari {model_path}")
         model = keras.models.load_model(model_path)
+        if fuse_preprocessing:
+            self.logger.info("Preprocessing (uint8 -> float, resize, rescale) digabung ke dalam model")
+            model = self._fuse_preprocessing(model, raw_input_size=raw_input_size)
         
         # Mengonversi model
         self.logger.info("Mengonversi model ke format ONNX")
         
-        # Membuat fungsi konkret dari model
-        input_signature = [tf.TensorSpec([1, 224, 224, 3], tf.float32, name='input')]
-        concrete_func = tf.function(lambda x: model(x)).get_concrete_function(input_signature)
+        # Signature input dengan dimensi batch dinamis atau yang dipilih
+        self.logger.info(f"Dimensi batch: {batch_size or 'dinamis'}")
+        input_signature = self._input_signature(model, batch_size)
         
         # Mengonversi ke model ONNX
-        onnx_model, _ = tf2onnx.convert.from_concrete_function(concrete_func, output_path=output_path)
+        onnx_model, _ = tf2onnx.convert.from_function(tf.function(lambda x: model(x)),
+                                                      input_signature=input_signature,
+                                                      output_path=output_path)
         
         self.logger.info(f"Model ONNX disimpan ke {output_path}")
         
@@ -124,49 +475,331 @@ class ModelOptimizer:
         
         return output_path
     
-    def generate_representative_dataset(self, folder_path, num_samples=100):
+    def verify_export(self, model_path, exported_path, batch_sizes=(1, 8, 32), num_runs=5,
+                      sample_folder=None):
+        """
+        Bandingkan model hasil export dengan model Keras aslinya di beberapa ukuran batch
+        
+        Args:
+            model_path: Path ke model Keras asli
+            exported_path: Path ke model hasil export (.tflite atau .onnx)
+            batch_sizes: Ukuran batch yang diuji
+            num_runs: Jumlah pengulangan untuk mengukur throughput
+            sample_folder: Folder gambar untuk input uji (default: input acak dengan seed tetap)
+            
+        Returns:
+            List dict per ukuran batch: batch_size, max_abs_diff, top1_agreement,
+            keras_images_per_sec, exported_images_per_sec, dan error (jika gagal)
+        """
+        from tensorflow import keras
+        from optimized_classifier import OptimizedClassifier
+        from image_pipeline import load_image_uint8, normalize_image, IMAGE_EXTENSIONS
+        
+        self.logger.info(f"Verifikasi {exported_path} terhadap {model_path}")
+        model = keras.models.load_model(model_path)
+        classifier = OptimizedClassifier()
+        if not classifier.load_model(exported_path):
+            raise ValueError(f"Gagal memuat model hasil export: {exported_path}")
+        
+        # Siapkan input uji sebanyak batch terbesar
+        height, width = model.inputs[0].shape[1:3]
+        max_batch = max(batch_sizes)
+        if sample_folder:
+            image_files = sorted(os.path.join(sample_folder, f) for f in os.listdir(sample_folder)
+                                 if f.lower().endswith(IMAGE_EXTENSIONS))
+            if not image_files:
+                raise ValueError(f"Tidak ada gambar yang ditemukan di {sample_folder}")
+            images = [normalize_image(load_image_uint8(image_files[i % len(image_files)], (height, width)))
+                      for i in range(max_batch)]
+            inputs = np.stack(images).astype(np.float32)
+        else:
+            inputs = np.random.default_rng(0).random((max_batch, height, width, 3), dtype=np.float32)
+        
+        def throughput(predict_fn, img_batch):
+            predict_fn(img_batch)  # Pemanasan
+            start = time.perf_counter()
+            for _ in range(num_runs):
+                predict_fn(img_batch)
+            elapsed = time.perf_counter() - start
+            return len(img_batch) * num_runs / elapsed if elapsed > 0 else 0.0
+        
+        def keras_predict(img_batch):
+            return np.asarray(model.predict(img_batch, batch_size=len(img_batch), verbose=0))
+        
+        results = []
+        for batch_size in batch_sizes:
+            img_batch = inputs[:batch_size]
+            result = {"batch_size": batch_size, "max_abs_diff": None, "top1_agreement": None,
+                      "keras_images_per_sec": None, "exported_images_per_sec": None, "error": None}
+            try:
+                expected = keras_predict(img_batch)
+                actual = classifier.predict_batch(img_batch)
+                result["max_abs_diff"] = float(np.max(np.abs(expected - actual)))
+                result["top1_agreement"] = float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1)))
+                result["keras_images_per_sec"] = throughput(keras_predict, img_batch)
+                result["exported_images_per_sec"] = throughput(classifier.predict_batch, img_batch)
+                self.logger.info(f"Batch {batch_size}: max-abs-diff {result['max_abs_diff']:.6f}, "
+                                 f"top-1 sama {result['top1_agreement'] * 100:.1f}%, "
+                                 f"Keras {result['keras_images_per_sec']:.1f} gambar/detik, "
+                                 f"export {result['exported_images_per_sec']:.1f} gambar/detik")
+            except Exception as e:
+                result["error"] = str(e)
+                self.logger.error(f"Batch {batch_size}: gagal ({str(e)})")
+            results.append(result)
+        
+        return results
+    
+    def evaluate_models(self, model_path, converted_paths, labelled_folder, labels=None,
+                        batch_size=32, limit_per_class=None, num_workers=None):
+        """
+        Bandingkan akurasi dan kecepatan model asli dengan model hasil konversi
+        
+        Setiap batch gambar di-decode sekali lalu dijalankan ke semua model, jadi semua
+        model melihat input yang persis sama.
+        
+        Args:
+            model_path: Path ke model asli (fp32), jadi acuan agreement dan speedup
+            converted_paths: List path model hasil konversi (.tflite/.onnx/.keras)
+            labelled_folder: Folder dengan struktur <folder>/<label>/*.jpg
+            labels: Urutan label model (default: label OptimizedClassifier)
+            batch_size: Ukuran batch inferensi
+            limit_per_class: Maksimal gambar per kelas
+            num_workers: Jumlah thread decoder
+            
+        Returns:
+            Dict {"labels", "total", "models": [{"model", "accuracy", "per_class_accuracy",
+            "confusion_matrix", "top1_agreement", "seconds", "images_per_sec", "speedup"}]}.
+            Baris confusion matrix adalah label asli, kolomnya label prediksi
+        """
+        from optimized_classifier import OptimizedClassifier
+        from image_pipeline import PrefetchLoader, BatchBuffer, load_image_uint8, list_labelled_images
+        
+        model_paths = [model_path] + list(converted_paths)
+        classifiers = []
+        for path in model_paths:
+            classifier = OptimizedClassifier(preprocess_mode='pil')
+            if not classifier.load_model(path):
+                raise ValueError(f"Gagal memuat model: {path}")
+            classifiers.append(classifier)
+        
+        labels = list(labels or classifiers[0].labels)
+        samples = list_labelled_images(labelled_folder, labels, limit_per_class)
+        if not samples:
+            raise ValueError(f"Tidak ada gambar berlabel di {labelled_folder}")
+        self.logger.info(f"Evaluasi {len(model_paths)} model pada {len(samples)} gambar")
+        
+        num_classes = len(labels)
+        confusion = [np.zeros((num_classes, num_classes), dtype=np.int64) for _ in model_paths]
+        predictions = [[] for _ in model_paths]
+        seconds = [0.0] * len(model_paths)
+        true_labels = []
+        
+        def run_batch(img_batch, batch_labels):
+            for i, classifier in enumerate(classifiers):
+                start = time.perf_counter()
+                preds = np.argmax(classifier.predict_batch(img_batch), axis=1)
+                seconds[i] += time.perf_counter() - start
+                np.add.at(confusion[i], (batch_labels, preds), 1)
+                predictions[i].extend(int(p) for p in preds)
+            true_labels.extend(batch_labels)
+        
+        # Pemanasan agar alokasi tensor/graph tidak ikut terhitung
+        warmup = np.zeros((1, 224, 224, 3), dtype=np.float32)
+        for classifier in classifiers:
+            classifier.predict_batch(warmup)
+        
+        loader = PrefetchLoader(load_image_uint8, num_workers, batch_size * 2)
+        label_of = dict(samples)
+        buffer = BatchBuffer(batch_size)
+        batch_labels = []
+        for img_path, img_array, error in loader.iterate(path for path, _ in samples):
+            if error is not None:
+                self.logger.warning(f"Kesalahan memproses {img_path}: {str(error)}")
+                continue
+            buffer.add(img_array)
+            batch_labels.append(label_of[img_path])
+            if buffer.full():
+                run_batch(buffer.finalize(), batch_labels)
+                buffer.reset()
+                batch_labels = []
+        if batch_labels:
+            run_batch(buffer.finalize(), batch_labels)
+        
+        total = len(true_labels)
+        reference = np.asarray(predictions[0])
+        report = {"labels": labels, "total": total, "models": []}
+        for i, path in enumerate(model_paths):
+            matrix = confusion[i]
+            per_class_total = matrix.sum(axis=1)
+            report["models"].append({
+                "model": path,
+                "accuracy": float(np.trace(matrix) / total) if total else 0.0,
+                "per_class_accuracy": {
+                    label: float(matrix[j, j] / per_class_total[j]) if per_class_total[j] else None
+                    for j, label in enumerate(labels)
+                },
+                "confusion_matrix": matrix.tolist(),
+                "top1_agreement": float(np.mean(np.asarray(predictions[i]) == reference)) if total else 0.0,
+                "seconds": seconds[i],
+                "images_per_sec": total / seconds[i] if seconds[i] > 0 else 0.0,
+                "speedup": seconds[0] / seconds[i] if seconds[i] > 0 else 0.0,
+            })
+        
+        self.logger.info(self.format_evaluation(report))
+        return report
+    
+    def format_evaluation(self, report):
+        """Ubah hasil evaluate_models menjadi teks tabel yang mudah dibaca"""
+        labels = report["labels"]
+        lines = [f"Evaluasi pada {report['total']} gambar"]
+        lines.append(f"{'model':<32} {'akurasi':>8} {'agreement':>10} {'gambar/s':>10} {'speedup':>8}")
+        for result in report["models"]:
+            lines.append(f"{os.path.basename(result['model'])[:32]:<32} {result['accuracy'] * 100:>7.2f}% "
+                         f"{result['top1_agreement'] * 100:>9.2f}% {result['images_per_sec']:>10.1f} "
+                         f"{result['speedup']:>7.2f}x")
+        
+        for result in report["models"]:
+            lines.append("")
+            lines.append(f"{os.path.basename(result['model'])} - akurasi per kelas dan confusion matrix "
+                         f"(baris: label asli, kolom: prediksi)")
+            lines.append(f"{'':<12} {'akurasi':>8} " + " ".join(f"{label[:10]:>10}" for label in labels))
+            for label, row in zip(labels, result["confusion_matrix"]):
+                accuracy = result["per_class_accuracy"][label]
+                accuracy_text = f"{accuracy * 100:>7.2f}%" if accuracy is not None else f"{'-':>8}"
+                lines.append(f"{label[:12]:<12} {accuracy_text} " + " ".join(f"{count:>10}" for count in row))
+        return "\n".join(lines)
+    
+    def _stratified_sample(self, folder_path, num_samples, seed):
+        """
+        Ambil sampel gambar yang merata dari setiap subfolder (label)
+        
+        Gambar dikelompokkan per subfolder tingkat pertama, diacak dengan seed, lalu
+        diambil bergiliran dari tiap kelompok sampai num_samples terpenuhi.
+        """
+        from image_pipeline import IMAGE_EXTENSIONS
+        
+        groups = {}
+        for root, dirs, files in os.walk(folder_path):
+            dirs.sort()
+            relative = os.path.relpath(root, folder_path)
+            group = '' if relative == os.curdir else relative.split(os.sep)[0]
+            for file in sorted(files):
+                if file.lower().endswith(IMAGE_EXTENSIONS):
+                    groups.setdefault(group, []).append(os.path.join(root, file))
+        
+        self.logger.info(f"Sampel dari {len(groups)} folder: " +
+                         ", ".join(f"{group or '.'}={len(groups[group])}" for group in sorted(groups)))
+        
+        rng = random.Random(seed)
+        queues = []
+        for group in sorted(groups):
+            files = groups[group]
+            rng.shuffle(files)
+            queues.append(files)
+        
+        selected = []
+        while len(selected) < num_samples and any(queues):
+            for files in queues:
+                if files and len(selected) < num_samples:
+                    selected.append(files.pop())
+        return selected
+    
+    def _calibration_cache_key(self, image_files, target_size):
+        """Key cache dari daftar file (beserta ukuran dan mtime-nya) dan ukuran target"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(tuple(target_size)).encode('ascii'))
+        for img_path in image_files:
+            st = os.stat(img_path)
+            digest.update(f"{os.path.abspath(img_path)}|{st.st_size}|{st.st_mtime_ns}\n".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _build_calibration_cache(self, image_files, cache_path, target_size):
+        """
+        Decode gambar ke file .npy (uint8) lewat memmap, jadi memori tetap kecil
+        
+        Returns:
+            Jumlah gambar yang berhasil di-decode
+        """
+        from image_pipeline import PrefetchLoader, load_image_uint8
+        
+        height, width = target_size
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+        tensors = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8,
+                                            shape=(len(image_files), height, width, 3))
+        
+        # Decode di skala kecil (draft JPEG), sama seperti jalur 'draft' di classifier
+        decode = functools.partial(load_image_uint8, target_size=target_size, draft=True)
+        count = 0
+        for img_path, img_array, error in PrefetchLoader(decode).iterate(image_files):
+            if error is not None:
+                self.logger.warning(f"Kesalahan memproses {img_path}: {str(error)}")
+                continue
+            tensors[count] = img_array
+            count += 1
+        tensors.flush()
+        del tensors
+        
+        # Baris yang gagal di-decode dibuang dengan menulis ulang header shape-nya
+        if count < len(image_files):
+            source = np.load(tmp_path, mmap_mode='r')
+            trimmed = np.lib.format.open_memmap(f"{tmp_path}.trim.npy", mode='w+', dtype=np.uint8,
+                                                shape=(count, height, width, 3))
+            trimmed[:] = source[:count]
+            trimmed.flush()
+            del trimmed, source
+            os.replace(f"{tmp_path}.trim.npy", tmp_path)
+        
+        os.replace(tmp_path, cache_path)
+        return count
+    
+    def generate_representative_dataset(self, folder_path, num_samples=100, seed=0,
+                                        cache_dir=None, target_size=(224, 224)):
         """
         Membuat fungsi dataset representatif untuk quantization dari sampel gambar
         
+        Sampel diambil merata dari setiap subfolder (misalnya satu folder per label)
+        dengan seed tetap. Gambar di-decode sekali di skala kecil lalu disimpan sebagai
+        tensor uint8 di file .npy, sehingga quantization berikutnya dengan pengaturan
+        lain tidak perlu men-decode ulang. File dibaca lewat memmap, jadi memori tetap
+        kecil berapa pun jumlah sampelnya.
+        
         Args:
             folder_path: Path ke folder yang berisi sampel gambar
             num_samples: Jumlah sampel yang akan digunakan
+            seed: Seed untuk pengacakan sampel
+            cache_dir: Folder cache tensor kalibrasi (default: folder temp sistem)
+            target_size: Ukuran input model (tinggi, lebar)
             
         Returns:
             Fungsi dataset representatif untuk TFLite converter
         """
-        from tensorflow.keras.preprocessing.image import load_img, img_to_array
-        
         self.logger.info(f"Membuat dataset representatif dari {folder_path}")
         
-        # Mendapatkan file gambar
-        image_files = []
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    image_files.append(os.path.join(root, file))
-        
+        image_files = self._stratified_sample(folder_path, num_samples, seed)
         if len(image_files) == 0:
             self.logger.error(f"Tidak ada gambar yang ditemukan di {folder_path}")
             return None
         
-        # Membatasi jumlah sampel yang ditentukan
-        if len(image_files) > num_samples:
-            image_files = image_files[:num_samples]
-        
         self.logger.info(f"Menggunakan {len(image_files)} gambar untuk dataset representatif")
         
+        if cache_dir is None:
+            cache_dir = os.path.join(tempfile.gettempdir(), "gallery_cleaner_calibration")
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir,
+                                  f"calib_{self._calibration_cache_key(image_files, target_size)}.npy")
+        
+        if os.path.exists(cache_path):
+            self.logger.info(f"Memakai tensor kalibrasi dari cache {cache_path}")
+        else:
+            count = self._build_calibration_cache(image_files, cache_path, target_size)
+            self.logger.info(f"{count} tensor kalibrasi disimpan ke {cache_path}")
+        
         def representative_dataset():
-            for img_path in image_files:
-                try:
-                    img = load_img(img_path)
-                    img_array = img_to_array(img)
-                    img_resized = tf.image.resize(img_array, (224, 224))
-                    img_normalized = img_resized / 255.0
-                    img_batch = np.expand_dims(img_normalized, axis=0).astype(np.float32)
-                    yield [img_batch]
-                except Exception as e:
-                    self.logger.warning(f"Kesalahan memproses {img_path}: {str(e)}")
+            tensors = np.load(cache_path, mmap_mode='r')
+            for img_array in tensors:
+                img_batch = img_array[np.newaxis].astype(np.float32)
+                img_batch *= np.float32(1.0 / 255.0)
+                yield [img_batch]
         
         return representative_dataset
 
@@ -186,3 +819,16 @@ if __name__ == "__main__":
     
     # Konversi ONNX (memerlukan paket tf2onnx dan onnx)
     # optimizer.convert_to_onnx(model_path)
+    
+    # Evaluasi akurasi vs kecepatan di folder berlabel <folder>/<label>/*.jpg
+    # optimizer.evaluate_models(model_path, ["resnet50_pretrained_not-frozen.tflite"], "labelled_images")
+    
+    # Export semua preset (fp32, dynamic_int8, full_int8, fp16) sekaligus dengan ukuran dan latensinya
+    # optimizer.export_all_presets(model_path, representative_folder="sample_images")
+    
+    # Export dengan preprocessing di dalam model: runtime cukup memberi buffer uint8 hasil decode
+    # optimizer.export_preset(model_path, "fp32", fuse_preprocessing=True)
+    # optimizer.convert_to_onnx(model_path, fuse_preprocessing=True, raw_input_size=(256, 256))
+    
+    # Verifikasi hasil export di batch 1/8/32 terhadap model Keras
+    # optimizer.verify_export(model_path, "resnet50_pretrained_not-frozen.tflite")
@@ -0,0 +1,228 @@
+import os
+import numpy as np
+
+
+# Nama level optimasi graph -> nama atribut di onnxruntime.GraphOptimizationLevel
+GRAPH_OPTIMIZATION_LEVELS = {
+    'disable': 'ORT_DISABLE_ALL',
+    'basic': 'ORT_ENABLE_BASIC',
+    'extended': 'ORT_ENABLE_EXTENDED',
+    'all': 'ORT_ENABLE_ALL',
+}
+
+EXECUTION_MODES = {
+    'sequential': 'ORT_SEQUENTIAL',
+    'parallel': 'ORT_PARALLEL',
+}
+
+
+def create_session_options(ort, graph_optimization='all', intra_op_threads=None,
+                           inter_op_threads=None, execution_mode='sequential'):
+    """
+    Bikin SessionOptions ONNX Runtime dari pilihan yang bisa dibaca manusia
+
+    Args:
+        ort: Modul onnxruntime
+        graph_optimization: 'disable', 'basic', 'extended', atau 'all'
+        intra_op_threads: Thread di dalam satu operator (None = default runtime)
+        inter_op_threads: Thread antar operator, hanya berpengaruh di mode 'parallel'
+        execution_mode: 'sequential' atau 'parallel'
+    """
+    if graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"Level optimasi graph tidak dikenal: {graph_optimization}. "
+                         f"Pilihan: {', '.join(GRAPH_OPTIMIZATION_LEVELS)}")
+    if execution_mode not in EXECUTION_MODES:
+        raise ValueError(f"Mode eksekusi tidak dikenal: {execution_mode}. "
+                         f"Pilihan: {', '.join(EXECUTION_MODES)}")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = getattr(ort.GraphOptimizationLevel,
+                                               GRAPH_OPTIMIZATION_LEVELS[graph_optimization])
+    options.execution_mode = getattr(ort.ExecutionMode, EXECUTION_MODES[execution_mode])
+    if intra_op_threads:
+        options.intra_op_num_threads = int(intra_op_threads)
+    if inter_op_threads:
+        options.inter_op_num_threads = int(inter_op_threads)
+    return options
+
+
+def optimized_model_path(model_path, cache_dir, graph_optimization):
+    """
+    Path model hasil optimasi di cache_dir
+
+    Ukuran dan mtime model asli ikut di nama file, jadi model yang berubah otomatis
+    dapat file cache baru
+    """
+    st = os.stat(model_path)
+    base = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(cache_dir, f"{base}.{st.st_size}.{st.st_mtime_ns}.{graph_optimization}.onnx")
+
+
+def create_onnx_session(model_path, graph_optimization='all', intra_op_threads=None,
+                        inter_op_threads=None, execution_mode='sequential', cache_dir=None,
+                        providers=None):
+    """
+    Bikin InferenceSession ONNX Runtime yang sudah di-tuning
+
+    Kalo cache_dir diisi, graph hasil optimasi disimpan ke disk saat load pertama.
+    Load berikutnya langsung membuka file itu dengan optimasi dimatikan, jadi waktu
+    optimasi graph gak kebayar lagi tiap aplikasi dibuka.
+
+    Returns:
+        Tuple (session, path cache yang dipakai atau None)
+    """
+    import onnxruntime as ort
+
+    session_kwargs = {}
+    if providers:
+        session_kwargs["providers"] = list(providers)
+
+    if not cache_dir or graph_optimization == 'disable':
+        options = create_session_options(ort, graph_optimization, intra_op_threads,
+                                         inter_op_threads, execution_mode)
+        return ort.InferenceSession(model_path, sess_options=options, **session_kwargs), None
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cached_path = optimized_model_path(model_path, cache_dir, graph_optimization)
+
+    if os.path.exists(cached_path):
+        # Graph-nya udah dioptimasi, gak perlu dioptimasi ulang
+        options = create_session_options(ort, 'disable', intra_op_threads,
+                                         inter_op_threads, execution_mode)
+        try:
+            return ort.InferenceSession(cached_path, sess_options=options, **session_kwargs), cached_path
+        except Exception:
+            # File cache rusak (misalnya proses mati pas nulis), bikin ulang
+            os.remove(cached_path)
+
+    options = create_session_options(ort, graph_optimization, intra_op_threads,
+                                     inter_op_threads, execution_mode)
+    options.optimized_model_filepath = cached_path
+    return ort.InferenceSession(model_path, sess_options=options, **session_kwargs), cached_path
+
+
+# Tipe tensor ONNX Runtime -> dtype numpy untuk input/output yang dibind ke buffer sendiri
+_ORT_DTYPES = {
+    'tensor(float)': np.float32,
+    'tensor(float16)': np.float16,
+    'tensor(double)': np.float64,
+    'tensor(uint8)': np.uint8,
+}
+
+
+class ONNXRunner:
+    """
+    Pembungkus InferenceSession yang metadata input/output-nya disiapkan sekali.
+
+    Nama input/output dan shape-nya dibaca sekali di konstruktor. Tiap batch dijalankan
+    lewat IO binding: input dibind langsung dari buffer batch (tanpa copy kalo udah
+    float32 contiguous) dan output ditulis ONNX Runtime ke buffer numpy yang dialokasi
+    sekali dan dipakai ulang.
+    """
+
+    def __init__(self, session):
+        """
+        Inisialisasi ONNXRunner
+
+        Args:
+            session: onnxruntime.InferenceSession
+        """
+        self.session = session
+        model_input = session.get_inputs()[0]
+        model_output = session.get_outputs()[0]
+        self.input_name = model_input.name
+        self.output_name = model_output.name
+        # Model dengan preprocessing di dalam graph menerima uint8 0-255 langsung
+        self.uint8_input = model_input.type == 'tensor(uint8)'
+        self.input_dtype = np.dtype(_ORT_DTYPES.get(model_input.type, np.float32))
+        # Output fp16/fp64 dibind sesuai tipenya lalu dikonversi ke float32, tipe lain
+        # (None) dialokasi ONNX Runtime sendiri
+        output_dtype = _ORT_DTYPES.get(model_output.type)
+        self.output_dtype = np.dtype(output_dtype) if output_dtype is not None else None
+
+        # Dimensi dinamis berupa string/None, dimensi tetap berupa int
+        input_shape = model_input.shape
+        self.input_size = tuple(dim if isinstance(dim, int) else 224 for dim in input_shape[1:3])
+        self.fixed_batch = input_shape[0] if isinstance(input_shape[0], int) else None
+        output_dim = model_output.shape[-1]
+        self.num_classes = output_dim if isinstance(output_dim, int) else None
+
+        self._binding = session.io_binding()
+        self._input = None
+        self._output = None
+
+    def _buffer(self, current, batch_size, shape, dtype=np.float32):
+        """Pakai ulang buffer kalo masih cukup, kalo gak alokasi yang lebih besar"""
+        if current is None or current.shape[0] < batch_size:
+            current = np.empty((batch_size,) + shape, dtype=dtype)
+        return current
+
+    def _invoke(self, img_batch):
+        batch_size = len(img_batch)
+
+        if img_batch.dtype == self.input_dtype and img_batch.flags.c_contiguous:
+            input_array = img_batch
+        else:
+            self._input = self._buffer(self._input, batch_size, img_batch.shape[1:], self.input_dtype)
+            input_array = self._input[:batch_size]
+            if self.uint8_input:
+                # Batch float 0-1 untuk model dengan input uint8 0-255
+                np.copyto(input_array, np.clip(np.rint(img_batch * np.float32(255.0)), 0, 255),
+                          casting='unsafe')
+            elif img_batch.dtype == np.uint8:
+                np.multiply(img_batch, np.float32(1.0 / 255.0), out=input_array)
+            else:
+                np.copyto(input_array, img_batch, casting='unsafe')
+
+        binding = self._binding
+        binding.clear_binding_inputs()
+        binding.clear_binding_outputs()
+        binding.bind_cpu_input(self.input_name, input_array)
+
+        if self.num_classes is None or self.output_dtype is None:
+            # Jumlah kelas atau tipe output gak diketahui dari metadata, biar ONNX Runtime
+            # yang alokasi
+            binding.bind_output(self.output_name, 'cpu')
+            self.session.run_with_iobinding(binding)
+            return binding.copy_outputs_to_cpu()[0].astype(np.float32, copy=False)
+
+        self._output = self._buffer(self._output, batch_size, (self.num_classes,), self.output_dtype)
+        output_array = self._output[:batch_size]
+        binding.bind_output(self.output_name, 'cpu', 0, self.output_dtype, list(output_array.shape),
+                            output_array.ctypes.data)
+        self.session.run_with_iobinding(binding)
+        # Buffer output dipakai ulang di batch berikutnya, astype sekalian bikin salinannya
+        return output_array.astype(np.float32)
+
+    def run(self, img_batch):
+        """
+        Jalankan inferensi untuk satu batch
+
+        Args:
+            img_batch: Array float (N, tinggi, lebar, 3) dengan nilai 0-1, atau
+                uint8 0-255 (tanpa konversi untuk model dengan uint8_input)
+
+        Returns:
+            Array probabilitas float32 (N, jumlah kelas)
+        """
+        img_batch = np.asarray(img_batch)
+        if self.fixed_batch is None or self.fixed_batch == len(img_batch):
+            return self._invoke(img_batch)
+
+        # Model dengan batch tetap: jalankan per potongan, potongan terakhir yang kurang
+        # di-pad nol sampai sebesar batch model lalu output-nya dipotong lagi
+        outputs = []
+        for start in range(0, len(img_batch), self.fixed_batch):
+            chunk = img_batch[start:start + self.fixed_batch]
+            real_size = len(chunk)
+            if real_size < self.fixed_batch:
+                padded = np.zeros((self.fixed_batch,) + chunk.shape[1:], dtype=chunk.dtype)
+                padded[:real_size] = chunk
+                chunk = padded
+            outputs.append(self._invoke(chunk)[:real_size])
+        return np.concatenate(outputs)
+
+    def close(self):
+        """Lepas buffer, ada agar seragam dengan TFLiteRunner"""
+        self._input = None
+        self._output = None
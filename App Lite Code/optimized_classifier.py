@@ -1,9 +1,18 @@
 import os
+import threading
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
-import shutil
 import logging
+from image_pipeline import (create_loader, load_image_uint8, normalize_image, BatchBuffer,
+                            list_labelled_images, compare_preprocess_modes)
+from folder_scanner import FolderScanner
+from folder_watcher import FolderWatcher, WatchedFile
+from file_placer import PlacementQueue, resolve_placement_mode
+from prediction_cache import PredictionCache, hash_file, model_fingerprint, stat_key
+from run_journal import RunJournal, latest_undoable_journal, undo_run
+from embedding_index import EmbeddingStore, NearestNeighborIndex, IVF_MIN_VECTORS
+from tflite_runner import create_tflite_runner
+from onnx_runner import ONNXRunner, create_onnx_session
+
 
 class OptimizedClassifier:
     """
@@ -12,7 +21,15 @@ class OptimizedClassifier:
     """
     
     def __init__(self, on_progress_update=None, on_status_update=None, 
-                 on_image_classified=None, on_error=None, on_complete=None):
+                 on_image_classified=None, on_error=None, on_complete=None,
+                 batch_size=32, num_workers=None, queue_size=64, decode_backend='thread',
+                 preprocess_mode='auto', cache_path=None, cache_max_entries=200000,
+                 recursive=False, extensions=None,
+                 placement_workers=4, placement_queue_size=256, placement_mode='move',
+                 tflite_num_threads=None, tflite_use_xnnpack=True, tflite_num_interpreters=1,
+                 onnx_graph_optimization='all', onnx_intra_op_threads=None,
+                 onnx_inter_op_threads=None, onnx_execution_mode='sequential', onnx_cache_dir=None,
+                 use_journal=True):
         """
         Inisialisasi OptimizedClassifier
         
@@ -22,17 +39,87 @@ class OptimizedClassifier:
             on_image_classified: Callback ketika gambar diklasifikasikan (filename, class, confidence)
             on_error: Callback ketika terjadi error (filename, error_message)
             on_complete: Callback ketika klasifikasi selesai (category_counts, processed, total)
+            batch_size: Jumlah gambar yang dikumpulkan menjadi satu batch per inferensi
+            num_workers: Jumlah thread decoder gambar (default: jumlah CPU, maksimal 8)
+            queue_size: Maksimal gambar yang sudah/sedang di-decode menunggu diambil model
+            decode_backend: 'thread' atau 'process'. Backend 'process' men-decode dengan PIL di
+                proses terpisah (lewat shared memory) agar tidak terbatas GIL, sehingga hanya
+                bisa dipakai dengan preprocess_mode 'auto', 'pil', atau 'draft'
+            preprocess_mode: 'auto' (default), 'keras' (jalur lama), 'pil', atau 'draft' (decode
+                JPEG langsung di skala kecil, jauh lebih cepat untuk foto resolusi tinggi).
+                'auto' memakai 'keras' untuk model Keras dan 'pil' untuk TFLite/ONNX, sehingga
+                preprocessing model teroptimasi murni NumPy/PIL tanpa op TensorFlow. Dengan
+                decode_backend 'process', 'auto' selalu memakai 'pil'
+            cache_path: Path file SQLite untuk cache prediksi antar run (None = tanpa cache)
+            cache_max_entries: Maksimal entri cache sebelum entri lama dibuang
+            recursive: Ikut memproses gambar di subfolder (folder kategori hasil sortir dilewati).
+                Default False, sama seperti sebelumnya: hanya level paling atas
+            extensions: Ekstensi gambar yang diproses (default: .png/.jpg/.jpeg, lihat
+                folder_scanner.EXTENDED_IMAGE_EXTENSIONS untuk HEIC/WEBP/BMP)
+            placement_mode: Cara menaruh gambar ke folder kategori: 'move' (default), 'copy',
+                'hardlink', 'reflink', 'symlink', atau 'auto'. 'auto' memilih cara termurah di
+                filesystem tersebut (reflink > hardlink > copy) tanpa memindahkan file asli
+            placement_workers: Jumlah worker yang menaruh file secara paralel di luar thread inferensi
+            placement_queue_size: Maksimal file yang menunggu ditaruh sebelum inferensi ikut menunggu
+            tflite_num_threads: Jumlah thread intra-op per interpreter TFLite (None = default runtime)
+            tflite_use_xnnpack: Pakai delegate XNNPACK untuk model TFLite
+            tflite_num_interpreters: Jumlah interpreter TFLite independen. Lebih dari 1 berarti
+                satu batch dibagi ke beberapa interpreter yang berjalan paralel (lihat
+                tflite_runner.benchmark_settings untuk memilih kombinasi tercepat)
+            onnx_graph_optimization: Level optimasi graph ONNX Runtime: 'disable', 'basic',
+                'extended', atau 'all'
+            onnx_intra_op_threads: Jumlah thread di dalam satu operator ONNX (None = default)
+            onnx_inter_op_threads: Jumlah thread antar operator, dipakai di mode 'parallel'
+            onnx_execution_mode: 'sequential' atau 'parallel'
+            onnx_cache_dir: Folder untuk menyimpan graph ONNX hasil optimasi, agar load berikutnya
+                tidak perlu mengoptimasi ulang (None = tanpa cache). Dengan level 'all' graph-nya
+                bisa berisi optimasi khusus hardware, jadi cache ini hanya untuk mesin yang sama
+            use_journal: Catat setiap keputusan dan penempatan ke journal di
+                <folder>/.gallery_runs, agar run yang terhenti bisa dilanjutkan tanpa
+                memindahkan file dua kali
         """
         self.model = None
         self.model_type = None  # 'keras', 'tflite', 'onnx'
+        self.model_path = None
+        # Model embedding (lihat load_embedding_model) dan store/index yang terakhir dibuka
+        self.embedding_model = None
+        self.embedding_model_type = None
+        self._embedding_fp = None
+        self._embedding_store = None
+        self._embedding_index = None
         self.labels = ["foods", "landscape", "people", "receipts", "screenshots"]
+        self.batch_size = max(1, int(batch_size))
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.decode_backend = decode_backend
+        self.preprocess_mode = preprocess_mode
+        self.cache_path = cache_path
+        self.cache_max_entries = cache_max_entries
+        self.cache = None
+        self.recursive = recursive
+        self.extensions = extensions
+        self.placement_mode = placement_mode
+        self.placement_workers = placement_workers
+        self.placement_queue_size = placement_queue_size
+        self.tflite_num_threads = tflite_num_threads
+        self.tflite_use_xnnpack = tflite_use_xnnpack
+        self.tflite_num_interpreters = tflite_num_interpreters
+        self.onnx_graph_optimization = onnx_graph_optimization
+        self.onnx_intra_op_threads = onnx_intra_op_threads
+        self.onnx_inter_op_threads = onnx_inter_op_threads
+        self.onnx_execution_mode = onnx_execution_mode
+        self.onnx_cache_dir = onnx_cache_dir
+        self.use_journal = use_journal
+        self._watch_stop = None
         
         # Konfigurasi logging
         self.logger = logging.getLogger("OptimizedClassifier")
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        # Handler cuma dipasang sekali, instance berikutnya (misalnya saat benchmark) pakai yang sama
+        if not self.logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
         self.logger.setLevel(logging.INFO)
         
         # Simpan callbacks
@@ -54,21 +141,35 @@ class OptimizedClassifier:
         """
         file_ext = os.path.splitext(model_path)[1].lower()
         
+        # Thread pool interpreter TFLite dan buffer ONNX sebelumnya tidak dipakai lagi
+        if self.model_type in ('tflite', 'onnx'):
+            self.model.close()
+            self.model = None
+            self.model_type = None
+        
+        # Model embedding turunan model sebelumnya juga tidak berlaku lagi
+        self._close_embedding_model()
+        self.model_path = model_path
+        
+        # Tutup cache model sebelumnya, cache dipisah per fingerprint model
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        
         try:
             if file_ext in ['.keras', '.h5']:
                 self.logger.info(f"Loading model Keras dari {model_path}")
                 import tensorflow as tf
                 self.model = tf.keras.models.load_model(model_path)
                 self.model_type = 'keras'
+                self._open_cache(model_path)
                 return True
                 
             elif file_ext == '.tflite':
                 self.logger.info(f"Loading model TFLite dari {model_path}")
-                # Load model TFLite
-                interpreter = tf.lite.Interpreter(model_path=model_path)
-                interpreter.allocate_tensors()
-                self.model = interpreter
+                self.model = self._create_runner(model_path, file_ext)
                 self.model_type = 'tflite'
+                self._open_cache(model_path)
                 return True
                 
             elif file_ext == '.onnx':
@@ -81,9 +182,9 @@ class OptimizedClassifier:
                         self.on_error("", "ONNX Runtime belum diinstal. Silakan instal paket onnxruntime.")
                     return False
                 
-                # Buat sesi ONNX Runtime
-                self.model = ort.InferenceSession(model_path)
+                self.model = self._create_runner(model_path, file_ext)
                 self.model_type = 'onnx'
+                self._open_cache(model_path)
                 return True
                 
             else:
@@ -98,6 +199,54 @@ class OptimizedClassifier:
                 self.on_error("", f"Error loading model: {str(e)}")
             return False
     
+    def _create_runner(self, model_path, file_ext):
+        """Buat runner TFLite/ONNX untuk model di model_path"""
+        if file_ext == '.tflite':
+            # Load model TFLite, TensorFlow penuh hanya dipakai jika tflite_runtime tidak ada.
+            # Metadata tensor dan parameter kuantisasi disiapkan sekali di sini
+            return create_tflite_runner(model_path, self.tflite_num_threads,
+                                        self.tflite_use_xnnpack, self.tflite_num_interpreters)
+        
+        # Buat sesi ONNX Runtime dengan SessionOptions dan cache graph teroptimasi
+        session, cached_path = create_onnx_session(
+            model_path, self.onnx_graph_optimization, self.onnx_intra_op_threads,
+            self.onnx_inter_op_threads, self.onnx_execution_mode, self.onnx_cache_dir
+        )
+        if cached_path:
+            self.logger.info(f"Graph ONNX teroptimasi di-cache di {cached_path}")
+        return ONNXRunner(session)
+    
+    def _open_cache(self, model_path):
+        """Buka cache prediksi untuk model yang baru di-load (kalau cache_path diset)"""
+        if self.cache_path:
+            self.cache = PredictionCache(self.cache_path, model_fingerprint(model_path),
+                                         self.cache_max_entries)
+    
+    def close_cache(self):
+        """Tutup cache prediksi, dipanggil saat GUI/CLI selesai"""
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+    
+    def _flush_cache(self):
+        """Commit sisa tulisan cache di akhir run, termasuk last_used dari cache hit"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.flush()
+        except Exception as e:
+            self.logger.error(f"Gagal menyimpan cache: {str(e)}")
+    
+    def invalidate_cache(self, all_models=False):
+        """
+        Bersihkan cache prediksi
+        
+        Args:
+            all_models: Jika True semua entri dihapus, jika False hanya entri dari model lain
+        """
+        if self.cache is not None:
+            self.cache.invalidate(all_models)
+    
     def predict_image(self, img_array):
         """
         Buat prediksi menggunakan model yang sudah di-load
@@ -108,82 +257,48 @@ class OptimizedClassifier:
         Returns:
             Tuple dari (predicted_class_index, confidence)
         """
+        probs = self.predict_batch(np.expand_dims(img_array, axis=0))[0]
+        class_idx = np.argmax(probs)
+        return class_idx, probs[class_idx]
+    
+    def predict_batch(self, img_batch):
+        """
+        Buat prediksi untuk satu batch gambar
+        
+        Args:
+            img_batch: Array (N, 224, 224, 3) yang sudah dinormalisasi, atau uint8 0-255
+                (model TFLite/ONNX mengonversi sendiri sesuai tipe inputnya)
+            
+        Returns:
+            Array probabilitas dengan shape (N, jumlah kelas)
+        """
         if self.model is None:
             raise ValueError("Model belum di-load. Silakan load model terlebih dahulu.")
         
         if self.model_type == 'keras':
             # Prediksi Keras standar
-            prediction = self.model.predict(np.expand_dims(img_array, axis=0), verbose=0)
-            class_idx = np.argmax(prediction)
-            confidence = np.max(prediction)
+            return np.asarray(self.model.predict(img_batch, batch_size=len(img_batch), verbose=0))
             
         elif self.model_type == 'tflite':
-            # Prediksi TFLite
-            interpreter = self.model
-            input_details = interpreter.get_input_details()
-            output_details = interpreter.get_output_details()
-            
-            # Cek apakah model dikuantisasi
-            is_quantized = input_details[0]['dtype'] == np.uint8 atau input_details[0]['dtype'] == np.int8
-            
-            if is_quantized:
-                # Handle model yang dikuantisasi
-                input_scale, input_zero_point = input_details[0]['quantization']
-                if input_scale != 0:  # Pastikan tidak ada pembagian dengan nol
-                    img_array = img_array / input_scale + input_zero_point
-                img_array = img_array.astype(input_details[0]['dtype'])
-            
-            # Resize jika diperlukan
-            input_shape = input_details[0]['shape'][1:3]  # Tinggi, lebar
-            if input_shape != (224, 224):
-                img_array = tf.image.resize(img_array, input_shape).numpy()
-            
-            # Buat dimensi batch
-            img_batch = np.expand_dims(img_array, axis=0)
-            
-            # Set input tensor
-            interpreter.set_tensor(input_details[0]['index'], img_batch)
-            
-            # Jalankan inferensi
-            interpreter.invoke()
-            
-            # Dapatkan output
-            output_data = interpreter.get_tensor(output_details[0]['index'])
-            
-            # Dapatkan prediksi
-            class_idx = np.argmax(output_data)
-            confidence = output_data[0][class_idx]
+            # Satu invoke per batch, input di-resize ke ukuran batch oleh runner
+            return self.model.run(img_batch)
             
         elif self.model_type == 'onnx':
-            # Prediksi ONNX
-            import onnxruntime as ort
-            
-            # Dapatkan input model
-            input_name = self.model.get_inputs()[0].name
-            
-            # Siapkan input
-            img_batch = np.expand_dims(img_array, axis=0).astype(np.float32)
-            
-            # Jalankan inferensi
-            output = self.model.run(None, {input_name: img_batch})
-            
-            # Dapatkan prediksi
-            predictions = output[0]
-            class_idx = np.argmax(predictions)
-            confidence = predictions[0][class_idx]
+            # Satu run per batch lewat IO binding
+            return self.model.run(img_batch)
             
         else:
             raise ValueError(f"Tipe model tidak didukung: {self.model_type}")
-        
-        return class_idx, confidence
     
-    def process_folder(self, folder_path, selected_categories=None):
+    def process_folder(self, folder_path, selected_categories=None, resume=True):
         """
         Proses semua gambar di folder, klasifikasikan, dan urutkan ke dalam kategori
         
         Args:
             folder_path: Path ke folder yang berisi gambar
             selected_categories: List kategori yang akan diproses (jika None, semua kategori diproses)
+            resume: Jika run sebelumnya di folder ini terhenti, lanjutkan dari journal-nya.
+                File yang sudah selesai dilewati dan penempatan yang terpotong dibereskan dulu
         """
         if self.model is None:
             if self.on_error:
@@ -191,21 +306,36 @@ class OptimizedClassifier:
             return
         
         # Jika tidak ada kategori yang dipilih, gunakan semua kategori yang tersedia
-        if selected_categories is None atau len(selected_categories) == 0:
+        if selected_categories is None or len(selected_categories) == 0:
             selected_categories = self.labels
         
         try:
-            # Buat folder tujuan untuk kategori yang dipilih jika belum ada
-            for label in selected_categories:
-                dest_path = os.path.join(folder_path, label)
-                if not os.path.exists(dest_path):
-                    os.makedirs(dest_path)
-            
-            # Dapatkan file gambar
-            image_files = [f for f in os.listdir(folder_path) 
-                         if os.path.isfile(os.path.join(folder_path, f)) dan 
-                         f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            total_images = len(image_files)
+            # Walk folder secara streaming, gambar pertama langsung diproses tanpa menunggu
+            # listing selesai. Folder kategori (hasil sortir) tidak ikut di-scan
+            scanner = self._create_scanner(folder_path)
+            run = self._start_run(folder_path, selected_categories, resume, scanner)
+            
+            image_entries = scanner.scan()
+            if run["done"]:
+                image_entries = self._skip_journaled(run, image_entries)
+            
+            try:
+                try:
+                    self._classify_paths(run, self._entry_paths(run, image_entries))
+                finally:
+                    # on_complete baru dipanggil setelah semua file benar-benar sudah ditaruh
+                    run["placer"].close()
+                # Run yang selesai normal tidak akan dilanjutkan lagi
+                if run["journal"] is not None:
+                    run["journal"].complete(processed=run["processed"], skipped=run["skipped"])
+            finally:
+                if run["journal"] is not None:
+                    run["journal"].close()
+                self._flush_cache()
+            
+            processed = run["processed"]
+            skipped = run["skipped"]
+            total_images = scanner.files_found
             
             if total_images == 0:
                 if self.on_status_update:
@@ -213,76 +343,780 @@ class OptimizedClassifier:
                 if self.on_complete:
                     self.on_complete({label: 0 for label in selected_categories}, 0, 0)
                 return
+            
+            # Selesaikan proses
+            if self.on_complete:
+                # Filter jumlah untuk hanya menyertakan kategori yang dipilih
+                filtered_counts = {k: v for k, v in run["category_counts"].items() if k in selected_categories}
+                self.on_complete(filtered_counts, processed, total_images)
                 
-            # Track jumlah berdasarkan kategori
-            category_counts = {label: 0 for label in self.labels}
-            processed = 0
-            skipped = 0
+            if self.on_status_update:
+                self.on_status_update(f"Selesai! {processed} gambar diurutkan ke dalam kategori yang dipilih. {skipped} gambar dilewati.")
+            
+        except Exception as e:
+            self.logger.error(f"Error memproses folder: {str(e)}")
+            if self.on_error:
+                self.on_error("", str(e))
+
+    def watch_folder(self, folder_path, selected_categories=None, stop_event=None, debounce=2.0,
+                     poll_interval=5.0, backend='auto', process_existing=True, resume=True):
+        """
+        Pantau folder dan klasifikasikan gambar baru begitu selesai ditulis
+        
+        Model tetap di memori selama pemantauan. Gambar yang baru masuk atau berubah
+        dikumpulkan sampai debounce detik tidak ada perubahan, lalu diproses per batch
+        kecil (maksimal batch_size) lewat loader, cache, journal, dan antrian penempatan
+        yang sama dengan process_folder. Semua batch masuk ke satu run, jadi
+        undo_last_run membatalkan seluruh sesi pemantauan.
+        
+        Method ini blocking sampai stop_event di-set atau stop_watch() dipanggil.
+        
+        Args:
+            folder_path: Path ke folder yang dipantau
+            selected_categories: List kategori yang akan diproses (jika None, semua kategori diproses)
+            stop_event: threading.Event untuk menghentikan pemantauan (jika None, dibuat baru)
+            debounce: Detik tanpa perubahan sebelum file dianggap selesai ditulis
+            poll_interval: Jeda antar scan jika inotify tidak tersedia
+            backend: 'auto', 'inotify', atau 'poll' (lihat FolderWatcher)
+            process_existing: Proses dulu gambar yang sudah ada sebelum mulai memantau
+            resume: Lanjutkan run yang terhenti di folder ini, seperti process_folder
+        """
+        if self.model is None:
+            if self.on_error:
+                self.on_error("", "Model belum di-load. Silakan load model terlebih dahulu.")
+            return
+        
+        if selected_categories is None or len(selected_categories) == 0:
+            selected_categories = self.labels
+        
+        self._watch_stop = stop_event or threading.Event()
+        watcher = None
+        try:
+            run = self._start_run(folder_path, selected_categories, resume, None)
+            # (ukuran, mtime) terakhir tiap file yang sudah diproses, agar file yang
+            # juga terdeteksi watcher saat scan awal tidak diproses dua kali
+            run["signatures"] = {}
             
-            # Proses setiap gambar
-            for i, img_file in enumerate(image_files):
+            try:
                 try:
-                    # Update progress
-                    progress = (i / total_images) * 100
-                    if self.on_progress_update:
-                        self.on_progress_update(progress)
-                    
-                    if self.on_status_update:
-                        self.on_status_update(f"Memproses gambar {i+1} dari {total_images}")
+                    # Watcher dipasang sebelum scan awal supaya file yang masuk di tengah scan tidak terlewat
+                    watcher = FolderWatcher(
+                        folder_path, self.extensions,
+                        exclude_dirs=[os.path.join(folder_path, label) for label in self.labels],
+                        recursive=self.recursive, debounce=debounce,
+                        poll_interval=poll_interval, backend=backend
+                    )
+                    self.logger.info(f"Memantau {folder_path} dengan backend {watcher.backend}")
                     
-                    # Load dan preprocess gambar
-                    img_path = os.path.join(folder_path, img_file)
-                    img = load_img(img_path)
+                    if process_existing:
+                        run["scanner"] = self._create_scanner(folder_path)
+                        image_entries = run["scanner"].scan()
+                        if run["done"]:
+                            image_entries = self._skip_journaled(run, image_entries)
+                        image_entries = self._skip_unchanged(run, image_entries)
+                        self._classify_paths(run, self._entry_paths(run, image_entries))
+                        run["scanner"] = None
                     
-                    # Preprocess untuk model
-                    img_array = img_to_array(img)
-                    img_resized = tf.image.resize(img_array, (224, 224))
-                    img_normalized = img_resized / 255.0
-                    
-                    # Buat prediksi
-                    class_idx, confidence = self.predict_image(img_normalized)
-                    predicted_class = self.labels[class_idx]
+                    if self.on_status_update:
+                        self.on_status_update(f"Memantau folder... {run['processed']} gambar diurutkan sejauh ini.")
                     
-                    # Hanya pindahkan gambar jika kelas prediksi ada di kategori yang dipilih
-                    if predicted_class in selected_categories:
-                        # Pindahkan gambar ke folder yang sesuai
-                        dest_path = os.path.join(folder_path, predicted_class, img_file)
-                        shutil.move(img_path, dest_path)
-                        
-                        # Update jumlah
-                        category_counts[predicted_class] += 1
-                        processed += 1
-                        
-                        # Log klasifikasi jika callback disediakan
-                        if self.on_image_classified:
-                            self.on_image_classified(img_file, predicted_class, confidence)
-                    else:
-                        skipped += 1
-                        if self.on_image_classified:
-                            self.on_image_classified(
-                                img_file, 
-                                f"{predicted_class} (dilewati - tidak ada di kategori yang dipilih)", 
-                                confidence
-                            )
-                
-                except Exception as e:
-                    self.logger.error(f"Error memproses {img_file}: {str(e)}")
-                    if self.on_error:
-                        self.on_error(img_file, str(e))
+                    # Tiap batch dari watcher langsung diprediksi dengan model yang sudah di-load
+                    for entries in watcher.watch(self._watch_stop, self.batch_size):
+                        self._classify_paths(run, self._entry_paths(run, self._skip_unchanged(run, entries)))
+                        self._flush_cache()
+                        if self.on_status_update:
+                            self.on_status_update(f"Memantau folder... {run['processed']} gambar diurutkan sejauh ini.")
+                finally:
+                    if watcher is not None:
+                        watcher.close()
+                    run["placer"].close()
+                if run["journal"] is not None:
+                    run["journal"].complete(processed=run["processed"], skipped=run["skipped"])
+            finally:
+                if run["journal"] is not None:
+                    run["journal"].close()
+                self._flush_cache()
             
-            # Selesaikan proses
             if self.on_complete:
-                # Filter jumlah untuk hanya menyertakan kategori yang dipilih
-                filtered_counts = {k: v for k, v in category_counts.items() if k in selected_categories}
-                self.on_complete(filtered_counts, processed, total_images)
+                filtered_counts = {k: v for k, v in run["category_counts"].items() if k in selected_categories}
+                self.on_complete(filtered_counts, run["processed"], run["seen"])
+            
+            if self.on_status_update:
+                self.on_status_update(f"Pemantauan dihentikan. {run['processed']} gambar diurutkan, "
+                                      f"{run['skipped']} gambar dilewati.")
+        
+        except Exception as e:
+            self.logger.error(f"Error memantau folder: {str(e)}")
+            if self.on_error:
+                self.on_error("", str(e))
+
+    def stop_watch(self):
+        """Hentikan watch_folder yang sedang berjalan"""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+
+    def _skip_unchanged(self, run, image_entries):
+        """Saring file yang sudah diproses di sesi pemantauan ini dan belum berubah sejak itu"""
+        signatures = run["signatures"]
+        for entry in image_entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            signature = (st.st_size, st.st_mtime_ns)
+            abs_path = os.path.abspath(entry.path)
+            if signatures.get(abs_path) == signature:
+                continue
+            signatures[abs_path] = signature
+            yield entry
+
+    def load_embedding_model(self, model_path=None):
+        """
+        Load model untuk ekstraksi embedding (output layer sebelum head klasifikasi)
+        
+        Args:
+            model_path: Model embedding hasil ModelOptimizer.export_embedding_model
+                (.tflite, .onnx), atau model Keras klasifikasi yang head-nya dipotong di sini.
+                None berarti memakai model Keras yang sedang di-load
+            
+        Returns:
+            True jika model berhasil di-load, False jika gagal
+        """
+        self._close_embedding_model()
+        try:
+            if model_path is None:
+                if self.model_type != 'keras':
+                    raise ValueError("Model TFLite/ONNX hanya punya output softmax. Export model "
+                                     "embedding dengan ModelOptimizer.export_embedding_model lalu "
+                                     "load lewat load_embedding_model(path)")
+                model_path = self.model_path
+                keras_model = self.model
+            else:
+                keras_model = None
+            
+            file_ext = os.path.splitext(model_path)[1].lower()
+            self.logger.info(f"Loading model embedding dari {model_path}")
+            if file_ext in ('.keras', '.h5'):
+                from model_optimizer import build_embedding_model
+                if keras_model is None:
+                    import tensorflow as tf
+                    keras_model = tf.keras.models.load_model(model_path)
+                self.embedding_model = build_embedding_model(keras_model)
+                self.embedding_model_type = 'keras'
+            elif file_ext in ('.tflite', '.onnx'):
+                self.embedding_model = self._create_runner(model_path, file_ext)
+                self.embedding_model_type = file_ext.lstrip('.')
+            else:
+                raise ValueError(f"Format model tidak didukung: {file_ext}")
+            
+            # Store embedding terikat ke file model ini, embedding model lain tidak sebanding
+            self._embedding_fp = f"{model_fingerprint(model_path)}:embedding"
+            return True
+        
+        except Exception as e:
+            self._close_embedding_model()
+            self.logger.error(f"Error loading model embedding: {str(e)}")
+            if self.on_error:
+                self.on_error("", f"Error loading model embedding: {str(e)}")
+            return False
+    
+    def _close_embedding_model(self):
+        if self.embedding_model_type in ('tflite', 'onnx'):
+            self.embedding_model.close()
+        self.embedding_model = None
+        self.embedding_model_type = None
+        self._embedding_fp = None
+    
+    def _close_embedding_store(self):
+        if self._embedding_index is not None:
+            self._embedding_index.close()
+            self._embedding_index = None
+        if self._embedding_store is not None:
+            self._embedding_store.close()
+            self._embedding_store = None
+    
+    def predict_embeddings(self, img_batch):
+        """
+        Hitung embedding untuk satu batch gambar
+        
+        Args:
+            img_batch: Array (N, tinggi, lebar, 3) float 0-1 atau uint8 0-255
+            
+        Returns:
+            Array float32 (N, dimensi embedding), belum dinormalisasi
+        """
+        if self.embedding_model is None:
+            raise ValueError("Model embedding belum di-load. Panggil load_embedding_model terlebih dahulu.")
+        if self.embedding_model_type == 'keras':
+            return np.asarray(self.embedding_model.predict(img_batch, batch_size=len(img_batch), verbose=0),
+                              dtype=np.float32)
+        return np.asarray(self.embedding_model.run(img_batch), dtype=np.float32)
+    
+    def _embedding_input_size(self):
+        if self.embedding_model_type in ('tflite', 'onnx'):
+            return tuple(self.embedding_model.input_size)
+        return (224, 224)
+    
+    def _preprocess_embedding(self, img_path):
+        """Preprocess gambar untuk model embedding, mengikuti preprocess_mode"""
+        mode = self._resolve_preprocess_mode()
+        if mode == 'keras':
+            return self._preprocess_image(img_path, mode)
+        return load_image_uint8(img_path, self._embedding_input_size(), draft=mode == 'draft')
+    
+    def extract_embeddings(self, folder_path, store_dir, build_index=True):
+        """
+        Hitung embedding semua gambar di folder (termasuk folder kategori) ke EmbeddingStore
+        
+        Gambar yang stat-nya tidak berubah sejak ekstraksi sebelumnya dilewati. Gambar
+        yang dipindah atau duplikat dikenali dari hash isinya dan langsung diarahkan ke
+        embedding yang sudah ada, sisanya di-decode dan diinferensi per batch.
+        
+        Args:
+            folder_path: Folder gambar
+            store_dir: Folder EmbeddingStore (dibuat jika belum ada)
+            build_index: Bangun ulang index IVF jika store cukup besar (lihat NearestNeighborIndex.update)
+            
+        Returns:
+            Dict {"extracted", "linked", "unchanged", "removed", "errors", "indexed"}, atau
+            None jika gagal
+        """
+        if self.embedding_model is None and not self.load_embedding_model():
+            return None
+        
+        # Store yang sedang terbuka untuk find_similar dibuka ulang setelah ekstraksi
+        self._close_embedding_store()
+        store = None
+        try:
+            store = EmbeddingStore(store_dir, self._embedding_fp)
+            if store.was_reset:
+                self.logger.info("Store embedding dikosongkan karena dibuat dengan model lain")
+            
+            # Folder kategori ikut di-scan, pencarian kemiripan mencakup seluruh galeri
+            scanner = FolderScanner(folder_path, self.extensions, recursive=self.recursive)
+            run = {"scanner": scanner, "seen": 0}
+            stats = {"extracted": 0, "linked": 0, "unchanged": 0, "removed": 0, "errors": 0,
+                     "indexed": False}
+            pending = {}
+            
+            def new_paths():
+                for entry in scanner.scan():
+                    img_path = entry.path
+                    abs_path = os.path.abspath(img_path)
+                    try:
+                        key = stat_key(entry)
+                        if store.lookup(abs_path, key) is not None:
+                            stats["unchanged"] += 1
+                            self._report_progress(run)
+                            continue
+                        content_hash = hash_file(img_path)
+                    except OSError:
+                        # Biarkan error-nya muncul di tahap decode
+                        yield img_path
+                        continue
+                    
+                    row = store.find_hash(content_hash)
+                    if row is not None:
+                        store.link(abs_path, key, row)
+                        stats["linked"] += 1
+                        self._report_progress(run)
+                        continue
+                    pending[img_path] = (abs_path, key, content_hash)
+                    yield img_path
+            
+            input_size = self._embedding_input_size()
+            loader = create_loader(self.decode_backend, self._preprocess_embedding,
+                                   self.num_workers, self.queue_size,
+                                   draft=self._resolve_preprocess_mode() == 'draft',
+                                   target_size=input_size,
+                                   preprocess_mode=self._resolve_preprocess_mode())
+            buffer_dtype = np.uint8 if getattr(self.embedding_model, 'uint8_input', False) else np.float32
+            buffer = BatchBuffer(self.batch_size, input_size, buffer_dtype)
+            batch = []
+            for img_path, img_array, error in loader.iterate(new_paths()):
+                self._report_progress(run)
+                if error is not None or img_path not in pending:
+                    pending.pop(img_path, None)
+                    stats["errors"] += 1
+                    message = str(error) if error is not None else "File tidak bisa dibaca"
+                    self.logger.error(f"Error memproses {os.path.basename(img_path)}: {message}")
+                    if self.on_error:
+                        self.on_error(os.path.basename(img_path), message)
+                    continue
                 
+                buffer.add(img_array)
+                batch.append(img_path)
+                if buffer.full():
+                    self._store_embeddings(store, pending, batch, buffer.finalize(), stats)
+                    buffer.reset()
+                    batch = []
+            
+            if batch:
+                self._store_embeddings(store, pending, batch, buffer.finalize(), stats)
+            # Path lama file yang dipindah/dihapus tidak ikut muncul di hasil pencarian
+            stats["removed"] = store.prune_missing()
+            
+            if build_index:
+                index = NearestNeighborIndex(store)
+                if self.on_status_update and store.count >= IVF_MIN_VECTORS:
+                    self.on_status_update("Memperbarui index pencarian...")
+                stats["indexed"] = index.update()
+                index.close()
+            
+            self.logger.info(f"Ekstraksi embedding selesai: {stats}")
             if self.on_status_update:
-                self.on_status_update(f"Selesai! {processed} gambar diurutkan ke dalam kategori yang dipilih. {skipped} gambar dilewati.")
+                self.on_status_update(f"Selesai! {stats['extracted']} embedding baru, {stats['linked']} file "
+                                      f"dipindah/duplikat, {stats['unchanged']} tidak berubah, {stats['errors']} gagal.")
+            return stats
+        
+        except Exception as e:
+            self.logger.error(f"Error ekstraksi embedding: {str(e)}")
+            if self.on_error:
+                self.on_error("", str(e))
+            return None
+        
+        finally:
+            if store is not None:
+                store.close()
+    
+    def _store_embeddings(self, store, pending, batch, img_batch, stats):
+        """Hitung embedding satu batch dan simpan ke store"""
+        entries = [pending.pop(img_path) for img_path in batch]
+        try:
+            vectors = self.predict_embeddings(img_batch)
+        except Exception as e:
+            self.logger.error(f"Error prediksi batch embedding: {str(e)}")
+            stats["errors"] += len(batch)
+            if self.on_error:
+                for img_path in batch:
+                    self.on_error(os.path.basename(img_path), str(e))
+            return
+        store.add_many(entries, vectors)
+        stats["extracted"] += len(batch)
+    
+    def find_similar(self, image_path, store_dir, k=10, nprobe=None, exact=False):
+        """
+        Cari gambar yang paling mirip dengan image_path di EmbeddingStore
+        
+        Embedding query diambil dari store jika gambarnya sudah diekstraksi dan belum
+        berubah, jika tidak dihitung dengan model embedding yang sedang di-load. Store
+        dan index tetap terbuka untuk query berikutnya ke store yang sama.
+        
+        Args:
+            image_path: Gambar query
+            store_dir: Folder EmbeddingStore hasil extract_embeddings
+            k: Jumlah hasil
+            nprobe: Jumlah list IVF yang diperiksa (None = default index)
+            exact: Paksa brute force
             
+        Returns:
+            List (path, cosine similarity) terurut dari yang paling mirip, tanpa gambar
+            query itu sendiri
+        """
+        if self._embedding_store is None or self._embedding_store.store_dir != store_dir:
+            self._close_embedding_store()
+            self._embedding_store = EmbeddingStore(store_dir)
+            self._embedding_index = NearestNeighborIndex(self._embedding_store)
+        store, index = self._embedding_store, self._embedding_index
+        
+        abs_path = os.path.abspath(image_path)
+        query_row = store.lookup(abs_path, stat_key(WatchedFile(abs_path)))
+        if query_row is not None:
+            query = np.asarray(store.vectors()[query_row], dtype=np.float32)
+        else:
+            # Gambar baru atau berubah, embedding-nya dihitung sekarang
+            if self.embedding_model is None and not self.load_embedding_model():
+                raise ValueError("Model embedding belum di-load. Panggil load_embedding_model terlebih dahulu.")
+            if store.model_fp not in (None, self._embedding_fp):
+                raise ValueError("Store embedding dibuat dengan model lain, jalankan extract_embeddings ulang")
+            query = self.predict_embeddings(np.expand_dims(self._preprocess_embedding(image_path), 0))[0]
+        
+        # Ambil lebih dari k karena gambar query dan duplikatnya ikut ditemukan
+        scores, rows = index.search(query, k + 1, nprobe, exact)
+        paths = store.paths_for_rows(rows[0])
+        results = []
+        for score, row in zip(scores[0], rows[0]):
+            if row < 0 or row == query_row:
+                continue
+            results.extend((path, float(score)) for path in paths[row] if path != abs_path)
+        return results[:k]
+    
+    def undo_last_run(self, folder_path):
+        """
+        Batalkan run terakhir di folder_path berdasarkan journal-nya
+        
+        File yang dipindahkan dikembalikan dengan rename, salinan dan link dihapus
+        (salinan hanya jika isinya masih sama dengan file asli). Memanggil lagi
+        membatalkan run sebelumnya, dan undo yang terhenti bisa diulang.
+        
+        Returns:
+            Dict ringkasan (lihat run_journal.undo_run), atau None jika tidak ada run
+            yang bisa dibatalkan atau undo gagal
+        """
+        try:
+            journal_path = latest_undoable_journal(folder_path)
+            if journal_path is None:
+                if self.on_status_update:
+                    self.on_status_update("Tidak ada run yang bisa dibatalkan di folder ini.")
+                return None
+            
+            self.logger.info(f"Membatalkan run dari {journal_path}")
+            
+            def report(done, total):
+                if self.on_progress_update:
+                    self.on_progress_update(done / total * 100)
+            
+            summary = undo_run(journal_path, self.placement_workers, report)
+            for path, message in summary["errors"]:
+                self.logger.error(f"Gagal membatalkan {path}: {message}")
+                if self.on_error:
+                    self.on_error(os.path.basename(path), message)
+            
+            if self.on_status_update:
+                self.on_status_update(f"Undo selesai: {summary['restored']} file dikembalikan, "
+                                      f"{summary['removed']} salinan dihapus, {len(summary['errors'])} gagal.")
+            return summary
+        
         except Exception as e:
-            self.logger.error(f"Error memproses folder: {str(e)}")
+            self.logger.error(f"Error membatalkan run: {str(e)}")
             if self.on_error:
                 self.on_error("", str(e))
+            return None
+
+    def _create_scanner(self, folder_path):
+        return FolderScanner(
+            folder_path, self.extensions,
+            exclude_dirs=[os.path.join(folder_path, label) for label in self.labels],
+            recursive=self.recursive
+        )
+
+    def _start_run(self, folder_path, selected_categories, resume, scanner):
+        """
+        Siapkan state satu run: folder kategori, journal, dan antrian penempatan
+        
+        Returns:
+            Dict state run yang dipakai bersama oleh semua tahap klasifikasi
+        """
+        # Buat folder tujuan untuk kategori yang dipilih jika belum ada
+        for label in selected_categories:
+            dest_path = os.path.join(folder_path, label)
+            if not os.path.exists(dest_path):
+                os.makedirs(dest_path)
+        
+        # State satu run: jumlah per kategori, counter, dan hash gambar yang belum di-cache
+        run = {
+            "folder_path": folder_path,
+            "selected_categories": selected_categories,
+            "category_counts": {label: 0 for label in self.labels},
+            "scanner": scanner,
+            "seen": 0,
+            "processed": 0,
+            "skipped": 0,
+            "content_hashes": {},
+            "done": set(),
+            "lock": threading.Lock(),
+        }
+        
+        placement_mode = resolve_placement_mode(self.placement_mode, folder_path)
+        run["journal"] = self._open_journal(run, placement_mode, resume)
+        if run["journal"] is not None and run["journal"].mode:
+            # Run yang dilanjutkan memakai mode penempatan dari run aslinya
+            placement_mode = run["journal"].mode
+        
+        # Penempatan file jalan di worker sendiri, thread ini cuma ngasih keputusan
+        run["placer"] = PlacementQueue(
+            placement_mode, self.placement_workers, self.placement_queue_size,
+            on_placed=lambda src, dest, mode, tag: self._on_placed(run, src, tag),
+            on_failed=lambda src, error, tag: self._on_place_failed(src, error),
+            journal=run["journal"]
+        )
+        return run
+
+    def _entry_paths(self, run, image_entries):
+        """Path gambar yang masih perlu di-decode, gambar yang ada di cache langsung diurutkan"""
+        if self.cache is not None:
+            return self._skip_cached(run, image_entries)
+        return (entry.path for entry in image_entries)
+
+    def _open_journal(self, run, placement_mode, resume):
+        """
+        Buka journal untuk run ini: lanjutkan journal yang belum selesai, atau buat baru
+        
+        Returns:
+            RunJournal, atau None jika journal dimatikan
+        """
+        if not self.use_journal:
+            return None
+        
+        folder_path = run["folder_path"]
+        journal, state = RunJournal.resume_latest(folder_path) if resume else (None, None)
+        if journal is None:
+            return RunJournal.create(folder_path, placement_mode,
+                                     categories=list(run["selected_categories"]))
+        
+        # Penempatan yang terpotong crash dibereskan dulu sebelum ada file baru yang disentuh
+        finished, rolled_back = journal.recover(state)
+        run["done"] = state.done_paths()
+        self.logger.info(f"Melanjutkan run {state.header.get('run_id')}: {len(run['done'])} file sudah selesai, "
+                         f"{finished} penempatan terkonfirmasi, {rolled_back} dibatalkan")
+        if self.on_status_update:
+            self.on_status_update(f"Melanjutkan run sebelumnya, {len(run['done'])} file sudah selesai")
+        return journal
+
+    def _skip_journaled(self, run, image_entries):
+        """Saring gambar yang menurut journal sudah selesai di run yang dilanjutkan"""
+        done = run["done"]
+        for entry in image_entries:
+            if os.path.abspath(entry.path) in done:
+                # Tetap dihitung agar progress sampai 100%
+                run["seen"] += 1
+                continue
+            yield entry
+
+    def _classify_paths(self, run, image_paths):
+        """Decode, prediksi per batch, dan urutkan semua gambar dari image_paths"""
+        # Decode berjalan di background, thread ini fokus ke inferensi
+        input_size = self._model_input_size()
+        loader = create_loader(self.decode_backend, self._preprocess_image,
+                               self.num_workers, self.queue_size,
+                               draft=self._resolve_preprocess_mode() == 'draft',
+                               target_size=input_size,
+                               preprocess_mode=self._resolve_preprocess_mode())
+        
+        # Buffer dialokasikan sekali per run dan ditulis ulang untuk setiap batch. Model
+        # dengan preprocessing di dalam graph langsung menerima uint8, tanpa normalisasi
+        buffer_dtype = np.uint8 if self._uint8_input() else np.float32
+        buffer = BatchBuffer(self.batch_size, input_size, buffer_dtype)
+        batch = []
+        for img_path, img_array, error in loader.iterate(image_paths):
+            img_file = os.path.basename(img_path)
+            self._report_progress(run)
+            
+            if error is not None:
+                self.logger.error(f"Error memproses {img_file}: {str(error)}")
+                if self.on_error:
+                    self.on_error(img_file, str(error))
+                continue
+            
+            # Hasil decode langsung disalin ke buffer (cast uint8 -> float32 sekaligus)
+            buffer.add(img_array)
+            batch.append((img_file, img_path))
+            if buffer.full():
+                self._classify_batch(run, batch, buffer.finalize())
+                buffer.reset()
+                batch = []
+        
+        # Sisa gambar yang belum genap satu batch
+        if batch:
+            self._classify_batch(run, batch, buffer.finalize())
+
+    def _classify_batch(self, run, batch, img_batch):
+        """
+        Prediksi satu batch gambar lalu urutkan hasilnya satu per satu
+        
+        Args:
+            run: State run dari process_folder
+            batch: List (nama file, path) sesuai urutan gambar di img_batch
+            img_batch: Array float32 (N, tinggi, lebar, 3) yang sudah dinormalisasi,
+                atau uint8 mentah untuk model dengan preprocessing di dalam graph
+        """
+        try:
+            probs_batch = self.predict_batch(img_batch)
+        except Exception as e:
+            self.logger.error(f"Error prediksi batch: {str(e)}")
+            if self.on_error:
+                for img_file, _ in batch:
+                    self.on_error(img_file, str(e))
+            return
+        
+        # Simpan ke cache agar run berikutnya tidak perlu inferensi ulang
+        if self.cache is not None:
+            try:
+                self.cache.put_many(
+                    (run["content_hashes"].pop(img_path), probs)
+                    for (_, img_path), probs in zip(batch, probs_batch)
+                    if img_path in run["content_hashes"]
+                )
+            except Exception as e:
+                self.logger.error(f"Gagal menyimpan cache: {str(e)}")
+        
+        for (img_file, img_path), probs in zip(batch, probs_batch):
+            self._handle_prediction(run, img_file, img_path, probs)
+
+    def _report_progress(self, run):
+        """Update progress dan status untuk gambar berikutnya di run ini"""
+        i = run["seen"]
+        run["seen"] += 1
+        
+        # Mode pantau tidak punya total, cukup laporkan jumlah gambar yang masuk
+        scanner = run["scanner"]
+        if scanner is None:
+            if self.on_status_update:
+                self.on_status_update(f"Memproses gambar baru ke-{i+1}")
+            return
+        
+        # Total masih berupa perkiraan selama walk folder belum selesai
+        total = max(scanner.estimated_total(), i + 1)
+        total_text = str(total) if scanner.finished else f"~{total}"
+        
+        progress = (i / total) * 100
+        if self.on_progress_update:
+            self.on_progress_update(progress)
+        
+        if self.on_status_update:
+            self.on_status_update(f"Memproses gambar {i+1} dari {total_text}")
+
+    def _skip_cached(self, run, image_entries):
+        """
+        Saring gambar yang prediksinya sudah ada di cache
+        
+        Hash isi file hanya dihitung ulang jika (inode, ukuran, mtime) file berubah sejak
+        run terakhir. Gambar yang ditemukan di cache langsung diurutkan tanpa decode dan
+        inferensi, sisanya diteruskan ke loader. Hash-nya dicatat agar hasilnya bisa
+        disimpan nanti.
+        """
+        for entry in image_entries:
+            img_path = entry.path
+            try:
+                key = stat_key(entry)
+                abs_path = os.path.abspath(img_path)
+                content_hash = self.cache.lookup_hash(abs_path, key)
+                if content_hash is None:
+                    content_hash = hash_file(img_path)
+                    self.cache.record_hash(abs_path, key, content_hash)
+                cached = self.cache.get(content_hash)
+            except Exception:
+                # Biarkan error-nya muncul di tahap decode seperti biasa
+                yield img_path
+                continue
+            
+            if cached is None:
+                run["content_hashes"][img_path] = content_hash
+                yield img_path
+                continue
+            
+            self._report_progress(run)
+            _, probs = cached
+            self._handle_prediction(run, os.path.basename(img_path), img_path, probs)
+
+    def _handle_prediction(self, run, img_file, img_path, probs):
+        """Urutkan satu gambar sesuai hasil prediksinya"""
+        try:
+            class_idx = np.argmax(probs)
+            confidence = probs[class_idx]
+            predicted_class = self.labels[class_idx]
+            selected = predicted_class in run["selected_categories"]
+            
+            # Keputusan dicatat dulu, run yang dilanjutkan tidak perlu inferensi ulang
+            if run["journal"] is not None:
+                run["journal"].decision(img_path, predicted_class, confidence, selected)
+            
+            # Hanya pindahkan gambar jika kelas prediksi ada di kategori yang dipilih
+            if selected:
+                # Masukkan ke antrian penempatan, jumlah dan callback di-update setelah file ditaruh
+                dest_dir = os.path.join(run["folder_path"], predicted_class)
+                run["placer"].submit(img_path, dest_dir, img_file, (img_file, predicted_class, confidence))
+            else:
+                run["skipped"] += 1
+                if self.on_image_classified:
+                    self.on_image_classified(
+                        img_file, 
+                        f"{predicted_class} (dilewati - tidak ada di kategori yang dipilih)", 
+                        confidence
+                    )
+        
+        except Exception as e:
+            self.logger.error(f"Error memproses {img_file}: {str(e)}")
+            if self.on_error:
+                self.on_error(img_file, str(e))
+
+    def _on_placed(self, run, img_path, tag):
+        """Dipanggil worker penempatan ketika satu gambar berhasil ditaruh"""
+        img_file, predicted_class, confidence = tag
+        
+        # Update jumlah
+        with run["lock"]:
+            run["category_counts"][predicted_class] += 1
+            run["processed"] += 1
+        
+        # Log klasifikasi jika callback disediakan
+        if self.on_image_classified:
+            self.on_image_classified(img_file, predicted_class, confidence)
+
+    def _on_place_failed(self, img_path, error):
+        """Dipanggil worker penempatan ketika gagal menaruh gambar"""
+        img_file = os.path.basename(img_path)
+        self.logger.error(f"Error menaruh {img_file}: {str(error)}")
+        if self.on_error:
+            self.on_error(img_file, str(error))
+
+    def _model_input_size(self):
+        """Ukuran input (tinggi, lebar) yang diharapkan model yang sedang di-load"""
+        if self.model_type in ('tflite', 'onnx'):
+            return tuple(self.model.input_size)
+        return (224, 224)
+
+    def _uint8_input(self):
+        """True jika model menerima uint8 0-255 (rescale dan resize ada di dalam graph)"""
+        return bool(getattr(self.model, 'uint8_input', False))
+
+    def _resolve_preprocess_mode(self, mode=None):
+        """Ubah mode 'auto' menjadi mode konkret sesuai tipe model yang di-load"""
+        mode = mode or self.preprocess_mode
+        if mode == 'auto':
+            if self.decode_backend == 'process':
+                # Worker proses hanya bisa decode dengan PIL
+                return 'pil'
+            return 'keras' if self.model_type == 'keras' else 'pil'
+        return mode
+
+    def _preprocess_image(self, img_path, mode=None):
+        """
+        Load gambar dan ubah menjadi array seukuran input model (224x224 untuk Keras)
+        
+        Mode 'keras' mengembalikan float yang sudah dinormalisasi, mode 'pil'/'draft'
+        mengembalikan uint8 (normalisasi lewat normalize_image)
+        """
+        mode = self._resolve_preprocess_mode(mode)
+        if mode == 'keras':
+            # TensorFlow hanya di-import untuk jalur Keras, model TFLite/ONNX memakai PIL
+            import tensorflow as tf
+            from tensorflow.keras.preprocessing.image import load_img, img_to_array
+            img = load_img(img_path)
+            img_array = img_to_array(img)
+            img_resized = tf.image.resize(img_array, self._model_input_size())
+            return img_resized / 255.0
+        return load_image_uint8(img_path, self._model_input_size(), draft=mode == 'draft')
+
+    def compare_preprocess_modes(self, labelled_folder, modes=('keras', 'draft'), limit_per_class=None):
+        """
+        Bandingkan akurasi jalur preprocess lama dengan jalur cepat pada sampel berlabel
+        
+        Args:
+            labelled_folder: Folder dengan struktur <folder>/<label>/*.jpg sesuai self.labels
+            modes: Mode preprocess yang dibandingkan, yang pertama menjadi acuan
+            limit_per_class: Maksimal gambar per kelas
+            
+        Returns:
+            Dict per mode berisi accuracy, accuracy_delta, agreement (lihat image_pipeline)
+        """
+        if self.model is None:
+            raise ValueError("Model belum di-load. Silakan load model terlebih dahulu.")
+        
+        samples = list_labelled_images(labelled_folder, self.labels, limit_per_class)
+        if not samples:
+            raise ValueError(f"Tidak ada gambar berlabel di {labelled_folder}")
+        
+        def predict_fn(img_batch):
+            return np.argmax(self.predict_batch(img_batch), axis=1)
+        
+        report = compare_preprocess_modes(samples, self._preprocess_image, predict_fn, modes,
+                                          num_workers=self.num_workers)
+        for mode in modes:
+            self.logger.info(f"Preprocess '{mode}': akurasi {report[mode]['accuracy']:.4f} "
+                             f"(delta {report[mode]['accuracy_delta']:+.4f}, "
+                             f"agreement {report[mode]['agreement']:.4f})")
+        return report
 
     def classify_single_image(self, image_path):
         """Klasifikasikan satu gambar dan kembalikan kelas prediksi dan confidence"""
@@ -290,16 +1124,13 @@ class OptimizedClassifier:
             raise ValueError("Model belum di-load. Silakan load model terlebih dahulu.")
             
         try:
-            # Load dan preprocess gambar
-            img = load_img(image_path)
-            
-            # Preprocess untuk model
-            img_array = img_to_array(img)
-            img_resized = tf.image.resize(img_array, (224, 224))
-            img_normalized = img_resized / 255.0
+            # Load dan preprocess gambar, model dengan input uint8 menormalisasi sendiri
+            img_array = self._preprocess_image(image_path)
+            if not self._uint8_input():
+                img_array = normalize_image(img_array)
             
             # Buat prediksi
-            class_idx, confidence = self.predict_image(img_normalized)
+            class_idx, confidence = self.predict_image(img_array)
             predicted_class = self.labels[class_idx]
             
             return predicted_class, confidence
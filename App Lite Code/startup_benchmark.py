@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import subprocess
+
+
+# Kode yang dijalankan di proses baru supaya yang diukur benar-benar cold start
+_PROBE = r"""
+import sys, time, json
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<probe>", "exec"))
+elapsed = time.perf_counter() - start
+
+peak_rss_mb = None
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS byte
+    peak_rss_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+except ImportError:
+    try:
+        import psutil
+        peak_rss_mb = psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        pass
+
+print(json.dumps({
+    "seconds": elapsed,
+    "peak_rss_mb": peak_rss_mb,
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+}))
+"""
+
+
+def measure(code, cwd=None):
+    """
+    Jalankan code di interpreter Python baru dan ukur waktu serta peak RSS-nya
+
+    Returns:
+        Dict berisi seconds, peak_rss_mb, tensorflow_loaded, atau error jika gagal
+    """
+    result = subprocess.run([sys.executable, "-c", _PROBE, code], cwd=cwd,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare_startup(model_path=None):
+    """
+    Bandingkan cold start runtime Lite dengan import TensorFlow penuh
+
+    Args:
+        model_path: Model (.tflite/.onnx/.keras) yang ikut di-load, opsional
+
+    Returns:
+        Dict {skenario: hasil measure}
+    """
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    scenarios = {
+        "optimized_classifier": "import optimized_classifier",
+        "tensorflow": "import tensorflow",
+    }
+    if model_path:
+        scenarios["load_model"] = (
+            "from optimized_classifier import OptimizedClassifier\n"
+            f"assert OptimizedClassifier().load_model({os.path.abspath(model_path)!r})"
+        )
+    return {name: measure(code, cwd=app_dir) for name, code in scenarios.items()}
+
+
+# Ukur cold start: python startup_benchmark.py [--model model.tflite]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bandingkan cold start dan RSS runtime Lite vs TensorFlow")
+    parser.add_argument("--model", default=None, help="Model yang ikut di-load saat pengukuran")
+    parser.add_argument("--json", action="store_true", help="Cetak hasil dalam format JSON")
+    args = parser.parse_args()
+
+    results = compare_startup(args.model)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            if "error" in result:
+                print(f"{name:>22}: gagal ({result['error']})")
+                continue
+            rss = f"{result['peak_rss_mb']:.1f} MB" if result["peak_rss_mb"] is not None else "n/a"
+            print(f"{name:>22}: {result['seconds']:.2f} detik, peak RSS {rss}, "
+                  f"TensorFlow {'ikut di-load' if result['tensorflow_loaded'] else 'tidak di-load'}")
@@ -0,0 +1,363 @@
+import os
+import time
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def load_tflite_interpreter_class():
+    """
+    Cari kelas Interpreter TFLite yang paling ringan yang terinstal
+    
+    Urutannya tflite_runtime, ai_edge_litert (nama baru tflite_runtime), lalu
+    tf.lite dari TensorFlow penuh sebagai pilihan terakhir. Dengan begitu model
+    .tflite bisa dijalankan tanpa TensorFlow sama sekali.
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+def create_interpreter(model_path, num_threads=None, use_xnnpack=True):
+    """
+    Bikin interpreter TFLite dengan jumlah thread dan delegate yang dipilih
+    
+    Args:
+        model_path: Path ke model .tflite
+        num_threads: Jumlah thread intra-op per interpreter (None = default runtime)
+        use_xnnpack: Pakai delegate XNNPACK (default runtime). False berarti kernel
+            builtin biasa tanpa delegate default
+    """
+    Interpreter = load_tflite_interpreter_class()
+    kwargs = {"model_path": model_path}
+    if num_threads:
+        kwargs["num_threads"] = int(num_threads)
+    if not use_xnnpack:
+        # OpResolverType ada di modul yang sama dengan kelas Interpreter-nya
+        resolver_type = importlib.import_module(Interpreter.__module__).OpResolverType
+        kwargs["experimental_op_resolver_type"] = resolver_type.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    return Interpreter(**kwargs)
+
+
+def create_tflite_runner(model_path, num_threads=None, use_xnnpack=True, num_interpreters=1):
+    """
+    Bikin runner TFLite sesuai konfigurasi paralelisme
+    
+    Args:
+        model_path: Path ke model .tflite
+        num_threads: Thread intra-op per interpreter
+        use_xnnpack: Pakai delegate XNNPACK
+        num_interpreters: Lebih dari 1 berarti pool interpreter independen yang
+            mengerjakan potongan batch secara paralel (paralelisme antar gambar)
+    
+    Returns:
+        TFLiteRunner atau TFLiteRunnerPool
+    """
+    num_interpreters = max(1, int(num_interpreters or 1))
+    runners = [TFLiteRunner(create_interpreter(model_path, num_threads, use_xnnpack))
+               for _ in range(num_interpreters)]
+    if num_interpreters == 1:
+        return runners[0]
+    return TFLiteRunnerPool(runners)
+
+
+class TFLiteRunner:
+    """
+    Pembungkus interpreter TFLite yang metadata tensornya disiapkan sekali saat load.
+
+    Index tensor, dtype, dan parameter kuantisasi input/output dibaca sekali di
+    konstruktor, bukan di setiap prediksi. Input ditulis langsung ke buffer internal
+    interpreter lewat view interpreter.tensor(), dan dimensi batch input di-resize
+    dengan resize_tensor_input agar satu batch cukup satu kali invoke.
+    """
+
+    def __init__(self, interpreter):
+        """
+        Inisialisasi TFLiteRunner
+
+        Args:
+            interpreter: Interpreter TFLite (tflite_runtime, ai_edge_litert, atau tf.lite)
+                yang belum atau sudah di-allocate_tensors()
+        """
+        self.interpreter = interpreter
+        interpreter.allocate_tensors()
+
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+
+        self.input_index = input_details['index']
+        self.input_dtype = np.dtype(input_details['dtype'])
+        self.input_scale, self.input_zero_point = input_details['quantization']
+        self.output_index = output_details['index']
+        self.output_dtype = np.dtype(output_details['dtype'])
+        self.output_scale, self.output_zero_point = output_details['quantization']
+
+        shape = tuple(int(dim) for dim in input_details['shape'])
+        self.input_size = shape[1:3]  # Tinggi, lebar
+        self.batch_size = shape[0]
+
+        # Model int8/uint8: input float dikuantisasi dulu, output di-dequantize
+        self.quantized_input = self.input_dtype in (np.uint8, np.int8) and self.input_scale != 0
+        self.quantized_output = self.output_dtype in (np.uint8, np.int8) and self.output_scale != 0
+        if self.quantized_input:
+            info = np.iinfo(self.input_dtype)
+            self._input_range = (info.min, info.max)
+        # Model dengan preprocessing di dalam graph: input uint8 0-255 tanpa kuantisasi
+        self.uint8_input = self.input_dtype == np.uint8 and not self.quantized_input
+
+        # Buffer kerja untuk kuantisasi input, dipakai ulang antar batch
+        self._scratch = None
+        # None = belum dicoba, False = model tidak bisa di-resize (batch tetap)
+        self._resizable = None
+
+    def _resize_batch(self, batch_size):
+        """
+        Ubah dimensi batch input interpreter
+
+        Returns:
+            True jika interpreter sekarang menerima batch_size gambar sekaligus
+        """
+        if batch_size == self.batch_size:
+            return True
+        if self._resizable is False:
+            return False
+
+        height, width = self.input_size
+        try:
+            self.interpreter.resize_tensor_input(self.input_index, [batch_size, height, width, 3])
+            self.interpreter.allocate_tensors()
+        except Exception:
+            # Sebagian graph (misalnya Reshape dengan shape tetap) tidak bisa di-resize,
+            # kembalikan ke ukuran semula dan jalankan per gambar
+            self._resizable = False
+            self.interpreter.resize_tensor_input(self.input_index, [self.batch_size, height, width, 3])
+            self.interpreter.allocate_tensors()
+            return False
+
+        self._resizable = True
+        self.batch_size = batch_size
+        return True
+
+    def _write_input(self, img_batch):
+        """
+        Tulis batch ke buffer input interpreter
+
+        Batch float 0-1 dikuantisasi jika model int8/uint8, batch uint8 0-255 disalin
+        apa adanya ke model yang preprocessing-nya di dalam graph. Kombinasi lain
+        dikonversi di buffer kerja.
+        """
+        # View harus dilepas sebelum invoke, jadi tidak disimpan di atribut
+        input_view = self.interpreter.tensor(self.input_index)()
+        raw_batch = img_batch.dtype == np.uint8
+
+        if raw_batch == self.uint8_input and not self.quantized_input:
+            np.copyto(input_view, img_batch, casting='unsafe')
+            return
+
+        if self._scratch is None or self._scratch.shape[0] < len(img_batch):
+            self._scratch = np.empty((len(img_batch),) + img_batch.shape[1:], dtype=np.float32)
+        scratch = self._scratch[:len(img_batch)]
+
+        if self.uint8_input:
+            # Batch float 0-1 untuk model dengan input uint8 0-255
+            np.multiply(img_batch, np.float32(255.0), out=scratch)
+            np.rint(scratch, out=scratch)
+            np.clip(scratch, 0, 255, out=scratch)
+            np.copyto(input_view, scratch, casting='unsafe')
+            return
+
+        if raw_batch:
+            # Batch uint8 0-255 untuk model yang mengharapkan nilai 0-1
+            np.multiply(img_batch, np.float32(1.0 / 255.0), out=scratch)
+            img_batch = scratch
+            if not self.quantized_input:
+                np.copyto(input_view, scratch, casting='unsafe')
+                return
+
+        # q = round(x / scale + zero_point), dikerjakan in-place di buffer kerja
+        np.multiply(img_batch, np.float32(1.0 / self.input_scale), out=scratch)
+        scratch += np.float32(self.input_zero_point)
+        np.rint(scratch, out=scratch)
+        np.clip(scratch, self._input_range[0], self._input_range[1], out=scratch)
+        np.copyto(input_view, scratch, casting='unsafe')
+
+    def _read_output(self):
+        """Ambil output sebagai float32, output int8/uint8 di-dequantize"""
+        output_data = self.interpreter.get_tensor(self.output_index)
+        if self.quantized_output:
+            output_data = output_data.astype(np.float32)
+            output_data -= np.float32(self.output_zero_point)
+            output_data *= np.float32(self.output_scale)
+        return output_data
+
+    def _invoke(self, img_batch):
+        self._write_input(img_batch)
+        self.interpreter.invoke()
+        return self._read_output()
+
+    def run(self, img_batch):
+        """
+        Jalankan inferensi untuk satu batch
+
+        Args:
+            img_batch: Array float (N, tinggi, lebar, 3) dengan nilai 0-1, atau
+                uint8 0-255 (paling murah untuk model dengan uint8_input)
+
+        Returns:
+            Array probabilitas float32 (N, jumlah kelas)
+        """
+        img_batch = np.asarray(img_batch)
+        if tuple(img_batch.shape[1:3]) != self.input_size:
+            # Jarang terjadi (ukuran input model bukan 224x224), TensorFlow di-import hanya di sini
+            import tensorflow as tf
+            resized = tf.image.resize(img_batch, self.input_size).numpy()
+            if img_batch.dtype == np.uint8:
+                resized = np.clip(np.rint(resized), 0, 255).astype(np.uint8)
+            img_batch = resized
+
+        if self._resize_batch(len(img_batch)):
+            return self._invoke(img_batch)
+
+        # Model dengan batch tetap: jalankan per potongan sebesar batch model, potongan
+        # terakhir yang kurang di-pad nol lalu output-nya dipotong lagi
+        outputs = []
+        for start in range(0, len(img_batch), self.batch_size):
+            chunk = img_batch[start:start + self.batch_size]
+            real_size = len(chunk)
+            if real_size < self.batch_size:
+                padded = np.zeros((self.batch_size,) + chunk.shape[1:], dtype=chunk.dtype)
+                padded[:real_size] = chunk
+                chunk = padded
+            outputs.append(self._invoke(chunk)[:real_size])
+        return np.concatenate(outputs)
+
+    def close(self):
+        """Runner tunggal tidak punya resource tambahan, ada agar seragam dengan pool"""
+        pass
+
+
+class TFLiteRunnerPool:
+    """
+    Pool beberapa TFLiteRunner independen, masing-masing dipakai satu thread.
+
+    Satu batch dibagi rata ke semua interpreter dan di-invoke barengan. Invoke TFLite
+    melepas GIL, jadi cocok buat mesin dengan banyak core di mana satu interpreter
+    multi-thread tidak bisa memakai semua core secara efisien.
+    """
+
+    def __init__(self, runners):
+        """
+        Inisialisasi TFLiteRunnerPool
+
+        Args:
+            runners: List TFLiteRunner dari model yang sama
+        """
+        self.runners = list(runners)
+        self.input_size = self.runners[0].input_size
+        self.uint8_input = self.runners[0].uint8_input
+        self._executor = ThreadPoolExecutor(max_workers=len(self.runners),
+                                            thread_name_prefix="tflite")
+
+    def run(self, img_batch):
+        """
+        Jalankan inferensi untuk satu batch, dibagi ke semua interpreter
+
+        Returns:
+            Array probabilitas float32 (N, jumlah kelas) sesuai urutan input
+        """
+        img_batch = np.asarray(img_batch)
+        chunks = [chunk for chunk in np.array_split(img_batch, len(self.runners)) if len(chunk)]
+        outputs = self._executor.map(lambda job: job[0].run(job[1]), zip(self.runners, chunks))
+        return np.concatenate(list(outputs))
+
+    def close(self):
+        """Matikan thread pool"""
+        self._executor.shutdown(wait=True)
+
+
+def benchmark_settings(model_path, thread_counts=(1, 2, 4), xnnpack_options=(True, False),
+                       interpreter_counts=(1, 2), batch_size=32, iterations=10):
+    """
+    Sweep konfigurasi num_threads x XNNPACK x jumlah interpreter pada input sintetis
+
+    Args:
+        model_path: Path ke model .tflite
+        thread_counts: Nilai num_threads yang dicoba
+        xnnpack_options: Pakai/tidak pakai XNNPACK
+        interpreter_counts: Ukuran pool interpreter yang dicoba
+        batch_size: Gambar per batch
+        iterations: Jumlah batch yang diukur (setelah satu batch pemanasan)
+
+    Returns:
+        List dict {"num_threads", "use_xnnpack", "num_interpreters", "seconds",
+        "images_per_sec", "error"}, diurutkan dari yang tercepat
+    """
+    results = []
+    for use_xnnpack in xnnpack_options:
+        for num_interpreters in interpreter_counts:
+            for num_threads in thread_counts:
+                result = {"num_threads": num_threads, "use_xnnpack": use_xnnpack,
+                          "num_interpreters": num_interpreters, "seconds": None,
+                          "images_per_sec": 0.0, "error": None}
+                runner = None
+                try:
+                    runner = create_tflite_runner(model_path, num_threads, use_xnnpack, num_interpreters)
+                    height, width = runner.input_size
+                    img_batch = np.random.default_rng(0).random(
+                        (batch_size, height, width, 3), dtype=np.float32)
+
+                    # Pemanasan: alokasi tensor dan resize batch tidak ikut diukur
+                    runner.run(img_batch)
+                    start = time.perf_counter()
+                    for _ in range(iterations):
+                        runner.run(img_batch)
+                    elapsed = time.perf_counter() - start
+
+                    result["seconds"] = elapsed
+                    result["images_per_sec"] = batch_size * iterations / elapsed if elapsed > 0 else 0.0
+                except Exception as e:
+                    result["error"] = str(e)
+                finally:
+                    if runner is not None:
+                        runner.close()
+                results.append(result)
+
+    results.sort(key=lambda r: r["images_per_sec"], reverse=True)
+    return results
+
+
+# Sweep konfigurasi: python tflite_runner.py model.tflite [--threads 1 2 4] [--interpreters 1 2]
+if __name__ == "__main__":
+    import argparse
+
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark num_threads, XNNPACK, dan pool interpreter TFLite")
+    parser.add_argument("model", help="Path ke model .tflite")
+    parser.add_argument("--threads", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cpu_count}), help="Nilai num_threads yang dicoba")
+    parser.add_argument("--interpreters", type=int, nargs="+", default=[1, 2, 4],
+                        help="Ukuran pool interpreter yang dicoba")
+    parser.add_argument("--no-xnnpack-sweep", action="store_true",
+                        help="Hanya ukur dengan XNNPACK aktif")
+    parser.add_argument("--batch-size", type=int, default=32, help="Gambar per batch")
+    parser.add_argument("--iterations", type=int, default=10, help="Jumlah batch yang diukur")
+    args = parser.parse_args()
+
+    xnnpack_options = (True,) if args.no_xnnpack_sweep else (True, False)
+    for r in benchmark_settings(args.model, args.threads, xnnpack_options, args.interpreters,
+                                args.batch_size, args.iterations):
+        label = (f"threads={r['num_threads']:<3} xnnpack={'on ' if r['use_xnnpack'] else 'off'} "
+                 f"interpreters={r['num_interpreters']:<3}")
+        if r["error"]:
+            print(f"{label}: gagal ({r['error']})")
+        else:
+            print(f"{label}: {r['images_per_sec']:.1f} gambar/detik")